@@ -0,0 +1,91 @@
+"""
+Shared bootstrap for the benchmark scripts.
+
+Benchmarks run against a throwaway SQLite database with the AI call
+disabled, so they never touch db.sqlite3 or the network.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django(db_name=":memory:"):
+    if str(BASE_DIR) not in sys.path:
+        sys.path.insert(0, str(BASE_DIR))
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "compare_engine.settings")
+    os.environ["GOOGLE_API_KEY"] = ""
+    os.environ.setdefault("ALLOWED_HOSTS", "testserver,localhost")
+
+    import django
+    from django.conf import settings
+
+    settings.DATABASES["default"]["NAME"] = db_name
+    # pages link static files by name, so no collectstatic manifest is needed
+    settings.STORAGES = {
+        **settings.STORAGES,
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    }
+    django.setup()
+    _placeholder_vendor_assets(settings)
+
+    from django.core.management import call_command
+
+    call_command("migrate", verbosity=0)
+
+
+def _placeholder_vendor_assets(settings):
+    """
+    Stand in empty files for vendored assets that have not been fetched, so
+    pages render without the fetch_static_assets deploy step.
+    """
+    from core.services.static_assets import VENDOR_DIR, missing_vendor_assets
+
+    missing = missing_vendor_assets()
+    if not missing:
+        return
+    static_dir = tempfile.mkdtemp(prefix="bench-static-")
+    for name in missing:
+        path = Path(static_dir, VENDOR_DIR, name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.touch()
+    settings.STATICFILES_DIRS = [*settings.STATICFILES_DIRS, static_dir]
+
+    from django.contrib.staticfiles import finders
+
+    finders.get_finder.cache_clear()
+
+
+def make_laptop_category(name="Laptop"):
+    from core.models import Category, SpecificationField
+
+    category, _ = Category.objects.get_or_create(name=name)
+    for field_name, field_type in [
+        ("price", "number"),
+        ("ram", "number"),
+        ("ssd", "number"),
+        ("battery", "number"),
+        ("processor_name", "text"),
+        ("gpu_name", "text"),
+    ]:
+        SpecificationField.objects.get_or_create(
+            category=category, name=field_name, defaults={"field_type": field_type}
+        )
+    return category
+
+
+def seed_sample_categories():
+    """Seed the categories from add_sample_data.py and return them by name."""
+    import contextlib
+    import io
+    import runpy
+
+    from core.models import Category
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        runpy.run_path(str(BASE_DIR / "add_sample_data.py"))
+    return list(Category.objects.order_by("name"))
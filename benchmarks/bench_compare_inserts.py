@@ -0,0 +1,98 @@
+"""
+Benchmark: DB round trips of the compare POST, per-row create() vs bulk_create().
+
+Usage:
+  python benchmarks/bench_compare_inserts.py [--rows 5 50 500]
+"""
+
+import argparse
+import time
+
+from _setup import make_laptop_category, setup_django
+
+
+def formset_post(category, rows):
+    data = {
+        "form-TOTAL_FORMS": str(rows),
+        "form-INITIAL_FORMS": "0",
+        "purpose": "gaming",
+    }
+    for i in range(rows):
+        data.update({
+            f"form-{i}-item_name": f"Laptop {i}",
+            f"form-{i}-price": 40000 + i,
+            f"form-{i}-ram": 16,
+            f"form-{i}-ssd": 512,
+            f"form-{i}-battery": 8,
+            f"form-{i}-processor_name": "i7",
+            f"form-{i}-gpu_name": "RTX 3050",
+        })
+    return data
+
+
+def per_row_insert(category, rows):
+    """The previous compare() behaviour: one create() per formset row."""
+    from core.models import UserItem
+
+    return [
+        UserItem.objects.create(
+            category=category,
+            item_name=f"Laptop {i}",
+            specifications={"price": 40000 + i, "ram": 16, "ssd": 512},
+        ).id
+        for i in range(rows)
+    ]
+
+
+def bulk_insert(category, rows):
+    from django.db import transaction
+
+    from core.models import UserItem
+
+    items = [
+        UserItem(
+            category=category,
+            item_name=f"Laptop {i}",
+            specifications={"price": 40000 + i, "ram": 16, "ssd": 512},
+        )
+        for i in range(rows)
+    ]
+    with transaction.atomic():
+        return [item.id for item in UserItem.objects.bulk_create(items)]
+
+
+def measure(fn, *args):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as ctx:
+        start = time.perf_counter()
+        fn(*args)
+        elapsed = time.perf_counter() - start
+    return len(ctx.captured_queries), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[5, 50, 500])
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.test import Client
+
+    category = make_laptop_category()
+    client = Client()
+
+    print(f"{'rows':>6} {'create() queries':>17} {'bulk queries':>13} {'view POST queries':>18} "
+          f"{'create() ms':>12} {'bulk ms':>9}")
+    for rows in args.rows:
+        before_q, before_t = measure(per_row_insert, category, rows)
+        after_q, after_t = measure(bulk_insert, category, rows)
+        view_q, _ = measure(client.post, f"/compare/{category.id}/", formset_post(category, rows))
+        print(f"{rows:>6} {before_q:>17} {after_q:>13} {view_q:>18} "
+              f"{before_t * 1000:>12.1f} {after_t * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
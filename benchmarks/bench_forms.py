@@ -0,0 +1,103 @@
+"""
+Benchmark: compare-page form construction and validation.
+
+Dynamic forms (fields built in __init__ for every form) vs the compiled
+per-category classes from form_registry, for a category with many spec
+fields and a formset with many rows.
+
+Usage:
+  python benchmarks/bench_forms.py [--fields 50] [--rows 20] [--repeat 200]
+"""
+
+import argparse
+import statistics
+import time
+
+from _setup import setup_django
+
+
+def make_category(fields):
+    from core.models import Category, SpecificationField
+
+    category = Category.objects.create(name=f"Laptop bench {fields}")
+    SpecificationField.objects.bulk_create([
+        SpecificationField(
+            category=category,
+            name=f"spec_{i:02d}",
+            field_type="number" if i % 5 else "text",
+        )
+        for i in range(fields)
+    ])
+    return category
+
+
+def post_data(spec_fields, rows):
+    data = {
+        "form-TOTAL_FORMS": str(rows),
+        "form-INITIAL_FORMS": "0",
+        "purpose": "gaming",
+        "max_budget": "90000",
+    }
+    for i in range(rows):
+        data[f"form-{i}-item_name"] = f"Item {i}"
+        for sf in spec_fields:
+            data[f"form-{i}-{sf.name}"] = "12.5" if sf.field_type == "number" else "text"
+    return data
+
+
+def dynamic_forms(category, spec_fields, data):
+    from django.forms import formset_factory
+
+    from core.forms import PurposeRequirementsForm, UserItemEntryForm
+
+    FormSet = formset_factory(UserItemEntryForm, extra=3, can_delete=True)
+    formset = FormSet(data, form_kwargs={"spec_fields": spec_fields})
+    purpose_form = PurposeRequirementsForm(data, category=category)
+    assert formset.is_valid() and purpose_form.is_valid()
+    return [form.get_specifications() for form in formset]
+
+
+def compiled_forms(category, spec_fields, data):
+    from core.forms import form_registry
+
+    formset = form_registry.item_formset(category, spec_fields)(data)
+    purpose_form = form_registry.purpose_form(category)(data)
+    assert formset.is_valid() and purpose_form.is_valid()
+    return [form.get_specifications() for form in formset]
+
+
+def timed(fn, args, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fields", type=int, default=50)
+    parser.add_argument("--rows", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from core.services.catalog_cache import get_spec_fields
+
+    category = make_category(args.fields)
+    spec_fields = get_spec_fields(category.id)
+    data = post_data(spec_fields, args.rows)
+
+    assert dynamic_forms(category, spec_fields, data) == compiled_forms(category, spec_fields, data)
+
+    print(f"{args.fields} spec fields x {args.rows} rows, {args.repeat} runs (construct + validate)")
+    for label, fn in [("dynamic", dynamic_forms), ("compiled", compiled_forms)]:
+        p50, p99 = timed(fn, (category, spec_fields, data), args.repeat)
+        print(f"  {label:<9} p50 {p50:7.2f} ms   p99 {p99:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Benchmark: rendering the result page for a large comparison.
+
+For --items ranked items x --fields spec fields, all on one page:
+
+  table     the comparison table, each cell looked up with the get_item
+            filter (as result.html used to) vs. the pre-shaped row cells
+  page      the whole result page from views._render_run, with the
+            table's fragment cache cold (every render builds it) and warm
+  template  loading result.html with the cached loader vs. parsing it again
+            (what every render paid without the cached loader)
+  gzip      the page's size before and after CompressionMiddleware, and
+            the time compression adds
+
+Usage:
+  python benchmarks/bench_render.py [--items 500] [--fields 30] [--repeat 50]
+"""
+
+import argparse
+import statistics
+import time
+
+from _setup import BASE_DIR, setup_django
+
+FILTER_TABLE = """
+{% for row in result_rows %}<tr><td>#{{ row.rank }}</td><td>{{ row.item.item_name }}</td>
+{% for sf in spec_fields %}<td>{{ row.specs|get_item:sf.name }}</td>
+{% endfor %}<td>{{ row.score }}</td></tr>
+{% endfor %}
+"""
+
+CELLS_TABLE = """
+{% for row in result_rows %}<tr><td>#{{ row.rank }}</td><td>{{ row.item.item_name }}</td>
+{% for value in row.cells %}<td>{{ value }}</td>
+{% endfor %}<td>{{ row.score }}</td></tr>
+{% endfor %}
+"""
+
+
+def make_category(fields):
+    from core.models import Category, SpecificationField
+
+    category = Category.objects.create(name=f"Laptop render {fields}")
+    SpecificationField.objects.bulk_create([
+        SpecificationField(
+            category=category,
+            name=f"spec_{i:02d}",
+            field_type="number" if i % 5 else "text",
+        )
+        for i in range(fields)
+    ])
+    return category
+
+
+def make_run(category, spec_fields, items):
+    from django.db import transaction
+
+    from core.models import UserItem
+    from core.services.comparison_runs import get_or_create_run
+
+    rows = []
+    for i in range(items):
+        specs = {
+            sf.name: (i * 7 + j) % 97 if sf.field_type == "number" else f"value {i % 13}"
+            for j, sf in enumerate(spec_fields)
+        }
+        specs.update({"price": 30000 + i * 10, "ram": 8 << (i % 3)})
+        rows.append(UserItem(category=category, item_name=f"Item {i}", specifications=specs))
+    for item in rows:
+        item.compute_features()
+    with transaction.atomic():
+        rows = UserItem.objects.bulk_create(rows)
+
+    return get_or_create_run(category, "gaming", {}, rows, spec_fields=spec_fields)
+
+
+def table_context(run):
+    result_rows = []
+    for rank, (item, score) in enumerate(run.ranked_items, start=1):
+        specs = item.specifications or {}
+        result_rows.append({
+            "rank": rank,
+            "item": item,
+            "score": score,
+            "specs": specs,
+            "cells": [specs.get(name, "") for name in run.spec_fields],
+        })
+    return {"result_rows": result_rows, "spec_fields": [{"name": name} for name in run.spec_fields]}
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[max(0, int(len(samples) * 0.99) - 1)]
+
+
+def report(label, fn, repeat):
+    p50, p99 = timed(fn, repeat)
+    print(f"  {label:<24} p50 {p50:8.2f} ms   p99 {p99:8.2f} ms")
+    return p50
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--fields", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.core.cache import cache
+    from django.template import Engine, engines
+    from django.template.loader import get_template
+    from django.test import RequestFactory, override_settings
+    from django.utils.text import compress_string
+
+    from core.services.catalog_cache import get_spec_fields
+    from core.views import _render_run
+
+    category = make_category(args.fields)
+    spec_fields = get_spec_fields(category.id)
+    run = make_run(category, spec_fields, args.items)
+
+    print(f"{args.items} items x {args.fields} spec fields on one page, {args.repeat} runs")
+
+    print("table")
+    engine = engines["django"]
+    context = table_context(run)
+    filter_table = engine.from_string(FILTER_TABLE)
+    cells_table = engine.from_string(CELLS_TABLE)
+    assert filter_table.render(context) == cells_table.render(context)
+    report("get_item filter per cell", lambda: filter_table.render(context), args.repeat)
+    report("pre-shaped cells", lambda: cells_table.render(context), args.repeat)
+
+    print("page")
+    request = RequestFactory().get(f"/result/{run.run_id}/")
+    with override_settings(RESULT_PAGE_SIZE=args.items):
+        def cold():
+            cache.clear()
+            return _render_run(request, run)
+
+        report("fragment cache cold", cold, args.repeat)
+        report("fragment cache warm", lambda: _render_run(request, run), args.repeat)
+        html = _render_run(request, run).content
+
+    print("template")
+    uncached = Engine(
+        dirs=[str(BASE_DIR / "templates")],
+        loaders=["django.template.loaders.filesystem.Loader"],
+        builtins=["core.templatetags.core_extras"],
+        libraries={"cache": "django.templatetags.cache", "static": "django.templatetags.static"},
+    )
+    report("cached loader", lambda: get_template("result.html"), args.repeat)
+    report("parsed every time", lambda: uncached.get_template("result.html"), args.repeat)
+
+    print("gzip")
+    compressed = compress_string(html)
+    print(f"  {len(html):,} bytes -> {len(compressed):,} bytes ({len(compressed) / len(html):.0%})")
+    report("compress", lambda: compress_string(html), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
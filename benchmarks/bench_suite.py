@@ -0,0 +1,400 @@
+"""
+Benchmark suite: comparison engine and request paths.
+
+Runs on a throwaway SQLite database with the AI call stubbed, over
+synthetic catalogues for the categories seeded by add_sample_data.py, and
+reports throughput, p50/p99 latency and peak traced memory for:
+
+  engine   analyze_products over catalogues of --sizes items
+  lookup   get_processor_score / get_gpu_score, uncached and memoized names
+  compare  the formset POST to views.compare (--rows items per post)
+  result   views.result: scoring a new run ("cold") and serving a stored one
+
+Usage:
+  python benchmarks/bench_suite.py
+  python benchmarks/bench_suite.py --sizes 10 1000 1000000 --only engine
+  python benchmarks/bench_suite.py --save baseline.json
+  python benchmarks/bench_suite.py --compare baseline.json [--threshold 0.2]
+
+--save writes the results (plus commit and versions) as JSON. --compare
+prints the p50 change against a saved baseline and exits with status 1
+when any benchmark got slower by more than --threshold.
+"""
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from unittest import mock
+
+from _setup import BASE_DIR, seed_sample_categories, setup_django
+
+BENCHES = ("engine", "lookup", "compare", "result")
+
+NUMBER_RANGES = {
+    "price": (15000, 250000),
+    "ram": (4, 64),
+    "ssd": (128, 2048),
+    "storage": (32, 1024),
+    "battery": (3, 18),
+}
+TEXT_VALUES = ("alpha", "bravo", "charlie", "delta", "echo")
+REQUIREMENTS = {"max_budget": 200000}
+
+
+# ----------------------------------------------------
+# SYNTHETIC CATALOGUES
+# ----------------------------------------------------
+class SyntheticItem:
+    """Unsaved stand-in for UserItem; a million model instances would not fit in memory."""
+
+    __slots__ = ("item_name", "specifications", "price", "ram", "ssd", "processor_score", "gpu_score")
+
+    def __init__(self, item_name, specifications):
+        from core.services.comparison_engine import ItemFeatures
+
+        self.item_name = item_name
+        self.specifications = specifications
+        features = ItemFeatures.from_specs(specifications)
+        for field in ItemFeatures.FIELDS:
+            setattr(self, field, getattr(features, field))
+
+
+def synthetic_specs(rng, category, spec_fields):
+    from core.services.comparison_engine import GPU_MAP, PROCESSOR_MAP
+
+    specs = {}
+    for sf in spec_fields:
+        if sf.field_type == "number":
+            low, high = NUMBER_RANGES.get(sf.name, (1, 10))
+            specs[sf.name] = round(rng.uniform(low, high), 1)
+        else:
+            specs[sf.name] = rng.choice(TEXT_VALUES)
+
+    if "laptop" in category.name.lower():
+        specs["processor_name"] = f"{rng.choice(list(PROCESSOR_MAP))} {rng.randint(1000, 9999)}"
+        specs["gpu_name"] = f"{rng.choice(list(GPU_MAP))} laptop gpu"
+    return specs
+
+
+def synthetic_catalogue(category, spec_fields, size, seed=0):
+    rng = random.Random(f"{seed}:{category.name}")
+    return [
+        SyntheticItem(f"{category.name} {i}", synthetic_specs(rng, category, spec_fields))
+        for i in range(size)
+    ]
+
+
+def default_purpose(category):
+    from core.forms import purpose_config
+
+    choices, _ = purpose_config(category.name)
+    return choices[0][0] if choices else None
+
+
+# ----------------------------------------------------
+# MEASUREMENT
+# ----------------------------------------------------
+def measure(fn, repeat, budget):
+    """
+    Time fn() up to `repeat` times, stopping early once `budget` seconds
+    have passed (but never before 3 samples). Returns samples in ms.
+    """
+    samples = []
+    deadline = time.perf_counter() + budget
+    while len(samples) < repeat and (len(samples) < 3 or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def traced_peak_kb(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def percentile(sorted_samples, fraction):
+    index = min(len(sorted_samples) - 1, max(0, round(fraction * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+def record(results, bench, category, size, samples, units, peak_kb):
+    """Summarize samples; throughput is units per second at the median latency."""
+    samples = sorted(samples)
+    p50 = statistics.median(samples)
+    row = {
+        "bench": bench,
+        "category": category,
+        "size": size,
+        "runs": len(samples),
+        "p50_ms": round(p50, 4),
+        "p99_ms": round(percentile(samples, 0.99), 4),
+        "throughput": round(units / (p50 / 1000), 1) if p50 else None,
+        "peak_kb": round(peak_kb, 1),
+    }
+    results.append(row)
+    print(f"{bench:<12} {category:<8} {size:>9} {row['runs']:>5} {row['p50_ms']:>11.3f} "
+          f"{row['p99_ms']:>11.3f} {row['throughput'] or 0:>14,.0f} {row['peak_kb']:>11,.0f}")
+    return row
+
+
+# ----------------------------------------------------
+# BENCHMARKS
+# ----------------------------------------------------
+def bench_engine(results, categories, args):
+    from core.services.catalog_cache import get_spec_fields
+    from core.services.category_weights import category_weights
+    from core.services.comparison_engine import analyze_products
+
+    for category in categories:
+        spec_fields = get_spec_fields(category.id)
+        purpose = default_purpose(category)
+        # category weights so every category scores on its own spec fields
+        weights = category_weights.weights_for(category.id, purpose)
+        catalogue = synthetic_catalogue(category, spec_fields, max(args.sizes))
+
+        for size in args.sizes:
+            items = catalogue[:size]
+
+            def run():
+                analyze_products(purpose, REQUIREMENTS, items, weights=weights, top_k=args.top_k)
+
+            samples = measure(run, args.repeat, args.budget)
+            record(results, "engine", category.name, size, samples, size, traced_peak_kb(run))
+        del catalogue
+
+
+def bench_lookup(results, args):
+    from core.services.comparison_engine import GPU_MAP, PROCESSOR_MAP, get_gpu_score, get_processor_score
+
+    names = args.lookup_names
+    rng = random.Random(0)
+    for label, lookup, keys in [
+        ("processor", get_processor_score, list(PROCESSOR_MAP)),
+        ("gpu", get_gpu_score, list(GPU_MAP)),
+    ]:
+        memoized = [f"{rng.choice(keys)} {i % 50}" for i in range(names)]
+        counter = iter(range(10 ** 12))
+
+        def cold():
+            # names never seen before, so every call misses the memo
+            batch = next(counter)
+            for i in range(names):
+                lookup(f"{keys[i % len(keys)]} {batch}-{i}")
+
+        def warm():
+            for name in memoized:
+                lookup(name)
+
+        warm()
+        for mode, fn in [("cold", cold), ("memo", warm)]:
+            samples = measure(fn, args.repeat, args.budget)
+            record(results, f"lookup_{mode}", label, names, samples, names, traced_peak_kb(fn))
+
+
+def _post_data(category, spec_fields, rows, rng):
+    data = {
+        "form-TOTAL_FORMS": str(rows),
+        "form-INITIAL_FORMS": "0",
+        "purpose": default_purpose(category) or "",
+    }
+    for i in range(rows):
+        data[f"form-{i}-item_name"] = f"{category.name} {i}"
+        for name, value in synthetic_specs(rng, category, spec_fields).items():
+            data[f"form-{i}-{name}"] = value
+    return data
+
+
+def bench_compare(results, categories, args):
+    from django.test import Client
+
+    from core.services.catalog_cache import get_spec_fields
+
+    client = Client()
+    rng = random.Random(0)
+    for category in categories:
+        spec_fields = get_spec_fields(category.id)
+        url = f"/compare/{category.id}/"
+
+        for rows in args.rows:
+            data = _post_data(category, spec_fields, rows, rng)
+
+            def post():
+                response = client.post(url, data)
+                assert response.status_code == 302, response.status_code
+
+            samples = measure(post, args.repeat, args.budget)
+            record(results, "compare_post", category.name, rows, samples, rows, traced_peak_kb(post))
+
+
+def bench_result(results, categories, args):
+    from django.db import transaction
+    from django.test import Client
+    from django.utils.http import urlencode
+
+    from core.models import UserItem
+    from core.services.catalog_cache import get_spec_fields
+    from core.services.comparison_context import ComparisonContext, encode_context
+
+    client = Client()
+
+    for category in categories:
+        spec_fields = get_spec_fields(category.id)
+        purpose = default_purpose(category)
+
+        for size in args.request_sizes:
+            rng = random.Random(f"result:{category.name}:{size}")
+            items = [
+                UserItem(category=category, item_name=f"{category.name} {i}",
+                         specifications=synthetic_specs(rng, category, spec_fields))
+                for i in range(size)
+            ]
+            for item in items:
+                item.compute_features()
+            with transaction.atomic():
+                ids = [item.id for item in UserItem.objects.bulk_create(items, batch_size=2000)]
+
+            budgets = iter(range(10 ** 12))
+            url = None
+
+            def set_budget(max_budget):
+                nonlocal url
+                token = encode_context(ComparisonContext(
+                    category_id=category.id,
+                    item_ids=ids,
+                    purpose=purpose,
+                    requirements={"max_budget": max_budget},
+                ))
+                url = f"/result/{category.id}/?{urlencode({'ctx': token})}"
+
+            def get():
+                response = client.get(url)
+                assert response.status_code == 200, response.status_code
+
+            def cold():
+                # a budget no item reaches changes the run key but not the ranking
+                set_budget(10 ** 9 + next(budgets))
+                get()
+
+            samples = measure(cold, args.repeat, args.budget)
+            record(results, "result_cold", category.name, size, samples, size, traced_peak_kb(cold))
+
+            set_budget(10 ** 9)
+            get()
+            samples = measure(get, args.repeat, args.budget)
+            record(results, "result_warm", category.name, size, samples, size, traced_peak_kb(get))
+
+
+# ----------------------------------------------------
+# BASELINES
+# ----------------------------------------------------
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadata(args):
+    import django
+    import numpy
+
+    return {
+        "commit": _git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "numpy": numpy.__version__,
+        "machine": platform.platform(),
+        "args": {key: value for key, value in vars(args).items() if key not in ("save", "compare")},
+    }
+
+
+def _key(row):
+    return row["bench"], row["category"], row["size"]
+
+
+def compare_to_baseline(results, path, threshold):
+    """Print p50 changes against a baseline file; returns the regressed rows."""
+    with open(path) as f:
+        baseline = json.load(f)
+    previous = {_key(row): row for row in baseline["results"]}
+
+    print(f"\nvs {path} (commit {baseline['meta'].get('commit')}), threshold {threshold:.0%}")
+    regressions = []
+    for row in results:
+        before = previous.get(_key(row))
+        if before is None:
+            continue
+        change = row["p50_ms"] / before["p50_ms"] - 1 if before["p50_ms"] else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(row)
+        print(f"{row['bench']:<12} {row['category']:<8} {row['size']:>9} "
+              f"{before['p50_ms']:>11.3f} -> {row['p50_ms']:>11.3f} ms {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", choices=BENCHES, default=list(BENCHES))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000, 100000],
+                        help="catalogue sizes for the engine benchmark (up to 1000000)")
+    parser.add_argument("--request-sizes", type=int, nargs="+", default=[10, 100, 1000],
+                        help="stored items per views.result request")
+    parser.add_argument("--rows", type=int, nargs="+", default=[5, 50, 500],
+                        help="items per views.compare POST")
+    parser.add_argument("--lookup-names", type=int, default=10000)
+    parser.add_argument("--top-k", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=50, help="most runs per benchmark")
+    parser.add_argument("--budget", type=float, default=2.0, help="seconds per benchmark before stopping early")
+    parser.add_argument("--save", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="p50 slowdown counted as a regression")
+    args = parser.parse_args()
+
+    setup_django()
+    categories = seed_sample_categories()
+
+    results = []
+    print(f"{'bench':<12} {'category':<8} {'size':>9} {'runs':>5} {'p50 ms':>11} {'p99 ms':>11} "
+          f"{'items/s':>14} {'peak KiB':>11}")
+
+    # never call the real AI API; background explanation jobs get a canned text
+    with mock.patch("core.services.explanation_jobs.request_ai_explanation", return_value="Benchmark stub."):
+        if "engine" in args.only:
+            bench_engine(results, categories, args)
+        if "lookup" in args.only:
+            bench_lookup(results, args)
+        if "compare" in args.only:
+            bench_compare(results, categories, args)
+        if "result" in args.only:
+            bench_result(results, categories, args)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"meta": metadata(args), "results": results}, f, indent=2)
+        print(f"\nsaved {len(results)} results to {args.save}")
+
+    if args.compare and compare_to_baseline(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
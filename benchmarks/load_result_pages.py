@@ -0,0 +1,336 @@
+"""
+Load test: result pages with a slow LLM, gunicorn (WSGI) vs uvicorn (ASGI).
+
+Starts the fake Gemini stub with a reply delay, then serves the app on a
+throwaway SQLite database with each server in turn and runs --users
+concurrent users against it. Every user:
+
+  GET  /compare/<id>/          (form + CSRF token)
+  POST /compare/<id>/          (3 items; prices unique per user, so every
+                                user gets a new run and a new LLM call)
+  GET  /result/<id>/           (the page; the explanation is not awaited)
+  GET  <data-stream-url>       (server-sent events until `done`)
+
+and reports p50/p99 of the result page and of the full explanation, and
+users completed per second. Under gunicorn every open explanation stream
+holds a sync worker for the whole LLM call; under uvicorn the streams
+share one event loop.
+
+Usage:
+  python benchmarks/load_result_pages.py
+  python benchmarks/load_result_pages.py --users 200 --delay 2 --workers 9
+  python benchmarks/load_result_pages.py --servers uvicorn
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from _setup import BASE_DIR, make_laptop_category, setup_django
+
+SERVERS = ("gunicorn", "uvicorn")
+
+REPLY = "This laptop balances price and performance for the purpose you picked."
+
+# every server process must see the same sessions, job prompts and explanations
+BENCH_SETTINGS = '''
+from compare_engine.settings import *  # noqa: F401,F403
+
+CACHES["default"] = {{
+    "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+    "LOCATION": {cache_dir!r},
+    "OPTIONS": {{"MAX_ENTRIES": 100000}},
+}}
+CACHES["ai_explanations"] = {{
+    "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+    "LOCATION": {explanation_dir!r},
+    "OPTIONS": {{"MAX_ENTRIES": 100000}},
+}}
+DATABASES["default"]["OPTIONS"] = {{"timeout": 60}}
+STORAGES["staticfiles"] = {{"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"}}
+# includes setup_django's stand-ins for vendored files that were never fetched
+STATICFILES_DIRS = {staticfiles_dirs!r}
+'''
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[pct - 1]
+
+
+# ----------------------------------------------------
+# PROCESSES
+# ----------------------------------------------------
+def prepare(workdir):
+    """Migrated SQLite database with the laptop category, plus the settings module."""
+    setup_django(str(workdir / "db.sqlite3"))
+    category = make_laptop_category()
+
+    from django.conf import settings
+    from django.db import connections
+
+    connections.close_all()
+
+    (workdir / "bench_settings.py").write_text(BENCH_SETTINGS.format(
+        cache_dir=str(workdir / "cache"),
+        explanation_dir=str(workdir / "explanations"),
+        staticfiles_dirs=[str(path) for path in settings.STATICFILES_DIRS],
+    ))
+    return category.id
+
+
+def server_env(workdir, gemini_port, users):
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": os.pathsep.join([str(workdir), str(BASE_DIR)]),
+        "DJANGO_SETTINGS_MODULE": "bench_settings",
+        "DATABASE_URL": f"sqlite:///{workdir / 'db.sqlite3'}",
+        "ALLOWED_HOSTS": "127.0.0.1,localhost",
+        "DEBUG": "False",
+        "GOOGLE_API_KEY": "load-test",
+        "GEMINI_API_URL": f"http://127.0.0.1:{gemini_port}/generateContent",
+        # let the server, not the client's concurrency cap, be the bottleneck
+        "GEMINI_MAX_CONCURRENCY": str(users),
+        "GEMINI_TIMEOUT": "120",
+        "AI_EXPLANATION_STREAMING": "True",
+        # every result page asks the LLM, rather than only on a click
+        "AI_EXPLANATION_MODE": "llm",
+    })
+    return env
+
+
+def server_command(name, port, workers):
+    if name == "gunicorn":
+        return [
+            sys.executable, "-m", "gunicorn", "compare_engine.wsgi:application",
+            "--bind", f"127.0.0.1:{port}",
+            "--workers", str(workers),
+            "--worker-class", "sync",
+            "--backlog", "2048",
+            "--timeout", "300",
+            "--log-level", "warning",
+        ]
+    return [
+        sys.executable, "-m", "uvicorn", "compare_engine.asgi:application",
+        "--host", "127.0.0.1",
+        "--port", str(port),
+        "--workers", str(workers),
+        "--backlog", "2048",
+        "--lifespan", "off",
+        "--no-access-log",
+        "--log-level", "warning",
+    ]
+
+
+def wait_until_up(port, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def stop(process):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+# ----------------------------------------------------
+# USERS
+# ----------------------------------------------------
+def compare_post(user, csrf_token):
+    data = {
+        "csrfmiddlewaretoken": csrf_token,
+        "form-TOTAL_FORMS": "3",
+        "form-INITIAL_FORMS": "0",
+        "purpose": "gaming",
+    }
+    for i in range(3):
+        data.update({
+            f"form-{i}-item_name": f"Laptop {user}-{i}",
+            f"form-{i}-price": 40000 + user * 10 + i,
+            f"form-{i}-ram": 8 * (i + 1),
+            f"form-{i}-ssd": 512,
+            f"form-{i}-battery": 8,
+            f"form-{i}-processor_name": "i7",
+            f"form-{i}-gpu_name": "RTX 3050",
+        })
+    return data
+
+
+async def run_user(httpx, base_url, category_id, user, start_gate):
+    async with httpx.AsyncClient(base_url=base_url, timeout=600.0, follow_redirects=False) as client:
+        await start_gate.wait()
+        started = time.perf_counter()
+
+        page = await client.get(f"/compare/{category_id}/")
+        page.raise_for_status()
+        csrf_token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', page.text).group(1)
+
+        posted = await client.post(f"/compare/{category_id}/", data=compare_post(user, csrf_token))
+        if posted.status_code != 302:
+            raise RuntimeError(f"compare returned {posted.status_code}")
+
+        result_started = time.perf_counter()
+        result = await client.get(posted.headers["Location"])
+        result.raise_for_status()
+        result_seconds = time.perf_counter() - result_started
+
+        stream_url = re.search(r'data-stream-url="([^"]+)"', result.text)
+        if stream_url is None:
+            raise RuntimeError("result page has no explanation stream")
+
+        text = None
+        async with client.stream("GET", stream_url.group(1)) as events:
+            events.raise_for_status()
+            event = None
+            async for line in events.aiter_lines():
+                if line.startswith("event:"):
+                    event = line[len("event:"):].strip()
+                elif line.startswith("data:") and event == "done":
+                    text = line[len("data:"):]
+                    break
+
+        return result_seconds, time.perf_counter() - started, text is not None and REPLY in text
+
+
+async def run_load(base_url, category_id, users):
+    import httpx
+
+    start_gate = asyncio.Event()
+    tasks = [
+        asyncio.create_task(run_user(httpx, base_url, category_id, user, start_gate))
+        for user in range(users)
+    ]
+    await asyncio.sleep(0.5)  # let every client get ready
+
+    started = time.perf_counter()
+    start_gate.set()
+    outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+    wall = time.perf_counter() - started
+
+    done = [outcome for outcome in outcomes if not isinstance(outcome, BaseException)]
+    errors = [outcome for outcome in outcomes if isinstance(outcome, BaseException)]
+    result_times = sorted(outcome[0] for outcome in done)
+    total_times = sorted(outcome[1] for outcome in done)
+    return {
+        "completed": len(done),
+        "errors": len(errors),
+        "first_error": repr(errors[0]) if errors else "",
+        "fallbacks": sum(1 for outcome in done if not outcome[2]),
+        "wall": wall,
+        "throughput": len(done) / wall if wall else 0.0,
+        "result_p50": percentile(result_times, 50),
+        "result_p99": percentile(result_times, 99),
+        "total_p50": percentile(total_times, 50),
+        "total_p99": percentile(total_times, 99),
+    }
+
+
+def bench_server(name, workdir, category_id, env, args):
+    port = free_port()
+    workers = args.workers if name == "gunicorn" else args.uvicorn_workers
+
+    # fresh caches, so one server's explanations are not served to the next
+    for cache_dir in ("cache", "explanations"):
+        shutil.rmtree(workdir / cache_dir, ignore_errors=True)
+
+    process = subprocess.Popen(server_command(name, port, workers), cwd=workdir, env=env)
+    try:
+        wait_until_up(port)
+        stats = asyncio.run(run_load(f"http://127.0.0.1:{port}", category_id, args.users))
+    finally:
+        stop(process)
+
+    stats.update({"server": name, "workers": workers})
+    return stats
+
+
+def print_results(results, args):
+    print(
+        f"\n{args.users} users, LLM delay {args.delay:.1f} s + {args.chunk_delay * 1000:.0f} ms per streamed word\n"
+    )
+    header = (
+        f"{'server':<10}{'workers':>8}{'done':>6}{'errors':>8}{'fallback':>10}"
+        f"{'result p50':>12}{'result p99':>12}{'total p50':>11}{'total p99':>11}{'users/s':>9}"
+    )
+    print(header)
+    print("-" * len(header))
+    for stats in results:
+        print(
+            f"{stats['server']:<10}{stats['workers']:>8}{stats['completed']:>6}{stats['errors']:>8}{stats['fallbacks']:>10}"
+            f"{stats['result_p50']:>11.2f}s{stats['result_p99']:>11.2f}s"
+            f"{stats['total_p50']:>10.2f}s{stats['total_p99']:>10.2f}s{stats['throughput']:>9.1f}"
+        )
+    for stats in results:
+        if stats["first_error"]:
+            print(f"{stats['server']}: first error: {stats['first_error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--delay", type=float, default=1.0, help="Seconds the fake LLM waits before replying")
+    parser.add_argument("--chunk-delay", type=float, default=0.02, help="Seconds between streamed words")
+    parser.add_argument(
+        "--workers", type=int, default=2 * (os.cpu_count() or 1) + 1, help="gunicorn sync workers (default 2 x CPUs + 1)"
+    )
+    parser.add_argument("--uvicorn-workers", type=int, default=1)
+    parser.add_argument("--servers", nargs="+", choices=SERVERS, default=list(SERVERS))
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="comparex-load-"))
+    try:
+        category_id = prepare(workdir)
+
+        gemini_port = free_port()
+        env = server_env(workdir, gemini_port, args.users)
+        gemini = subprocess.Popen(
+            [
+                sys.executable, str(BASE_DIR / "manage.py"), "fake_gemini",
+                "--port", str(gemini_port),
+                "--delay", str(args.delay),
+                "--chunk-delay", str(args.chunk_delay),
+                "--reply", REPLY,
+            ],
+            env=env,
+            stdout=subprocess.DEVNULL,
+        )
+        try:
+            wait_until_up(gemini_port)
+            results = [bench_server(name, workdir, category_id, env, args) for name in args.servers]
+        finally:
+            stop(gemini)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print_results(results, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+Load test: handing a comparison from the compare page to the result page,
+through the database session vs. the signed context token.
+
+Runs on a throwaway SQLite database (a file, so every thread shares it).
+
+  views    one real compare POST + result GET per category, counting the
+           queries that touch django_session
+  handoff  --users threads, each doing --rounds compare -> result
+           hand-offs over --categories categories:
+             session  what the views used to do: the compare request loads
+                      the user's session and saves three keys for the
+                      category, the result request loads it again
+             token    encode_context() on compare, decode_context() on result
+
+Reports hand-offs per second, p50/p99 latency, django_session queries per
+hand-off and the size of the session table afterwards.
+
+Usage:
+  python benchmarks/load_sessions.py
+  python benchmarks/load_sessions.py --users 100 --rounds 50 --categories 5
+"""
+
+import argparse
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from _setup import make_laptop_category, setup_django
+
+MODES = ("session", "token")
+
+REQUIREMENTS = {"max_budget": 80000, "min_ram": 8}
+
+
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[pct - 1]
+
+
+class SessionQueries:
+    """connection.execute_wrapper that counts queries on django_session."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if "django_session" in sql:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+
+def session_stats():
+    from django.contrib.sessions.models import Session
+    from django.db import connection
+
+    rows = Session.objects.count()
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT COALESCE(SUM(LENGTH(session_data)), 0) FROM django_session")
+        size = cursor.fetchone()[0]
+    return rows, size
+
+
+# ----------------------------------------------------
+# VIEWS
+# ----------------------------------------------------
+def bench_views(category):
+    from django.db import connection
+    from django.test import Client
+
+    client = Client()
+    data = {
+        "form-TOTAL_FORMS": "3",
+        "form-INITIAL_FORMS": "0",
+        "purpose": "gaming",
+    }
+    for i in range(3):
+        data.update({
+            f"form-{i}-item_name": f"Laptop {i}",
+            f"form-{i}-price": 40000 + i,
+            f"form-{i}-ram": 8 * (i + 1),
+            f"form-{i}-ssd": 512,
+            f"form-{i}-battery": 8,
+            f"form-{i}-processor_name": "i7",
+            f"form-{i}-gpu_name": "RTX 3050",
+        })
+
+    queries = SessionQueries()
+    with connection.execute_wrapper(queries):
+        posted = client.post(f"/compare/{category.id}/", data)
+        assert posted.status_code == 302, posted.status_code
+        result = client.get(posted["Location"])
+        assert result.status_code == 200, result.status_code
+
+    print(f"views: compare POST + result GET made {queries.count} django_session queries")
+
+
+# ----------------------------------------------------
+# HAND-OFF
+# ----------------------------------------------------
+def session_handoff(state, category_id, ids):
+    from django.contrib.sessions.backends.db import SessionStore
+
+    # compare: the session is loaded, three keys are set and it is saved
+    session = SessionStore(state.get("key"))
+    session.load()
+    session[f"comparex_useritem_ids_{category_id}"] = ids
+    session[f"comparex_purpose_{category_id}"] = "gaming"
+    session[f"comparex_requirements_{category_id}"] = REQUIREMENTS
+    session.save()
+    state["key"] = session.session_key
+
+    # result: the session is loaded again and the keys read
+    session = SessionStore(state["key"])
+    assert session[f"comparex_useritem_ids_{category_id}"] == ids
+
+
+def token_handoff(state, category_id, ids):
+    from core.services.comparison_context import ComparisonContext, decode_context, encode_context
+
+    token = encode_context(ComparisonContext(
+        category_id=category_id, item_ids=ids, purpose="gaming", requirements=REQUIREMENTS,
+    ))
+    assert decode_context(token, category_id).item_ids == ids
+
+
+def run_user(handoff, user, args, latencies, queries, errors, start_gate):
+    from django.db import connection
+
+    counter = SessionQueries()
+    state = {}
+    try:
+        start_gate.wait()
+        with connection.execute_wrapper(counter):
+            for round_number in range(args.rounds):
+                category_id = round_number % args.categories + 1
+                first_id = (user * args.rounds + round_number) * args.items
+                ids = list(range(first_id, first_id + args.items))
+
+                started = time.perf_counter()
+                handoff(state, category_id, ids)
+                latencies.append(time.perf_counter() - started)
+    except Exception as e:  # noqa: BLE001 - reported with the results
+        errors.append(e)
+    finally:
+        queries.append(counter.count)
+        connection.close()
+
+
+def bench_handoff(mode, args):
+    from django.contrib.sessions.models import Session
+
+    Session.objects.all().delete()
+    handoff = session_handoff if mode == "session" else token_handoff
+
+    latencies, queries, errors = [], [], []
+    start_gate = threading.Event()
+    threads = [
+        threading.Thread(target=run_user, args=(handoff, user, args, latencies, queries, errors, start_gate))
+        for user in range(args.users)
+    ]
+    for thread in threads:
+        thread.start()
+
+    started = time.perf_counter()
+    start_gate.set()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    rows, size = session_stats()
+    return {
+        "mode": mode,
+        "handoffs": len(latencies),
+        "errors": len(errors),
+        "first_error": repr(errors[0]) if errors else "",
+        "throughput": len(latencies) / wall if wall else 0.0,
+        "p50": percentile(latencies, 50) * 1000,
+        "p99": percentile(latencies, 99) * 1000,
+        "queries": sum(queries) / len(latencies) if latencies else 0.0,
+        "rows": rows,
+        "size_kb": size / 1024,
+    }
+
+
+def print_results(results, args):
+    print(
+        f"\n{args.users} users x {args.rounds} hand-offs over {args.categories} categories, "
+        f"{args.items} items each\n"
+    )
+    header = (
+        f"{'mode':<9}{'done':>7}{'errors':>8}{'per s':>9}{'p50 ms':>9}{'p99 ms':>9}"
+        f"{'session q':>11}{'rows':>7}{'table KB':>10}"
+    )
+    print(header)
+    print("-" * len(header))
+    for stats in results:
+        print(
+            f"{stats['mode']:<9}{stats['handoffs']:>7}{stats['errors']:>8}{stats['throughput']:>9.0f}"
+            f"{stats['p50']:>9.2f}{stats['p99']:>9.2f}{stats['queries']:>11.1f}{stats['rows']:>7}{stats['size_kb']:>10.1f}"
+        )
+    for stats in results:
+        if stats["first_error"]:
+            print(f"{stats['mode']}: first error: {stats['first_error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=20, help="hand-offs per user")
+    parser.add_argument("--categories", type=int, default=3, help="categories each user cycles through")
+    parser.add_argument("--items", type=int, default=5, help="items per comparison")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="comparex-sessions-"))
+    try:
+        setup_django(str(workdir / "db.sqlite3"))
+
+        from django.conf import settings
+
+        # concurrent writers wait for SQLite's lock instead of failing
+        settings.DATABASES["default"]["OPTIONS"] = {"timeout": 60}
+
+        bench_views(make_laptop_category())
+        results = [bench_handoff(mode, args) for mode in args.modes]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print_results(results, args)
+
+
+if __name__ == "__main__":
+    main()
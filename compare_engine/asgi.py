@@ -13,4 +13,22 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'compare_engine.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from core.services import ai_service  # noqa: E402 - needs the app registry
+
+
+async def application(scope, receive, send):
+    if scope["type"] != "lifespan":
+        return await django_application(scope, receive, send)
+
+    # Django does not speak the lifespan protocol; answer it here so the
+    # event loop's pooled Gemini connections are closed on shutdown
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await ai_service.aclose_async_client()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
@@ -12,5 +12,8 @@ import os
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'compare_engine.settings')
+# a WSGI worker would be held for the whole LLM call by every open
+# explanation stream; poll instead unless streaming is asked for explicitly
+os.environ.setdefault('AI_EXPLANATION_STREAMING', 'False')
 
 application = get_wsgi_application()
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Category, SpecificationField, UserItem
+from .models import CatalogImport, Category, ComparisonRun, ComponentScore, SpecificationField, UserItem
 
 
 class SpecificationFieldInline(admin.TabularInline):
@@ -24,7 +24,47 @@ class SpecificationFieldAdmin(admin.ModelAdmin):
 
 @admin.register(UserItem)
 class UserItemAdmin(admin.ModelAdmin):
-    list_display = ["item_name", "category", "created_at"]
-    list_filter = ["category", "created_at"]
+    list_display = ["item_name", "category", "ephemeral", "created_at"]
+    list_filter = ["category", "ephemeral", "created_at"]
     search_fields = ["item_name", "category__name"]
     readonly_fields = ["created_at"]
+    actions = ["mark_ephemeral", "mark_kept"]
+
+    def get_changeform_initial_data(self, request):
+        # items added here are catalog data, kept by purge_user_items
+        return {"ephemeral": False, **super().get_changeform_initial_data(request)}
+
+    @admin.action(description="Let selected items expire (purge_user_items)")
+    def mark_ephemeral(self, request, queryset):
+        updated = queryset.update(ephemeral=True)
+        self.message_user(request, f"{updated} items will be purged once they are past the retention period.")
+
+    @admin.action(description="Keep selected items")
+    def mark_kept(self, request, queryset):
+        updated = queryset.update(ephemeral=False)
+        self.message_user(request, f"{updated} items will be kept.")
+
+
+@admin.register(ComponentScore)
+class ComponentScoreAdmin(admin.ModelAdmin):
+    list_display = ["name", "kind", "score"]
+    list_filter = ["kind"]
+    list_editable = ["score"]
+    search_fields = ["name"]
+    ordering = ["kind", "name"]
+
+
+@admin.register(ComparisonRun)
+class ComparisonRunAdmin(admin.ModelAdmin):
+    list_display = ["run_id", "category", "purpose", "tie_count", "created_at"]
+    list_filter = ["category", "purpose", "created_at"]
+    search_fields = ["run_id", "category__name"]
+    readonly_fields = ["run_id", "created_at"]
+
+
+@admin.register(CatalogImport)
+class CatalogImportAdmin(admin.ModelAdmin):
+    list_display = ["source", "category", "rows_imported", "rows_rejected", "finished", "updated_at"]
+    list_filter = ["category", "finished"]
+    search_fields = ["source"]
+    readonly_fields = ["offset", "line", "rows_imported", "rows_rejected", "started_at", "updated_at"]
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+
+from .services.static_assets import missing_vendor_assets
+
+
+@register(Tags.staticfiles, deploy=True)
+def vendor_assets_check(app_configs, **kwargs):
+    missing = missing_vendor_assets()
+    if not missing:
+        return []
+
+    level, check_id = (Warning, "core.W001") if settings.DEBUG else (Error, "core.E001")
+    return [
+        level(
+            f"Vendored static files are missing: {', '.join(missing)}",
+            hint="Run python manage.py fetch_static_assets and commit static/vendor/.",
+            id=check_id,
+        )
+    ]
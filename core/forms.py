@@ -1,4 +1,68 @@
+import copy
+import threading
+
 from django import forms
+from django.forms import formset_factory
+
+from .services.catalog_cache import catalog_version
+
+
+LAPTOP_FILTERS = ("min_ram", "min_ssd", "optional_gpu_required")
+
+
+def purpose_config(category_name):
+    """
+    Purpose choices for a category, and whether its laptop filters apply.
+
+    Returns (choices, keep_laptop_filters); choices is None when the
+    category has no purpose presets.
+    """
+    name = category_name.lower()
+
+    # ---------------- LAPTOP ----------------
+    if "laptop" in name:
+        choices = [
+            ("gaming", "Gaming"),
+            ("coding", "Coding"),
+            ("office", "Office"),
+            ("video_editing", "Video Editing"),
+            ("student", "Student"),
+        ]
+        return choices, True
+
+    # ---------------- MOBILE ----------------
+    elif "mobile" in name:
+        choices = [
+            ("gaming", "Gaming"),
+            ("camera", "Camera"),
+            ("battery", "Battery"),
+            ("performance", "Performance"),
+            ("daily_use", "Daily Use"),
+        ]
+        return choices, False
+
+    # ---------------- HOSTEL ----------------
+    elif "hostel" in name or "pg" in name:
+        choices = [
+            ("college", "College Student"),
+            ("job", "Working Professional"),
+            ("budget", "Budget Stay"),
+            ("premium", "Premium Stay"),
+        ]
+        return choices, False
+
+    # ---------------- COURSE ----------------
+    elif "course" in name:
+        choices = [
+            ("job", "Job Ready"),
+            ("trending", "Trending"),
+            ("certification", "Certification"),
+            ("skill_upgrade", "Skill Upgrade"),
+            ("beginner", "Beginner"),
+        ]
+        return choices, False
+
+    return None, True
 
 
 class PurposeRequirementsForm(forms.Form):
@@ -32,63 +96,40 @@ class PurposeRequirementsForm(forms.Form):
         if not category:
             return
 
-        name = category.name.lower()
-
-        # ---------------- LAPTOP ----------------
-        if "laptop" in name:
-            choices = [
-                ("gaming", "Gaming"),
-                ("coding", "Coding"),
-                ("office", "Office"),
-                ("video_editing", "Video Editing"),
-                ("student", "Student"),
-            ]
-            self.fields["purpose"].choices = choices
+        choices, keep_laptop_filters = purpose_config(category.name)
 
-        # ---------------- MOBILE ----------------
-        elif "mobile" in name:
-            choices = [
-                ("gaming", "Gaming"),
-                ("camera", "Camera"),
-                ("battery", "Battery"),
-                ("performance", "Performance"),
-                ("daily_use", "Daily Use"),
-            ]
+        if choices is not None:
             self.fields["purpose"].choices = choices
 
+        if not keep_laptop_filters:
             # remove laptop filters
-            self.fields.pop("min_ram", None)
-            self.fields.pop("min_ssd", None)
-            self.fields.pop("optional_gpu_required", None)
-
-        # ---------------- HOSTEL ----------------
-        elif "hostel" in name or "pg" in name:
-            choices = [
-                ("college", "College Student"),
-                ("job", "Working Professional"),
-                ("budget", "Budget Stay"),
-                ("premium", "Premium Stay"),
-            ]
-            self.fields["purpose"].choices = choices
-
-            self.fields.pop("min_ram", None)
-            self.fields.pop("min_ssd", None)
-            self.fields.pop("optional_gpu_required", None)
-
-        # ---------------- COURSE ----------------
-        elif "course" in name:
-            choices = [
-                ("job", "Job Ready"),
-                ("trending", "Trending"),
-                ("certification", "Certification"),
-                ("skill_upgrade", "Skill Upgrade"),
-                ("beginner", "Beginner"),
-            ]
-            self.fields["purpose"].choices = choices
-
-            self.fields.pop("min_ram", None)
-            self.fields.pop("min_ssd", None)
-            self.fields.pop("optional_gpu_required", None)
+            for field_name in LAPTOP_FILTERS:
+                self.fields.pop(field_name, None)
+
+    def get_requirements(self):
+        return {
+            "min_budget": self.cleaned_data.get("min_budget"),
+            "max_budget": self.cleaned_data.get("max_budget"),
+            "min_ram": self.cleaned_data.get("min_ram"),
+            "min_ssd": self.cleaned_data.get("min_ssd"),
+            "optional_gpu_required": self.cleaned_data.get("optional_gpu_required"),
+        }
+
+
+def _spec_form_field(name, field_type):
+    label = name.replace("_", " ").title()
+
+    if field_type == "number":
+        return forms.FloatField(
+            label=label,
+            required=True,
+            widget=forms.NumberInput(attrs={"class": "form-control"}),
+        )
+    return forms.CharField(
+        label=label,
+        required=True,
+        widget=forms.TextInput(attrs={"class": "form-control"}),
+    )
 
 
 class UserItemEntryForm(forms.Form):
@@ -99,30 +140,103 @@ class UserItemEntryForm(forms.Form):
         widget=forms.TextInput(attrs={"class": "form-control"}),
     )
 
+    # set on compiled per-category subclasses (see build_item_form_class)
+    spec_field_names = ()
+    compiled_fields = {}
+
     def __init__(self, *args, spec_fields=None, **kwargs):
         super().__init__(*args, **kwargs)
 
-        self._spec_fields = list(spec_fields or [])
-
-        for sf in self._spec_fields:
-            field_key = sf.name
-            label = sf.name.replace("_", " ").title()
-
-            if sf.field_type == "number":
-                self.fields[field_key] = forms.FloatField(
-                    label=label,
-                    required=True,
-                    widget=forms.NumberInput(attrs={"class": "form-control"}),
-                )
-            else:
-                self.fields[field_key] = forms.CharField(
-                    label=label,
-                    required=True,
-                    widget=forms.TextInput(attrs={"class": "form-control"}),
-                )
+        if spec_fields is None:
+            # the compiled fields skip the per-form rebuild; each instance
+            # still gets its own copies, as Django does for base_fields, so
+            # widget attrs or error messages set on one form stay there
+            self.fields.update({name: copy.deepcopy(field) for name, field in self.compiled_fields.items()})
+            return
+
+        # dynamic path: build the spec fields for this instance only
+        self.spec_field_names = []
+        for sf in spec_fields:
+            self.fields[sf.name] = _spec_form_field(sf.name, sf.field_type)
+            self.spec_field_names.append(sf.name)
+
+    @property
+    def spec_bound_fields(self):
+        """The spec fields' BoundFields in column order, for the entry table."""
+        return [self[name] for name in self.spec_field_names]
 
     def get_specifications(self):
         specs = {}
-        for sf in self._spec_fields:
-            specs[sf.name] = self.cleaned_data.get(sf.name)
+        for name in self.spec_field_names:
+            specs[name] = self.cleaned_data.get(name)
         return specs
+
+
+# ----------------------------------------------------
+# PER-CATEGORY FORM CLASSES
+# ----------------------------------------------------
+def build_item_form_class(category, spec_fields):
+    """A UserItemEntryForm subclass with the category's spec fields built once."""
+    attrs = {
+        "spec_field_names": tuple(sf.name for sf in spec_fields),
+        "compiled_fields": {sf.name: _spec_form_field(sf.name, sf.field_type) for sf in spec_fields},
+    }
+    return type(f"UserItemEntryForm_{category.id}", (UserItemEntryForm,), attrs)
+
+
+def build_purpose_form_class(category):
+    """A PurposeRequirementsForm subclass with the category's choices baked in."""
+    choices, keep_laptop_filters = purpose_config(category.name)
+
+    attrs = {}
+    if choices is not None:
+        attrs["purpose"] = forms.ChoiceField(
+            label="Purpose",
+            required=False,
+            choices=choices,
+            widget=forms.Select(attrs={"class": "form-select"}),
+        )
+    if not keep_laptop_filters:
+        # None removes an inherited declared field
+        attrs.update(dict.fromkeys(LAPTOP_FILTERS))
+
+    return type(f"PurposeRequirementsForm_{category.id}", (PurposeRequirementsForm,), attrs)
+
+
+class FormRegistry:
+    """
+    Per-process cache of compiled form classes, one set per category.
+
+    Entries are tied to the catalog version, so any Category or
+    SpecificationField change recompiles them on next use.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._classes = {}
+
+    def _get(self, key, build):
+        version = catalog_version()
+        if version != self._version:
+            with self._lock:
+                self._classes = {}
+                self._version = version
+
+        cls = self._classes.get(key)
+        if cls is None:
+            cls = self._classes[key] = build()
+        return cls
+
+    def item_formset(self, category, spec_fields):
+        def build():
+            form_class = build_item_form_class(category, spec_fields)
+            return formset_factory(form_class, extra=3, can_delete=True)
+
+        return self._get(("item_formset", category.id), build)
+
+    def purpose_form(self, category):
+        return self._get(("purpose_form", category.id), lambda: build_purpose_form_class(category))
+
+
+form_registry = FormRegistry()
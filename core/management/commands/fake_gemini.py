@@ -0,0 +1,157 @@
+"""
+Local stand-in for the Gemini generateContent and streamGenerateContent APIs.
+
+Usage:
+  python manage.py fake_gemini --port 8765 --delay 2
+  python manage.py fake_gemini --fail-first 3     # 503 for the first 3 requests
+  python manage.py fake_gemini --fail-first 1 --fail-status 429 --retry-after 2
+  python manage.py fake_gemini --chunk-delay 0.2  # stream one word every 200 ms
+  python manage.py fake_gemini --drop-after 3     # cut streams off after 3 words
+  GEMINI_API_URL=http://127.0.0.1:8765/generateContent GOOGLE_API_KEY=test python manage.py runserver
+"""
+
+import itertools
+import json
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    disable_nagle_algorithm = True
+    delay = 0.0
+    reply = "This is a fake explanation from the local Gemini stub."
+    status = 200
+    fail_first = 0
+    fail_status = 503
+    retry_after = None  # Retry-After header sent with error responses
+    chunk_delay = 0.05
+    drop_after = None  # words streamed before the connection is dropped
+    requests = None  # itertools.count() shared by one server's handlers
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+
+        time.sleep(self.delay)
+
+        status = self.status
+        if next(self.requests) < self.fail_first:
+            status = self.fail_status
+
+        if ("streamGenerateContent" in self.path or "alt=sse" in self.path) and status == 200:
+            self.stream_reply()
+            return
+
+        body = json.dumps({
+            "candidates": [{"content": {"role": "model", "parts": [{"text": self.reply}]}}],
+        }).encode("utf-8")
+
+        self.send_response(status)
+        if status >= 400 and self.retry_after is not None:
+            self.send_header("Retry-After", str(self.retry_after))
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def stream_reply(self):
+        """Send the reply word by word as server-sent events (what ?alt=sse returns)."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        for index, word in enumerate(re.findall(r"\S+\s*", self.reply)):
+            if self.drop_after is not None and index >= self.drop_after:
+                # no terminating chunk: the client sees the body cut short
+                self.close_connection = True
+                return
+            event = json.dumps({
+                "candidates": [{"content": {"role": "model", "parts": [{"text": word}]}}],
+            })
+            self.write_chunk(f"data: {event}\r\n\r\n".encode("utf-8"))
+            time.sleep(self.chunk_delay)
+        self.write_chunk(b"")
+
+    def write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeGeminiServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # load tests open hundreds of connections at once
+
+
+def make_server(
+    host="127.0.0.1",
+    port=0,
+    delay=0.0,
+    reply=None,
+    status=200,
+    fail_first=0,
+    chunk_delay=0.05,
+    fail_status=503,
+    retry_after=None,
+    drop_after=None,
+):
+    """Build (but do not start) a fake Gemini server; port=0 picks a free port."""
+    attrs = {
+        "delay": delay,
+        "status": status,
+        "fail_first": fail_first,
+        "fail_status": fail_status,
+        "retry_after": retry_after,
+        "chunk_delay": chunk_delay,
+        "drop_after": drop_after,
+        "requests": itertools.count(),
+    }
+    if reply is not None:
+        attrs["reply"] = reply
+    handler = type("ConfiguredFakeGeminiHandler", (FakeGeminiHandler,), attrs)
+    return FakeGeminiServer((host, port), handler)
+
+
+class Command(BaseCommand):
+    help = "Run a local fake Gemini server for development and tests."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--delay", type=float, default=0.0, help="Seconds to wait before replying")
+        parser.add_argument("--status", type=int, default=200, help="HTTP status to return")
+        parser.add_argument("--reply", default=None, help="Explanation text to return")
+        parser.add_argument("--fail-first", type=int, default=0, help="Answer the first N requests with --fail-status")
+        parser.add_argument("--fail-status", type=int, default=503, help="HTTP status of the --fail-first answers")
+        parser.add_argument("--retry-after", type=int, default=None, help="Retry-After seconds sent with errors")
+        parser.add_argument("--chunk-delay", type=float, default=0.05, help="Seconds between streamed words")
+        parser.add_argument("--drop-after", type=int, default=None, help="Drop streams after this many words")
+
+    def handle(self, *args, **options):
+        server = make_server(
+            host=options["host"],
+            port=options["port"],
+            delay=options["delay"],
+            reply=options["reply"],
+            status=options["status"],
+            fail_first=options["fail_first"],
+            chunk_delay=options["chunk_delay"],
+            fail_status=options["fail_status"],
+            retry_after=options["retry_after"],
+            drop_after=options["drop_after"],
+        )
+        host, port = server.server_address[:2]
+        self.stdout.write(f"Fake Gemini listening on http://{host}:{port}/generateContent")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,58 @@
+"""
+Download the pinned third-party static files into static/vendor/.
+
+Run once (and again after changing a version in
+services.static_assets.VENDOR_ASSETS), commit static/vendor/, then
+collectstatic as usual. Pages then make no third-party requests, which
+also lets them work offline or air-gapped.
+
+Usage:
+  python manage.py fetch_static_assets
+  python manage.py fetch_static_assets --force     # download files that already exist, too
+"""
+
+from pathlib import Path
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services.static_assets import VENDOR_ASSETS, VENDOR_DIR, strip_source_map
+
+TIMEOUT = 30
+
+
+class Command(BaseCommand):
+    help = "Download the pinned Bootstrap, Bootstrap Icons and Chart.js files into static/vendor/."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Download files that already exist")
+
+    def handle(self, *args, **options):
+        vendor_root = Path(settings.STATICFILES_DIRS[0]) / VENDOR_DIR
+        fetched = 0
+
+        with requests.Session() as session:
+            for name, url in VENDOR_ASSETS.items():
+                path = vendor_root / name
+                if path.exists() and not options["force"]:
+                    continue
+
+                try:
+                    response = session.get(url, timeout=TIMEOUT)
+                    response.raise_for_status()
+                except requests.RequestException as e:
+                    raise CommandError(f"Cannot download {url}: {e}")
+
+                content = response.content
+                if path.suffix in (".css", ".js"):
+                    content = strip_source_map(content)
+
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_bytes(content)
+                fetched += 1
+                self.stdout.write(f"{name} ({len(content):,} bytes)")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Fetched {fetched} of {len(VENDOR_ASSETS)} files into {vendor_root}."
+        ))
@@ -0,0 +1,111 @@
+"""
+Stream a CSV or JSON Lines catalog file into a category's items.
+
+CSV: header row with item_name and the category's spec field names.
+JSON Lines: {"item_name": ..., "specifications": {...}} (or the spec
+fields next to item_name) per line. Either may be gzipped (.gz).
+
+Rows are validated like the compare form; invalid rows are skipped and
+reported. Inserts are committed in batches together with the import's
+progress, so an interrupted import continues where it stopped.
+
+Usage:
+  python manage.py import_catalog laptops.csv --category Laptop
+  python manage.py import_catalog phones.jsonl.gz --category 2 --batch-size 10000
+  python manage.py import_catalog laptops.csv --category Laptop --resume    # after an interruption
+  python manage.py import_catalog laptops.csv --category Laptop --strict    # stop at the first invalid row
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Category
+from core.services.catalog_import import (
+    BATCH_SIZE,
+    FORMATS,
+    CatalogImportError,
+    detect_format,
+    run_import,
+    start_import,
+)
+
+# Invalid rows printed before only counting them
+MAX_REPORTED_ERRORS = 20
+
+
+class Command(BaseCommand):
+    help = "Import catalog items from a CSV or JSON Lines file into a category."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--category", required=True, help="Category name or id")
+        parser.add_argument("--format", choices=FORMATS, help="Default: from the file extension")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Rows per insert/transaction")
+        parser.add_argument("--resume", action="store_true", help="Continue an interrupted import of this file")
+        parser.add_argument("--restart", action="store_true", help="Import the file again from the start")
+        parser.add_argument("--strict", action="store_true", help="Stop at the first invalid row")
+        parser.add_argument("--progress-every", type=float, default=5.0, help="Seconds between progress lines")
+
+    def _category(self, value):
+        lookup = {"pk": int(value)} if value.isdigit() else {"name__iexact": value}
+        try:
+            return Category.objects.get(**lookup)
+        except Category.DoesNotExist:
+            raise CommandError(f"Unknown category {value!r}")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1")
+
+        category = self._category(options["category"])
+        path = options["path"]
+
+        try:
+            fmt = options["format"] or detect_format(path)
+            job = start_import(category, path, resume=options["resume"], restart=options["restart"])
+        except CatalogImportError as e:
+            raise CommandError(str(e))
+
+        if job.rows_imported:
+            self.stdout.write(f"Resuming after line {job.line} ({job.rows_imported} rows already imported).")
+
+        start_rows = job.rows_imported
+        start = last_report = time.perf_counter()
+        reported = 0
+
+        def on_batch(job):
+            nonlocal last_report
+            now = time.perf_counter()
+            if now - last_report >= options["progress_every"]:
+                last_report = now
+                rate = (job.rows_imported - start_rows) / (now - start)
+                self.stdout.write(
+                    f"{job.rows_imported:,} rows imported, {job.rows_rejected:,} rejected ({rate:,.0f} rows/s)"
+                )
+
+        def on_reject(line, errors):
+            nonlocal reported
+            message = "; ".join(f"{field}: {' '.join(messages)}" for field, messages in errors.items())
+            if options["strict"]:
+                raise CommandError(f"line {line}: {message} (rerun with --resume after fixing it)")
+            if reported < MAX_REPORTED_ERRORS:
+                self.stderr.write(f"line {line}: {message}")
+            elif reported == MAX_REPORTED_ERRORS:
+                self.stderr.write("... further invalid rows are only counted")
+            reported += 1
+
+        try:
+            job = run_import(job, fmt, batch_size=options["batch_size"], on_batch=on_batch, on_reject=on_reject)
+        except CatalogImportError as e:
+            raise CommandError(str(e))
+        except UnicodeDecodeError as e:
+            raise CommandError(f"{path} is not UTF-8: {e}")
+
+        elapsed = time.perf_counter() - start
+        imported = job.rows_imported - start_rows
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {imported:,} rows into {category.name} in {elapsed:.1f}s "
+            f"({imported / elapsed if elapsed else 0:,.0f} rows/s); "
+            f"{job.rows_rejected:,} rejected in total."
+        ))
@@ -0,0 +1,86 @@
+"""
+Bulk-load processor / GPU benchmark scores from CSV.
+
+CSV columns: name,score[,kind]   (kind = processor | gpu)
+
+Usage:
+  python manage.py import_component_scores cpus.csv --kind processor
+  python manage.py import_component_scores all.csv            # kind column required
+"""
+
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.models import ComponentScore
+from core.services.component_scores import component_index
+from core.services.score_matcher import normalize_name
+
+BATCH_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = "Import processor/GPU scores from a CSV file (name,score[,kind])."
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_path")
+        parser.add_argument(
+            "--kind",
+            choices=[k for k, _ in ComponentScore.KIND_CHOICES],
+            help="Kind for every row; otherwise read from a 'kind' column",
+        )
+        parser.add_argument("--replace", action="store_true", help="Delete existing rows of the imported kinds first")
+
+    def _rows(self, path, default_kind):
+        valid_kinds = {k for k, _ in ComponentScore.KIND_CHOICES}
+
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for line_no, row in enumerate(reader, start=2):
+                kind = default_kind or (row.get("kind") or "").strip().lower()
+                if kind not in valid_kinds:
+                    raise CommandError(f"line {line_no}: unknown kind {kind!r}")
+
+                name = normalize_name(row.get("name") or "")
+                if not name:
+                    raise CommandError(f"line {line_no}: missing name")
+
+                try:
+                    score = float(row.get("score"))
+                except (TypeError, ValueError):
+                    raise CommandError(f"line {line_no}: invalid score {row.get('score')!r}")
+
+                yield ComponentScore(kind=kind, name=name, score=score)
+
+    def handle(self, *args, **options):
+        path = options["csv_path"]
+
+        # last row wins for duplicate (kind, name) pairs
+        try:
+            rows = {(r.kind, r.name): r for r in self._rows(path, options["kind"])}
+        except FileNotFoundError:
+            raise CommandError(f"File not found: {path}")
+
+        objs = list(rows.values())
+        kinds = {obj.kind for obj in objs}
+
+        changed = set(rows)
+        with transaction.atomic():
+            if options["replace"]:
+                existing = ComponentScore.objects.filter(kind__in=kinds)
+                changed.update(existing.values_list("kind", "name"))
+                # a plain DELETE: .delete() would send post_delete (and queue
+                # an index refresh) per row; nothing references ComponentScore
+                existing._raw_delete(existing.db)
+            ComponentScore.objects.bulk_create(
+                objs,
+                batch_size=BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=["kind", "name"],
+                update_fields=["score"],
+            )
+            # neither bulk_create nor the raw delete sends signals
+            component_index.changed(changed)
+
+        self.stdout.write(self.style.SUCCESS(f"Imported {len(objs)} component scores."))
@@ -0,0 +1,65 @@
+"""
+Delete comparison items older than the retention period.
+
+Items entered on the compare page (or posted to the API with "persist")
+are only needed while their session lives; run this daily, e.g. from
+cron. Catalog imports and items added in the admin are never deleted.
+
+Usage:
+  python manage.py purge_user_items                         # older than USER_ITEM_RETENTION_DAYS
+  python manage.py purge_user_items --days 7 --dry-run
+  python manage.py purge_user_items --archive items-2026-10.jsonl.gz
+  python manage.py purge_user_items --batch-size 500 --pause 0.1
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services.retention import BATCH_SIZE, expired_items, purge_expired_items, retention_cutoff
+
+
+class Command(BaseCommand):
+    help = "Delete (and optionally archive) comparison items older than the retention period."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help="Default: settings.USER_ITEM_RETENTION_DAYS")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Rows per DELETE/transaction")
+        parser.add_argument("--pause", type=float, default=0.0, help="Seconds to sleep between batches")
+        parser.add_argument("--archive", help="Append deleted rows to this gzipped JSON Lines file")
+        parser.add_argument("--dry-run", action="store_true", help="Only count the expired items")
+
+    def handle(self, *args, **options):
+        if options["days"] is not None and options["days"] < 0:
+            raise CommandError("--days must not be negative")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1")
+        if options["archive"] and not options["archive"].endswith(".gz"):
+            raise CommandError("--archive must be a .gz file")
+
+        cutoff = retention_cutoff(options["days"])
+
+        if options["dry_run"]:
+            count = expired_items(cutoff).count()
+            self.stdout.write(f"{count} items created before {cutoff:%Y-%m-%d %H:%M} would be deleted.")
+            return
+
+        verbosity = options["verbosity"]
+
+        def on_batch(deleted):
+            if verbosity > 1:
+                self.stdout.write(f"{deleted} deleted")
+
+        try:
+            deleted = purge_expired_items(
+                cutoff,
+                batch_size=options["batch_size"],
+                archive=options["archive"],
+                pause=options["pause"],
+                on_batch=on_batch,
+            )
+        except OSError as e:
+            raise CommandError(f"Cannot write the archive: {e}")
+
+        archived = f", archived to {options['archive']}" if options["archive"] and deleted else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted} items created before {cutoff:%Y-%m-%d %H:%M}{archived}."
+        ))
@@ -0,0 +1,54 @@
+"""
+Recompute the derived feature columns of UserItem rows.
+
+Run after upgrading (rows saved before the columns existed have NULL
+features) or after changing the built-in PROCESSOR_MAP / GPU_MAP tables.
+Changes to ComponentScore rows (admin edits, import_component_scores)
+rescore the affected items automatically.
+
+Usage:
+  python manage.py refresh_item_features            # only rows with missing features
+  python manage.py refresh_item_features --all
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import UserItem
+from core.services.comparison_engine import ItemFeatures
+
+BATCH_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = "Recompute derived numeric features (price, ram, ssd, processor/gpu score) of user items."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Recompute every row, not just rows with missing features")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        qs = UserItem.objects.order_by("pk").only("pk", "specifications")
+        if not options["all"]:
+            qs = qs.filter(processor_score__isnull=True)
+
+        batch_size = options["batch_size"]
+        fields = list(ItemFeatures.FIELDS)
+        updated = 0
+        last_pk = 0
+
+        while True:
+            batch = list(qs.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+
+            for item in batch:
+                item.compute_features()
+
+            with transaction.atomic():
+                UserItem.objects.bulk_update(batch, fields)
+
+            updated += len(batch)
+            last_pk = batch[-1].pk
+
+        self.stdout.write(self.style.SUCCESS(f"Updated features of {updated} items."))
@@ -0,0 +1,176 @@
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.middleware.gzip import GZipMiddleware
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .services import metrics
+
+# query counter of the request being handled; context variables follow the
+# request into sync_to_async threads, so async views are counted too
+_request_queries = ContextVar("comparex_request_queries", default=None)
+
+
+class _QueryCounter:
+    """Counts queries and their time for one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+def _count_queries(execute, sql, params, many, context):
+    counter = _request_queries.get()
+    if counter is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        counter.count += 1
+        counter.seconds += time.perf_counter() - start
+
+
+def _install_query_counter(sender, connection, **kwargs):
+    if _count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_queries)
+
+
+def server_timing_header(timings, queries, total):
+    entries = [f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in timings.items()]
+    entries.append(f'db;desc="{queries.count} queries";dur={queries.seconds * 1000:.2f}')
+    entries.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(entries)
+
+
+class MetricsMiddleware:
+    """
+    Records request latency and DB query count per view, and adds a
+    Server-Timing header with the request's pipeline stage timings.
+
+    Removed from the middleware chain at startup unless METRICS_ENABLED.
+    Works under WSGI and ASGI without moving async views onto a thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        connection_created.connect(_install_query_counter, dispatch_uid="comparex_query_counter")
+        for connection in connections.all(initialized_only=True):
+            _install_query_counter(None, connection)
+
+    def _start(self):
+        queries = _QueryCounter()
+        return queries, _request_queries.set(queries), metrics.start_request(), time.perf_counter()
+
+    def _stop(self, state):
+        _, queries_token, timings_token, _ = state
+        _request_queries.reset(queries_token)
+        return metrics.finish_request(timings_token)
+
+    def _finish(self, request, response, state):
+        queries, _, _, start = state
+        timings = self._stop(state)
+        total = time.perf_counter() - start
+
+        match = request.resolver_match
+        view = match.view_name if match else "unresolved"
+        metrics.REQUEST_SECONDS.observe(total, view=view, method=request.method, status=response.status_code)
+        metrics.REQUEST_DB_QUERIES.observe(queries.count, view=view)
+
+        if settings.SERVER_TIMING_ENABLED:
+            response["Server-Timing"] = server_timing_header(timings, queries, total)
+        return response
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        state = self._start()
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            self._stop(state)
+            raise
+        return self._finish(request, response, state)
+
+    async def __acall__(self, request):
+        state = self._start()
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            self._stop(state)
+            raise
+        return self._finish(request, response, state)
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoiseMiddleware that can also run natively under ASGI.
+
+    WhiteNoise 6 is sync-only, which makes Django run every ASGI request's
+    inner middleware and view on a thread of its own. Static files are
+    looked up in memory, so the async path only needs to await the rest
+    of the chain.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware for text responses of at least RESPONSE_COMPRESSION_MIN_SIZE bytes.
+
+    Removed from the middleware chain at startup unless
+    RESPONSE_COMPRESSION_ENABLED. Server-sent event streams are left alone,
+    so every event still reaches the browser as soon as it is written.
+    """
+
+    COMPRESSIBLE_TYPES = {"text/html", "text/plain", "application/json"}
+
+    def __init__(self, get_response):
+        if not settings.RESPONSE_COMPRESSION_ENABLED:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def process_response(self, request, response):
+        content_type = response.get("Content-Type", "").partition(";")[0].strip()
+        if content_type not in self.COMPRESSIBLE_TYPES:
+            return response
+        if not response.streaming and len(response.content) < settings.RESPONSE_COMPRESSION_MIN_SIZE:
+            return response
+        return super().process_response(request, response)
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0002_specificationfield_useritem_delete_item"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ComponentScore",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("processor", "Processor"), ("gpu", "GPU")],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(
+                        help_text="Name fragment matched in item specs (e.g., i7, rtx 3050)",
+                        max_length=200,
+                    ),
+                ),
+                ("score", models.FloatField()),
+            ],
+            options={
+                "ordering": ["kind", "name"],
+                "unique_together": {("kind", "name")},
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0003_componentscore"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="useritem",
+            name="gpu_score",
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="useritem",
+            name="price",
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="useritem",
+            name="processor_score",
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="useritem",
+            name="ram",
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="useritem",
+            name="ssd",
+            field=models.FloatField(editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0004_useritem_features"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="useritem",
+            name="gpu_score",
+            field=models.FloatField(db_index=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name="useritem",
+            name="price",
+            field=models.FloatField(db_index=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name="useritem",
+            name="processor_score",
+            field=models.FloatField(db_index=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name="useritem",
+            name="ram",
+            field=models.FloatField(db_index=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name="useritem",
+            name="ssd",
+            field=models.FloatField(db_index=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="useritem",
+            index=models.Index(
+                fields=["category", "price"], name="core_useritem_cat_price_idx"
+            ),
+        ),
+    ]
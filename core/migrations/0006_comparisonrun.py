@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0005_useritem_feature_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ComparisonRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("run_id", models.CharField(max_length=64, unique=True)),
+                ("purpose", models.CharField(blank=True, default="", max_length=50)),
+                ("requirements", models.JSONField(default=dict)),
+                (
+                    "spec_fields",
+                    models.JSONField(
+                        default=list,
+                        help_text="Spec field names shown in the result table",
+                    ),
+                ),
+                ("ranking", models.JSONField(default=list)),
+                ("tie_count", models.PositiveIntegerField(default=0)),
+                ("tradeoff_text", models.TextField(blank=True, default="")),
+                (
+                    "explanation_key",
+                    models.CharField(blank=True, default="", max_length=64),
+                ),
+                ("explanation", models.TextField(blank=True, default="")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "category",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="comparison_runs",
+                        to="core.category",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at"],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_comparisonrun"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="comparisonrun",
+            name="local_explanation",
+            field=models.TextField(
+                blank=True,
+                default="",
+                help_text="Template-driven explanation of the ranking",
+            ),
+        ),
+    ]
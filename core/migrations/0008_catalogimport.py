@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_comparisonrun_local_explanation"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CatalogImport",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "source",
+                    models.CharField(
+                        help_text="Absolute path of the imported file", max_length=500
+                    ),
+                ),
+                (
+                    "offset",
+                    models.BigIntegerField(
+                        default=0,
+                        help_text="Byte offset just past the last committed row",
+                    ),
+                ),
+                (
+                    "line",
+                    models.BigIntegerField(
+                        default=0, help_text="Line number of the last committed row"
+                    ),
+                ),
+                ("rows_imported", models.BigIntegerField(default=0)),
+                ("rows_rejected", models.BigIntegerField(default=0)),
+                ("finished", models.BooleanField(default=False)),
+                ("started_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "category",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="catalog_imports",
+                        to="core.category",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-started_at"],
+                "unique_together": {("category", "source")},
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:42
+
+from django.db import migrations, models
+
+
+def keep_existing_items(apps, schema_editor):
+    """
+    Rows from before retention existed may be curated catalog data (admin
+    entries, imports) that cannot be told apart from comparison input, so
+    none of them is ever purged unless an admin marks it ephemeral.
+    """
+    UserItem = apps.get_model("core", "UserItem")
+    UserItem.objects.update(ephemeral=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_catalogimport"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="useritem",
+            name="ephemeral",
+            field=models.BooleanField(
+                default=True,
+                help_text="Entered for one comparison; deleted after USER_ITEM_RETENTION_DAYS (see purge_user_items)",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="useritem",
+            name="created_at",
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.RunPython(keep_existing_items, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0009_useritem_retention"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VersionStamp",
+            fields=[
+                (
+                    "name",
+                    models.CharField(max_length=100, primary_key=True, serialize=False),
+                ),
+                ("version", models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+    ]
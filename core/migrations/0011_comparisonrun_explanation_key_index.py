@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0010_versionstamp"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="comparisonrun",
+            name="explanation_key",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                default="",
+                help_text="Explanation cache key, which is also the id of its AI explanation job",
+                max_length=64,
+            ),
+        ),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import Q
+from django.utils.functional import cached_property
 
 
 class Category(models.Model):
@@ -44,6 +46,33 @@ class SpecificationField(models.Model):
         ordering = ["category__name", "name"]
 
 
+class UserItemQuerySet(models.QuerySet):
+
+    def matching(self, requirements):
+        """
+        Apply the analyze_products requirement filters in SQL.
+
+        Uses the indexed feature columns. Rows whose features were never
+        computed (NULL) are kept, so the engine's own filter pass decides
+        for them.
+        """
+        requirements = requirements or {}
+        qs = self
+
+        if requirements.get("max_budget"):
+            qs = qs.filter(Q(price__lte=requirements["max_budget"]) | Q(price__isnull=True))
+        if requirements.get("min_budget"):
+            qs = qs.filter(Q(price__gte=requirements["min_budget"]) | Q(price__isnull=True))
+        if requirements.get("min_ram"):
+            qs = qs.filter(Q(ram__gte=requirements["min_ram"]) | Q(ram__isnull=True))
+        if requirements.get("min_ssd"):
+            qs = qs.filter(Q(ssd__gte=requirements["min_ssd"]) | Q(ssd__isnull=True))
+        if requirements.get("optional_gpu_required"):
+            qs = qs.filter(Q(gpu_score__gt=3) | Q(gpu_score__isnull=True))
+
+        return qs
+
+
 class UserItem(models.Model):
     """
     User-entered item to compare for a category.
@@ -62,15 +91,176 @@ class UserItem(models.Model):
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name="user_items")
     item_name = models.CharField(max_length=200)
     specifications = models.JSONField(default=dict)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    ephemeral = models.BooleanField(
+        default=True,
+        help_text="Entered for one comparison; deleted after USER_ITEM_RETENTION_DAYS (see purge_user_items)",
+    )
+
+    # Numeric features derived from specifications (see ItemFeatures).
+    # Filled on save(); NULL only for rows saved before they existed.
+    price = models.FloatField(null=True, editable=False, db_index=True)
+    ram = models.FloatField(null=True, editable=False, db_index=True)
+    ssd = models.FloatField(null=True, editable=False, db_index=True)
+    processor_score = models.FloatField(null=True, editable=False, db_index=True)
+    gpu_score = models.FloatField(null=True, editable=False, db_index=True)
+
+    objects = UserItemQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.item_name} ({self.category.name})"
 
+    def compute_features(self):
+        """Derive the feature columns from specifications (bulk_create skips save())."""
+        from .services.comparison_engine import ItemFeatures
+
+        features = ItemFeatures.from_specs(self.specifications)
+        for field in ItemFeatures.FIELDS:
+            setattr(self, field, getattr(features, field))
+
+    def save(self, *args, **kwargs):
+        self.compute_features()
+        super().save(*args, **kwargs)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            # budget filters are scoped to one category
+            models.Index(fields=["category", "price"], name="core_useritem_cat_price_idx"),
+        ]
+
+
+class ComponentScore(models.Model):
+    """
+    Admin-editable benchmark score for a processor or GPU.
+
+    `name` is matched inside the free-text processor_name / gpu_name of an
+    item (longest match wins), e.g. "rtx 3050" -> 8. Rows override the
+    built-in PROCESSOR_MAP / GPU_MAP entries with the same name.
+    """
+
+    KIND_PROCESSOR = "processor"
+    KIND_GPU = "gpu"
+    KIND_CHOICES = [
+        (KIND_PROCESSOR, "Processor"),
+        (KIND_GPU, "GPU"),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    name = models.CharField(max_length=200, help_text="Name fragment matched in item specs (e.g., i7, rtx 3050)")
+    score = models.FloatField()
+
+    def __str__(self):
+        return f"{self.get_kind_display()} :: {self.name} = {self.score}"
+
+    class Meta:
+        unique_together = ("kind", "name")
+        ordering = ["kind", "name"]
+
+
+class ComparisonRun(models.Model):
+    """
+    Frozen result of one comparison, addressed by a hash of its inputs.
+
+    Identical submissions (same category, purpose, requirements, weights
+    and item contents) share one run, so /result/<run_id>/ can be served
+    to anyone with a single indexed read.
+
+    ranking holds every ranked item in rank order:
+      [{"item_id": 7, "item_name": "...", "score": 8.4, "specifications": {...}}, ...]
+    The tie group is its first tie_count entries.
+    """
+
+    run_id = models.CharField(max_length=64, unique=True)
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name="comparison_runs")
+    purpose = models.CharField(max_length=50, blank=True, default="")
+    requirements = models.JSONField(default=dict)
+    spec_fields = models.JSONField(default=list, help_text="Spec field names shown in the result table")
+    ranking = models.JSONField(default=list)
+    tie_count = models.PositiveIntegerField(default=0)
+    tradeoff_text = models.TextField(blank=True, default="")
+    local_explanation = models.TextField(blank=True, default="", help_text="Template-driven explanation of the ranking")
+    explanation_key = models.CharField(
+        max_length=64, blank=True, default="", db_index=True,
+        help_text="Explanation cache key, which is also the id of its AI explanation job",
+    )
+    explanation = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.category.name} run {self.run_id[:12]}"
+
+    @cached_property
+    def ranked_items(self):
+        """[(item, score), ...] with unsaved UserItem stand-ins for the frozen rows."""
+        return [
+            (
+                UserItem(
+                    id=row["item_id"],
+                    category_id=self.category_id,
+                    item_name=row["item_name"],
+                    specifications=row["specifications"],
+                ),
+                row["score"],
+            )
+            for row in self.ranking
+        ]
+
+    @property
+    def best_item(self):
+        return self.ranked_items[0][0] if self.ranking else None
+
+    @property
+    def top_group(self):
+        return self.ranked_items[:self.tie_count]
+
     class Meta:
         ordering = ["-created_at"]
 
 
+class CatalogImport(models.Model):
+    """
+    Progress of one catalog file being imported into UserItem rows.
+
+    Updated in the same transaction as every inserted batch, so offset
+    always points just past the last committed row and an interrupted
+    import resumes there (see services.catalog_import).
+    """
+
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name="catalog_imports")
+    source = models.CharField(max_length=500, help_text="Absolute path of the imported file")
+    offset = models.BigIntegerField(default=0, help_text="Byte offset just past the last committed row")
+    line = models.BigIntegerField(default=0, help_text="Line number of the last committed row")
+    rows_imported = models.BigIntegerField(default=0)
+    rows_rejected = models.BigIntegerField(default=0)
+    finished = models.BooleanField(default=False)
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.category.name} <- {self.source}"
+
+    class Meta:
+        unique_together = ("category", "source")
+        ordering = ["-started_at"]
+
+
+
+class VersionStamp(models.Model):
+    """
+    Change counter shared by every worker process.
+
+    Bumped when the data behind a per-process cache changes (component
+    scores, spec field weights, the catalog); processes compare it with the
+    value they last built from (see services.version_stamps).
+    """
+
+    name = models.CharField(max_length=100, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
 # Sample data examples (add via Django admin):
 #
 # 1) Add a Category:
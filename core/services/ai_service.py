@@ -1,40 +1,135 @@
+import asyncio
 import os
-import requests
+import threading
+import weakref
+
+from django.conf import settings
 from dotenv import load_dotenv
 
+from .explanation_cache import explanation_cache, explanation_key
+from .gemini_client import AsyncGeminiClient, CircuitBreaker, GeminiClient, GeminiError
+
 load_dotenv()
 
 API_KEY = os.getenv("GOOGLE_API_KEY")
 
-GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1/models/gemini-2.5-flash:generateContent"
+GEMINI_API_URL = os.getenv(
+    "GEMINI_API_URL",
+    "https://generativelanguage.googleapis.com/v1/models/gemini-2.5-flash:generateContent",
+)
+
+# defaults to the streamGenerateContent method of GEMINI_API_URL's model
+GEMINI_STREAM_URL = os.getenv("GEMINI_STREAM_URL")
+
+_client = None
+_client_lock = threading.Lock()
+
+# httpx clients are bound to the event loop they were created on
+_async_clients = weakref.WeakKeyDictionary()
 
 
-def get_ai_explanation(prompt_text):
-    if not API_KEY:
-        return "AI disabled. Add GOOGLE_API_KEY in .env"
+class AIServiceError(Exception):
+    """Raised when an explanation could not be produced by the LLM."""
 
-    headers = {"Content-Type": "application/json"}
 
-    payload = {
-        "contents": [{"role": "user", "parts": [{"text": prompt_text}]}],
-        "generationConfig": {"temperature": 0.7, "maxOutputTokens": 1000},
+def _client_options():
+    return {
+        "stream_url": GEMINI_STREAM_URL,
+        "timeout": settings.GEMINI_TIMEOUT,
+        "max_retries": settings.GEMINI_MAX_RETRIES,
+        "backoff_base": settings.GEMINI_BACKOFF_BASE,
+        "backoff_max": settings.GEMINI_BACKOFF_MAX,
+        "max_concurrency": settings.GEMINI_MAX_CONCURRENCY,
     }
 
-    try:
-        r = requests.post(
-            f"{GEMINI_API_URL}?key={API_KEY}",
-            headers=headers,
-            json=payload,
-            timeout=15,
+
+def get_client():
+    """The process-wide Gemini client (pooled session, retries, circuit breaker)."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = GeminiClient(
+                    GEMINI_API_URL,
+                    API_KEY,
+                    breaker=CircuitBreaker(
+                        threshold=settings.GEMINI_BREAKER_THRESHOLD,
+                        reset_timeout=settings.GEMINI_BREAKER_RESET,
+                    ),
+                    **_client_options(),
+                )
+    return _client
+
+
+def get_async_client():
+    """The async Gemini client of the running event loop; shares get_client()'s circuit breaker."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = AsyncGeminiClient(
+            GEMINI_API_URL,
+            API_KEY,
+            breaker=get_client().breaker,
+            **_client_options(),
         )
-        r.raise_for_status()
-        data = r.json()
-        return data["candidates"][0]["content"]["parts"][0]["text"]
-    except Exception as e:
-        return f"AI error: {e}"
+    return client
 
 
-def generate_ai_explanation(best_item, purpose, requirements, category):
+async def aclose_async_client():
+    """Close the running event loop's async client; called on ASGI lifespan shutdown."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def ai_enabled():
+    """Whether an LLM is configured at all (otherwise only local explanations are shown)."""
+    return bool(API_KEY)
+
+
+def request_ai_explanation(prompt_text, client=None):
+    """Call Gemini and return the explanation text, raising AIServiceError on failure."""
+    if not API_KEY and client is None:
+        raise AIServiceError("AI disabled. Add GOOGLE_API_KEY in .env")
+
+    try:
+        return (client or get_client()).generate(prompt_text)
+    except GeminiError as e:
+        raise AIServiceError(f"AI error: {e}") from e
+
+
+def stream_ai_explanation(prompt_text, client=None):
+    """Yield the explanation text in chunks as Gemini produces it, raising AIServiceError on failure."""
+    if not API_KEY and client is None:
+        raise AIServiceError("AI disabled. Add GOOGLE_API_KEY in .env")
+
+    try:
+        yield from (client or get_client()).stream(prompt_text)
+    except GeminiError as e:
+        raise AIServiceError(f"AI error: {e}") from e
+
+
+async def astream_ai_explanation(prompt_text, client=None):
+    """Async stream_ai_explanation(), for async views."""
+    if not API_KEY and client is None:
+        raise AIServiceError("AI disabled. Add GOOGLE_API_KEY in .env")
+
+    try:
+        async for chunk in (client or get_async_client()).stream(prompt_text):
+            yield chunk
+    except GeminiError as e:
+        raise AIServiceError(f"AI error: {e}") from e
+
+
+def get_ai_explanation(prompt_text, fallback=None):
+    """The LLM's explanation, or fallback (e.g. a local explanation) if given and the call fails."""
+    try:
+        return request_ai_explanation(prompt_text)
+    except AIServiceError as e:
+        return str(e) if fallback is None else fallback
+
+
+def build_explanation_prompt(best_item, purpose, requirements, category):
     specs = best_item.specifications or {}
     category_name = category.name.lower()
 
@@ -70,4 +165,34 @@ If multiple options are similar, explain the trade-offs.
 Keep it short (3–4 lines).
 """
 
-    return get_ai_explanation(prompt)
+    return prompt
+
+
+def fallback_explanation(best_item, purpose, requirements, category):
+    """Short explanation shown when the LLM is unavailable."""
+    purpose_text = f" for {purpose.replace('_', ' ')}" if purpose else ""
+    return (
+        f"{best_item.item_name} scored highest{purpose_text} among the "
+        f"{category.name.lower()} options you entered. "
+        "An AI explanation is not available right now."
+    )
+
+
+def explanation_key_for(best_item, purpose, requirements, category):
+    return explanation_key(category, purpose, requirements, best_item.specifications)
+
+
+def generate_ai_explanation(best_item, purpose, requirements, category):
+    key = explanation_key_for(best_item, purpose, requirements, category)
+    cached = explanation_cache.get(key)
+    if cached is not None:
+        return cached
+
+    prompt = build_explanation_prompt(best_item, purpose, requirements, category)
+    try:
+        explanation = request_ai_explanation(prompt)
+    except AIServiceError:
+        return fallback_explanation(best_item, purpose, requirements, category)
+
+    explanation_cache.set(key, explanation)
+    return explanation
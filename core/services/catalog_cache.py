@@ -0,0 +1,65 @@
+"""
+Catalog Cache
+Cached reads of the admin-defined catalog (categories and their spec
+fields) plus a version stamp for fragment caches and ETags.
+
+- Category / SpecificationField signals bump the version, which changes
+  every cache key derived from it; stale entries simply expire
+- The version is a database-backed stamp (services.version_stamps), so it
+  is the same in every worker and survives restarts; ETags built from it
+  never repeat for a different catalog
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from .version_stamps import version_stamps
+
+VERSION_KEY = "catalog"
+CACHE_PREFIX = "comparex:catalog"
+
+
+def catalog_version():
+    return version_stamps.get(VERSION_KEY)
+
+
+def invalidate_catalog():
+    version_stamps.bump(VERSION_KEY)
+
+
+def _get_or_set(name, build):
+    key = f"{CACHE_PREFIX}:{catalog_version()}:{name}"
+    value = cache.get(key)
+    if value is None:
+        value = build()
+        cache.set(key, value, settings.CATALOG_CACHE_TIMEOUT)
+    return value
+
+
+def get_categories():
+    """All categories ordered by name, each with a spec_field_count attribute."""
+    from ..models import Category
+
+    return _get_or_set(
+        "categories",
+        lambda: list(Category.objects.annotate(spec_field_count=Count("spec_fields")).order_by("name")),
+    )
+
+
+def get_category(category_id):
+    """A category (from the cached list) by id, or None."""
+    for category in get_categories():
+        if category.id == category_id:
+            return category
+    return None
+
+
+def get_spec_fields(category_id):
+    """A category's spec fields ordered by name."""
+    from ..models import SpecificationField
+
+    return _get_or_set(
+        f"spec_fields:{category_id}",
+        lambda: list(SpecificationField.objects.filter(category_id=category_id).order_by("name")),
+    )
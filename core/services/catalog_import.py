@@ -0,0 +1,263 @@
+"""
+Catalog Import Service
+Streams CSV / JSON Lines catalog files into UserItem rows.
+
+- Rows are read one at a time and inserted in chunked bulk_create batches,
+  so memory stays flat however large the file is (.gz files are read
+  compressed)
+- Every row is validated with the category's compiled item form fields,
+  the same checks as the compare formset, and gets its feature columns;
+  imported items are not ephemeral, so the retention purge keeps them
+- Progress lives in a CatalogImport row that is updated in the same
+  transaction as each batch, so an interrupted import resumes right after
+  the last committed row without duplicating or skipping any
+
+CSV: a header row with item_name and the category's spec field names.
+JSON Lines: one object per line, either {"item_name": ..., "specifications":
+{...}} or flat {"item_name": ..., "<spec field>": ...}.
+"""
+
+import csv
+import gzip
+import json
+import os
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from ..forms import form_registry
+from ..models import CatalogImport, UserItem
+from .catalog_cache import get_spec_fields
+
+FORMATS = ("csv", "jsonl")
+
+# Rows per bulk_create / transaction
+BATCH_SIZE = 5000
+
+
+class CatalogImportError(Exception):
+    """The file or the import as a whole cannot be processed."""
+
+
+def detect_format(path):
+    name = path[:-3] if path.endswith(".gz") else path
+    extension = os.path.splitext(name)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise CatalogImportError(f"Cannot tell the format of {path}; pass csv or jsonl explicitly.")
+
+
+def _open(path):
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+
+# ----------------------------------------------------
+# VALIDATION
+# ----------------------------------------------------
+class RowValidator:
+    """Cleans one raw row with the category's compiled item form fields."""
+
+    def __init__(self, category, spec_fields):
+        ItemForm = form_registry.item_formset(category, spec_fields).form
+        self.name_field = ItemForm.base_fields["item_name"]
+        self.spec_fields = ItemForm.compiled_fields
+
+    def clean(self, item_name, specs):
+        """Return (item_name, specifications), or raise ValidationError with {field: message}."""
+        errors = {}
+
+        unknown = sorted(set(specs) - set(self.spec_fields))
+        if unknown:
+            errors["specifications"] = f"Unknown fields: {', '.join(unknown)}"
+
+        try:
+            item_name = self.name_field.clean(item_name)
+        except ValidationError as e:
+            errors["item_name"] = " ".join(e.messages)
+
+        cleaned = {}
+        for name, field in self.spec_fields.items():
+            try:
+                cleaned[name] = field.clean(specs.get(name))
+            except ValidationError as e:
+                errors[name] = " ".join(e.messages)
+
+        if errors:
+            raise ValidationError(errors)
+        return item_name, cleaned
+
+
+# ----------------------------------------------------
+# READERS
+# ----------------------------------------------------
+class _Position:
+    """Byte offset and line number just past the last row read."""
+
+    def __init__(self, offset, line):
+        self.offset = offset
+        self.line = line
+
+
+def _text_lines(f, position):
+    for raw in iter(f.readline, b""):
+        position.offset += len(raw)
+        position.line += 1
+        yield raw.decode("utf-8")
+
+
+def _csv_rows(f, position, spec_names):
+    header_position = _Position(0, 0)
+    header = next(csv.reader(_text_lines(f, header_position)), None)
+    if not header:
+        raise CatalogImportError("The CSV file is empty.")
+    header = [column.strip().lstrip("\ufeff") for column in header]
+
+    if "item_name" not in header:
+        raise CatalogImportError("The CSV header has no item_name column.")
+    unknown = sorted(set(header) - set(spec_names) - {"item_name"})
+    if unknown:
+        raise CatalogImportError(
+            f"Unknown CSV columns: {', '.join(unknown)} (spec fields: {', '.join(spec_names)})."
+        )
+
+    if position.offset:
+        f.seek(position.offset)
+    else:
+        position.offset, position.line = header_position.offset, header_position.line
+
+    # csv.reader pulls lines only as it needs them, so position is exact
+    # after every row, even for quoted values that span lines
+    for values in csv.reader(_text_lines(f, position)):
+        if not any(value.strip() for value in values):
+            continue
+        row = dict(zip(header, values))
+        item_name = row.pop("item_name")
+        # empty cells are missing values, like empty form inputs
+        yield item_name, {name: value for name, value in row.items() if value != ""}
+
+
+def _jsonl_rows(f, position):
+    """Yields (item_name, specs), or a ValidationError for a line that is not a JSON object."""
+    if position.offset:
+        f.seek(position.offset)
+
+    for line in _text_lines(f, position):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield ValidationError({"line": f"Invalid JSON: {e}"})
+            continue
+        if not isinstance(data, dict):
+            yield ValidationError({"line": "Each line must be a JSON object."})
+            continue
+
+        item_name = data.pop("item_name", None)
+        specs = data.pop("specifications", data)
+        if not isinstance(specs, dict):
+            yield ValidationError({"specifications": "Specifications must be an object."})
+            continue
+        yield item_name, specs
+
+
+# ----------------------------------------------------
+# IMPORT
+# ----------------------------------------------------
+def start_import(category, path, resume=False, restart=False):
+    """
+    The CatalogImport to run for this file.
+
+    An unfinished import of the same file is only continued with
+    resume=True; restart=True starts over (and imports the rows again).
+    """
+    source = os.path.abspath(path)
+    if not os.path.isfile(source):
+        raise CatalogImportError(f"File not found: {path}")
+
+    job, created = CatalogImport.objects.get_or_create(category=category, source=source)
+    if created or restart:
+        if not created:
+            job.offset = job.line = job.rows_imported = job.rows_rejected = 0
+            job.finished = False
+            job.save()
+        return job
+
+    if job.finished:
+        raise CatalogImportError(
+            f"{path} was already imported into {category.name} ({job.rows_imported} rows); "
+            "pass --restart to import it again."
+        )
+    if not resume:
+        raise CatalogImportError(
+            f"An interrupted import of {path} into {category.name} stopped after {job.rows_imported} rows; "
+            "pass --resume to continue it or --restart to start over."
+        )
+    if not path.endswith(".gz") and os.path.getsize(source) < job.offset:
+        raise CatalogImportError(f"{path} is shorter than when it was imported; pass --restart.")
+    return job
+
+
+def _commit(job, batch, position, rejected):
+    with transaction.atomic():
+        if batch:
+            UserItem.objects.bulk_create(batch)
+        job.offset = position.offset
+        job.line = position.line
+        job.rows_imported += len(batch)
+        job.rows_rejected += rejected
+        job.save(update_fields=["offset", "line", "rows_imported", "rows_rejected", "updated_at"])
+
+
+def run_import(job, fmt, batch_size=BATCH_SIZE, on_batch=None, on_reject=None):
+    """
+    Import the job's file from its saved offset.
+
+    on_batch(job) is called after every committed batch; on_reject(line,
+    errors) for every invalid row, which is skipped (raise from it to stop
+    the import; committed batches stay and the import can be resumed).
+    """
+    category = job.category
+    spec_fields = get_spec_fields(category.id)
+    validator = RowValidator(category, spec_fields)
+    position = _Position(job.offset, job.line)
+
+    with _open(job.source) as f:
+        if fmt == "csv":
+            rows = _csv_rows(f, position, [sf.name for sf in spec_fields])
+        else:
+            rows = _jsonl_rows(f, position)
+
+        batch = []
+        rejected = 0
+        for row in rows:
+            try:
+                if isinstance(row, ValidationError):
+                    raise row
+                item_name, specs = validator.clean(*row)
+            except ValidationError as e:
+                rejected += 1
+                if on_reject is not None:
+                    on_reject(position.line, e.message_dict)
+                continue
+
+            user_item = UserItem(category=category, item_name=item_name, specifications=specs, ephemeral=False)
+            user_item.compute_features()
+            batch.append(user_item)
+
+            if len(batch) >= batch_size:
+                _commit(job, batch, position, rejected)
+                batch = []
+                rejected = 0
+                if on_batch is not None:
+                    on_batch(job)
+
+        _commit(job, batch, position, rejected)
+        if on_batch is not None:
+            on_batch(job)
+
+    job.finished = True
+    job.save(update_fields=["finished", "updated_at"])
+    return job
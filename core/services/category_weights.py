@@ -0,0 +1,81 @@
+"""
+Category Weight Cache
+Compiles each category's SpecificationField weights into a weight vector
+once per process.
+
+- Only number fields contribute; purpose weights (PURPOSE_WEIGHTS) are
+  merged on top and override category weights for the same field
+- Vectors are cached in process memory; SpecificationField signals bump a
+  version stamp (services.version_stamps) so every worker recompiles on
+  next use
+"""
+
+import threading
+
+from django.conf import settings
+
+from .version_stamps import version_stamps
+
+VERSION_KEY = "category_weights"
+
+
+class CategoryWeightCache:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._vectors = {}
+        self._version = None
+
+    def _check_version(self):
+        version = version_stamps.get(VERSION_KEY)
+        if version != self._version:
+            with self._lock:
+                self._vectors = {}
+                self._version = version
+
+    def _compile(self, category_id):
+        from ..models import SpecificationField
+
+        rows = (
+            SpecificationField.objects
+            .filter(category_id=category_id, field_type=SpecificationField.FIELD_TYPE_NUMBER)
+            .exclude(weight=0)
+            .order_by("name")
+            .values_list("name", "weight")
+        )
+        return dict(rows)
+
+    def category_weights(self, category_id):
+        """{field name: weight} for a category's numeric spec fields."""
+        self._check_version()
+        key = (category_id, None)
+        vector = self._vectors.get(key)
+        if vector is None:
+            vector = self._vectors[key] = self._compile(category_id)
+        return vector
+
+    def weights_for(self, category_id, purpose):
+        """Category weights with the purpose's weights merged on top."""
+        from .comparison_engine import PURPOSE_WEIGHTS
+
+        self._check_version()
+        key = (category_id, purpose)
+        vector = self._vectors.get(key)
+        if vector is None:
+            vector = dict(self.category_weights(category_id))
+            vector.update(PURPOSE_WEIGHTS.get(purpose, {}))
+            self._vectors[key] = vector
+        return vector
+
+    def invalidate(self):
+        version_stamps.bump(VERSION_KEY)
+
+
+category_weights = CategoryWeightCache()
+
+
+def scoring_weights(category_id, purpose):
+    """Weights for the configured SCORING_MODE; None means the engine's purpose weights."""
+    if settings.SCORING_MODE == "category":
+        return category_weights.weights_for(category_id, purpose)
+    return None
@@ -0,0 +1,250 @@
+"""
+Comparison API Service
+Validates and ranks JSON comparison requests in a single call.
+
+- Items and requirements are validated with the same compiled per-category
+  forms as the HTML compare page, so both paths accept the same input
+- Responses carry the local (template-driven) explanation of the ranking
+- Items are ranked as unsaved UserItems; nothing is written unless the
+  request sets "persist", which stores the items and a shareable
+  ComparisonRun exactly like a form submission
+- A batch is a list of independent comparisons; one invalid entry does
+  not fail the others
+- arun_comparison()/arun_batch() serve the async API views: validation
+  runs in a worker thread, storage uses the async ORM
+"""
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.urls import reverse
+
+from ..forms import form_registry
+from ..models import UserItem
+from .catalog_cache import get_category, get_spec_fields
+from .category_weights import scoring_weights
+from .comparison_engine import rank_products
+from .comparison_runs import aget_or_create_run, get_or_create_run, local_explanation_for
+
+
+class ComparisonRequestError(Exception):
+    """A comparison request failed validation; errors is a JSON-serializable dict."""
+
+    def __init__(self, errors):
+        super().__init__("Invalid comparison request")
+        self.errors = errors
+
+
+def _parse_category(payload):
+    category_id = payload.get("category")
+    if isinstance(category_id, bool) or not isinstance(category_id, int):
+        raise ComparisonRequestError({"category": "An integer category id is required."})
+
+    category = get_category(category_id)
+    if category is None:
+        raise ComparisonRequestError({"category": f"Unknown category {category_id}."})
+    return category
+
+
+def _parse_requirements(payload, category):
+    requirements = payload.get("requirements") or {}
+    if not isinstance(requirements, dict):
+        raise ComparisonRequestError({"requirements": "Requirements must be an object."})
+
+    PurposeForm = form_registry.purpose_form(category)
+    form = PurposeForm({**requirements, "purpose": payload.get("purpose") or ""})
+    if not form.is_valid():
+        raise ComparisonRequestError({"requirements": form.errors.get_json_data()})
+    return form.cleaned_data.get("purpose"), form.get_requirements()
+
+
+def _parse_items(payload, category, spec_fields):
+    items = payload.get("items")
+    if not isinstance(items, list) or not items:
+        raise ComparisonRequestError({"items": "A non-empty list of items is required."})
+
+    ItemForm = form_registry.item_formset(category, spec_fields).form
+    user_items = []
+    errors = {}
+
+    for index, entry in enumerate(items):
+        if not isinstance(entry, dict):
+            errors[index] = "Each item must be an object."
+            continue
+
+        specs = entry.get("specifications") or {}
+        if not isinstance(specs, dict):
+            errors[index] = {"specifications": "Specifications must be an object."}
+            continue
+
+        form = ItemForm({**specs, "item_name": entry.get("item_name")})
+        if not form.is_valid():
+            errors[index] = form.errors.get_json_data()
+            continue
+
+        user_item = UserItem(
+            category=category,
+            item_name=form.cleaned_data["item_name"],
+            specifications=form.get_specifications(),
+        )
+        user_item.compute_features()
+        user_items.append(user_item)
+
+    if errors:
+        raise ComparisonRequestError({"items": errors})
+    return user_items
+
+
+def _parse_limit(payload):
+    limit = payload.get("limit")
+    if limit is None:
+        return None
+    if isinstance(limit, bool) or not isinstance(limit, int) or limit < 1:
+        raise ComparisonRequestError({"limit": "Limit must be a positive integer."})
+    return limit
+
+
+def _ranking_rows(ranked_items):
+    return [
+        {
+            "rank": rank,
+            "item_name": item.item_name,
+            "score": score,
+            "specifications": item.specifications or {},
+        }
+        for rank, (item, score) in enumerate(ranked_items, start=1)
+    ]
+
+
+def _prepare(payload):
+    if not isinstance(payload, dict):
+        raise ComparisonRequestError({"request": "A comparison must be an object."})
+
+    category = _parse_category(payload)
+    spec_fields = get_spec_fields(category.id)
+    purpose, requirements = _parse_requirements(payload, category)
+    items = _parse_items(payload, category, spec_fields)
+    limit = _parse_limit(payload)
+    weights = scoring_weights(category.id, purpose)
+    return category, spec_fields, purpose, requirements, items, limit, weights
+
+
+def _store_items(items):
+    # bulk_create splits large lists into several INSERTs (SQLite caps the
+    # parameters per query); one transaction stores all of them or none
+    with transaction.atomic():
+        return UserItem.objects.bulk_create(items)
+
+
+def _base_response(category, purpose, requirements):
+    return {
+        "category": category.id,
+        "purpose": purpose,
+        "requirements": requirements,
+    }
+
+
+def _run_response(response, run, limit):
+    ranked_items = run.ranked_items
+    response.update({
+        "total": len(ranked_items),
+        "ranking": _ranking_rows(ranked_items[:limit]),
+        "tie_group": [item.item_name for item, _ in run.top_group],
+        "tradeoff_text": run.tradeoff_text or None,
+        "explanation": local_explanation_for(run) or None,
+        "run_id": run.run_id,
+        "url": reverse("core:run_result", kwargs={"run_id": run.run_id}),
+    })
+    return response
+
+
+def _ranking_response(response, category, purpose, requirements, items, limit, weights):
+    ranking = rank_products(purpose, requirements, items, weights=weights)
+    ranked_items, _, top_group, tradeoff_text = ranking.summary(limit)
+    response.update({
+        "total": len(ranking),
+        "ranking": _ranking_rows(ranked_items),
+        "tie_group": [item.item_name for item, _ in top_group],
+        "tradeoff_text": tradeoff_text,
+        "explanation": ranking.explanation(purpose, category) or None,
+    })
+    return response
+
+
+def run_comparison(payload):
+    """
+    Rank one comparison request.
+
+    payload: {"category": id, "purpose": str, "requirements": {...},
+              "items": [{"item_name": str, "specifications": {...}}, ...],
+              "limit": int (optional), "persist": bool (optional)}
+
+    Raises ComparisonRequestError when the payload is invalid.
+    """
+    category, spec_fields, purpose, requirements, items, limit, weights = _prepare(payload)
+    response = _base_response(category, purpose, requirements)
+
+    if payload.get("persist"):
+        # same storage as a form submission, so the run gets a shareable link
+        items = _store_items(items)
+        run = get_or_create_run(category, purpose, requirements, items, weights=weights, spec_fields=spec_fields)
+        return _run_response(response, run, limit)
+
+    return _ranking_response(response, category, purpose, requirements, items, limit, weights)
+
+
+async def arun_comparison(payload):
+    """Async run_comparison()."""
+    # forms and the catalog caches are sync-only
+    category, spec_fields, purpose, requirements, items, limit, weights = await sync_to_async(_prepare)(payload)
+    response = _base_response(category, purpose, requirements)
+
+    if payload.get("persist"):
+        # transaction.atomic() is sync-only, so the insert runs in a worker thread
+        items = await sync_to_async(_store_items)(items)
+        run = await aget_or_create_run(category, purpose, requirements, items, weights=weights, spec_fields=spec_fields)
+        # runs stored before local explanations existed build one, which may query
+        return await sync_to_async(_run_response)(response, run, limit)
+
+    # scoring may reload the component score tables, which queries
+    return await sync_to_async(_ranking_response)(response, category, purpose, requirements, items, limit, weights)
+
+
+def _check_batch(payloads):
+    if not isinstance(payloads, list) or not payloads:
+        raise ComparisonRequestError({"comparisons": "A non-empty list of comparisons is required."})
+
+    max_size = settings.API_BATCH_MAX_SIZE
+    if len(payloads) > max_size:
+        raise ComparisonRequestError({"comparisons": f"At most {max_size} comparisons per batch."})
+
+
+def run_batch(payloads):
+    """
+    Rank a list of comparison requests.
+
+    Returns one entry per request, in order: the run_comparison() response,
+    or {"errors": {...}} for a request that failed validation.
+    """
+    _check_batch(payloads)
+
+    results = []
+    for payload in payloads:
+        try:
+            results.append(run_comparison(payload))
+        except ComparisonRequestError as e:
+            results.append({"errors": e.errors})
+    return results
+
+
+async def arun_batch(payloads):
+    """Async run_batch()."""
+    _check_batch(payloads)
+
+    results = []
+    for payload in payloads:
+        try:
+            results.append(await arun_comparison(payload))
+        except ComparisonRequestError as e:
+            results.append({"errors": e.errors})
+    return results
@@ -0,0 +1,75 @@
+"""
+Comparison Context Service
+Carries a submitted comparison from the compare page to its result page
+in a signed URL token instead of the session.
+
+- The token holds the category, the saved item ids, the purpose and the
+  requirements, signed with SECRET_KEY (so ids cannot be swapped for
+  someone else's items) and expiring after COMPARISON_CONTEXT_MAX_AGE
+- Item ids are stored as runs of consecutive ids (one bulk_create gives
+  one run), so the token stays short however many items were compared
+- Decoding needs no database or cache read: the compare/result round trip
+  never loads or saves a session
+"""
+
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core import signing
+
+SALT = "core.comparison_context"
+
+
+@dataclass(frozen=True)
+class ComparisonContext:
+    category_id: int
+    item_ids: list
+    purpose: str = ""
+    requirements: dict = field(default_factory=dict)
+
+
+def _id_runs(ids):
+    """[3, 4, 5, 9] -> [[3, 3], [9, 1]] (first id, count)."""
+    runs = []
+    for item_id in sorted(set(ids)):
+        if runs and runs[-1][0] + runs[-1][1] == item_id:
+            runs[-1][1] += 1
+        else:
+            runs.append([item_id, 1])
+    return runs
+
+
+def _ids(runs):
+    return [first + offset for first, count in runs for offset in range(count)]
+
+
+def encode_context(context):
+    """URL-safe signed token for a ComparisonContext."""
+    return signing.dumps(
+        {
+            "c": context.category_id,
+            "i": _id_runs(context.item_ids),
+            "p": context.purpose or "",
+            "r": context.requirements or {},
+        },
+        salt=SALT,
+        compress=True,
+    )
+
+
+def decode_context(token, category_id):
+    """The ComparisonContext in token, or None if it is invalid, expired or for another category."""
+    if not token:
+        return None
+    try:
+        data = signing.loads(token, salt=SALT, max_age=settings.COMPARISON_CONTEXT_MAX_AGE)
+        if data["c"] != category_id:
+            return None
+        return ComparisonContext(
+            category_id=data["c"],
+            item_ids=_ids(data["i"]),
+            purpose=data["p"],
+            requirements=data["r"],
+        )
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        return None
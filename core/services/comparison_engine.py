@@ -3,12 +3,23 @@ Comparison Engine Service
 Handles scoring and ranking of user-entered items based on purpose and requirements.
 Now supports:
 - Multiple best items (tie detection)
-- Trade-off comparison
+- Trade-off comparison (see local_explanations)
+- Columnar (NumPy) scoring for large candidate sets
 """
 
+import numpy as np
+
+from .component_scores import component_index
+from .local_explanations import explain_ranking, tradeoff_text
+from .metrics import span
+from .score_matcher import ScoreMatcher
+
 # How close scores must be to be considered equal
 TIE_THRESHOLD = 0.5
 
+# Candidate sets at least this large are scored with the columnar path
+VECTORIZE_THRESHOLD = 64
+
 
 # ----------------------------------------------------
 # PURPOSE WEIGHTS
@@ -68,24 +79,20 @@ GPU_MAP = {
 }
 
 
+# Compiled matchers over the maps above. Extend them at runtime with
+# PROCESSOR_MATCHER.update({...}) / GPU_MATCHER.update({...}).
+PROCESSOR_MATCHER = ScoreMatcher(PROCESSOR_MAP, default=5, missing=0)
+GPU_MATCHER = ScoreMatcher(GPU_MAP, default=3, missing=0)
+
+
 def get_processor_score(name):
-    if not name:
-        return 0
-    name = name.lower()
-    for key in PROCESSOR_MAP:
-        if key in name:
-            return PROCESSOR_MAP[key]
-    return 5
+    component_index.ensure_loaded()
+    return PROCESSOR_MATCHER.score(name)
 
 
 def get_gpu_score(name):
-    if not name:
-        return 0
-    name = name.lower()
-    for key in GPU_MAP:
-        if key in name:
-            return GPU_MAP[key]
-    return 3
+    component_index.ensure_loaded()
+    return GPU_MATCHER.score(name)
 
 
 # ----------------------------------------------------
@@ -97,85 +104,378 @@ def _safe_float(value):
         return 0.0
 
 
-def _has_gpu(specs):
-    gpu_name = specs.get("gpu_name", "")
-    score = get_gpu_score(gpu_name)
-    return score > 3
+def _has_gpu(features):
+    return features.gpu_score > 3
+
+
+# ----------------------------------------------------
+# DERIVED FEATURES
+# ----------------------------------------------------
+class ItemFeatures:
+    """
+    Numeric features of one item, derived from its specifications.
+
+    Stored on UserItem's feature columns when the item is saved, so
+    scoring reads numbers instead of re-parsing specs on every request.
+    """
+
+    __slots__ = ("price", "ram", "ssd", "processor_score", "gpu_score")
+
+    FIELDS = __slots__
+
+    def __init__(self, price=0.0, ram=0.0, ssd=0.0, processor_score=0.0, gpu_score=0.0):
+        self.price = price
+        self.ram = ram
+        self.ssd = ssd
+        self.processor_score = processor_score
+        self.gpu_score = gpu_score
+
+    @classmethod
+    def from_specs(cls, specs):
+        specs = specs or {}
+        return cls(
+            price=_safe_float(specs.get("price")),
+            ram=_safe_float(specs.get("ram")),
+            ssd=_safe_float(specs.get("ssd")),
+            processor_score=get_processor_score(specs.get("processor_name", "")),
+            gpu_score=get_gpu_score(specs.get("gpu_name", "")),
+        )
+
+    @classmethod
+    def for_item(cls, item):
+        """Stored features of an item, or features derived from its specs if it has none."""
+        values = [getattr(item, field, None) for field in cls.FIELDS]
+        if None in values:
+            return cls.from_specs(item.specifications)
+        return cls(*values)
+
+    def as_row(self):
+        return (self.price, self.ram, self.ssd, self.processor_score, self.gpu_score)
+
+    def __repr__(self):
+        values = ", ".join(f"{field}={getattr(self, field)!r}" for field in self.FIELDS)
+        return f"ItemFeatures({values})"
+
+
+FEATURE_COLUMNS = {field: idx for idx, field in enumerate(ItemFeatures.FIELDS)}
 
 
 # ----------------------------------------------------
 # MAIN ANALYSIS FUNCTION
 # ----------------------------------------------------
-def analyze_products(purpose, requirements, items):
+def analyze_products(purpose, requirements, items, weights=None, top_k=None):
+    """
+    Filter, score and rank items.
+
+    weights: {field name: weight} to score with; defaults to
+    PURPOSE_WEIGHTS[purpose] (see CategoryWeightCache.weights_for for
+    category-driven weights).
+    top_k: return only the k best items in ranked_items (the tie group is
+    still complete); use rank_products() to page through the rest.
+    """
 
     items_list = list(items or [])
     if not items_list:
         return [], None, [], None
 
-    # ---------------- FILTER ----------------
-    filtered_items = []
+    if top_k is not None or len(items_list) >= VECTORIZE_THRESHOLD:
+        return analyze_products_vectorized(purpose, requirements, items_list, weights, top_k)
+
+    component_index.refresh_if_stale()
 
-    for item in items_list:
-        specs = item.specifications or {}
+    # ---------------- FILTER ----------------
+    with span("engine.filter"):
+        filtered_items = []
 
-        price = _safe_float(specs.get("price"))
-        ram = _safe_float(specs.get("ram"))
-        ssd = _safe_float(specs.get("ssd"))
+        for item in items_list:
+            features = ItemFeatures.for_item(item)
 
-        if requirements.get("max_budget") and price > requirements["max_budget"]:
-            continue
+            price = features.price
+            ram = features.ram
+            ssd = features.ssd
 
-        if requirements.get("min_budget") and price < requirements["min_budget"]:
-            continue
+            if requirements.get("max_budget") and price > requirements["max_budget"]:
+                continue
 
-        if requirements.get("min_ram") and ram < requirements["min_ram"]:
-            continue
+            if requirements.get("min_budget") and price < requirements["min_budget"]:
+                continue
 
-        if requirements.get("min_ssd") and ssd < requirements["min_ssd"]:
-            continue
+            if requirements.get("min_ram") and ram < requirements["min_ram"]:
+                continue
 
-        if requirements.get("optional_gpu_required"):
-            if not _has_gpu(specs):
+            if requirements.get("min_ssd") and ssd < requirements["min_ssd"]:
                 continue
 
-        filtered_items.append(item)
+            if requirements.get("optional_gpu_required"):
+                if not _has_gpu(features):
+                    continue
+
+            filtered_items.append((item, features))
 
     if not filtered_items:
         return [], None, [], None
 
     # ---------------- SCORING ----------------
-    purpose_weights = PURPOSE_WEIGHTS.get(purpose, {})
-    scored = []
+    with span("engine.score"):
+        purpose_weights = PURPOSE_WEIGHTS.get(purpose, {}) if weights is None else weights
+        scored = []
+
+        prices = [features.price for _, features in filtered_items]
+        max_price = max(prices) if prices else 1
+        min_price = min(prices) if prices else 0
+        price_range = max_price - min_price if max_price > min_price else 1
+
+        for item, features in filtered_items:
+            specs = item.specifications or {}
 
-    prices = [_safe_float((i.specifications or {}).get("price", 0)) for i in filtered_items]
-    max_price = max(prices) if prices else 1
-    min_price = min(prices) if prices else 0
-    price_range = max_price - min_price if max_price > min_price else 1
+            score = 0
 
-    for item in filtered_items:
-        specs = item.specifications or {}
+            for field_name, weight in purpose_weights.items():
+                if field_name in FEATURE_COLUMNS:
+                    value = getattr(features, field_name)
+                else:
+                    value = _safe_float(specs.get(field_name, 0))
 
-        processor_name = specs.get("processor_name", "")
-        gpu_name = specs.get("gpu_name", "")
+                if field_name == "price":
+                    normalized_price = (max_price - value) / price_range
+                    score += normalized_price * weight
+                else:
+                    score += value * weight
 
-        specs["processor_score"] = get_processor_score(processor_name)
-        specs["gpu_score"] = get_gpu_score(gpu_name)
+            scored.append((item, round(score, 2)))
 
-        score = 0
+    with span("engine.rank"):
+        ranked_items = sorted(scored, key=lambda x: x[1], reverse=True)
+        return _summarize_ranking(ranked_items, purpose_weights, (min_price, max_price))
 
-        for field_name, weight in purpose_weights.items():
-            value = _safe_float(specs.get(field_name, 0))
 
+# ----------------------------------------------------
+# COLUMNAR (VECTORIZED) ANALYSIS
+# ----------------------------------------------------
+def _column(specs_list, field_name):
+    """Extract one spec field of every item as a float64 array."""
+    return np.fromiter(
+        (_safe_float(specs.get(field_name)) for specs in specs_list),
+        dtype=np.float64,
+        count=len(specs_list),
+    )
+
+
+def _feature_matrix(items_list):
+    """Stack every item's ItemFeatures into an (n, len(FIELDS)) float64 array."""
+    matrix = np.empty((len(items_list), len(ItemFeatures.FIELDS)), dtype=np.float64)
+    for idx, item in enumerate(items_list):
+        matrix[idx] = ItemFeatures.for_item(item).as_row()
+    return matrix
+
+
+def analyze_products_vectorized(purpose, requirements, items, weights=None, top_k=None):
+    """
+    Columnar equivalent of analyze_products.
+
+    Specs are loaded into NumPy columns once, then filtering, price
+    normalization and the purpose-weighted sum run as array operations.
+    Returns the same (ranked_items, best_item, top_group, tradeoff_text)
+    tuple as the per-item loop.
+    """
+    return rank_products(purpose, requirements, items, weights).summary(top_k)
+
+
+def _requirement_mask(requirements, features):
+    """Boolean mask of the feature matrix rows that meet the requirements."""
+    def feature(name):
+        return features[:, FEATURE_COLUMNS[name]]
+
+    mask = np.ones(len(features), dtype=bool)
+
+    if requirements.get("max_budget"):
+        mask &= ~(feature("price") > requirements["max_budget"])
+    if requirements.get("min_budget"):
+        mask &= ~(feature("price") < requirements["min_budget"])
+    if requirements.get("min_ram"):
+        mask &= ~(feature("ram") < requirements["min_ram"])
+    if requirements.get("min_ssd"):
+        mask &= ~(feature("ssd") < requirements["min_ssd"])
+    if requirements.get("optional_gpu_required"):
+        mask &= feature("gpu_score") > 3
+
+    return mask
+
+
+def matching_items(requirements, items):
+    """The items rank_products would keep after its requirement filter, in order."""
+    items_list = list(items or [])
+    if not items_list or not requirements:
+        return items_list
+
+    component_index.refresh_if_stale()
+    mask = _requirement_mask(requirements, _feature_matrix(items_list))
+    return [items_list[i] for i in np.flatnonzero(mask)]
+
+
+def rank_products(purpose, requirements, items, weights=None):
+    """Filter and score items column-wise; returns a lazily ordered Ranking."""
+    items_list = list(items or [])
+    if not items_list:
+        return Ranking([], [])
+
+    component_index.refresh_if_stale()
+
+    with span("engine.features"):
+        features = _feature_matrix(items_list)
+
+    def feature(name):
+        return features[:, FEATURE_COLUMNS[name]]
+
+    # ---------------- FILTER ----------------
+    with span("engine.filter"):
+        mask = _requirement_mask(requirements, features)
+
+    keep = np.flatnonzero(mask)
+    if not keep.size:
+        return Ranking([], [])
+
+    filtered_items = [items_list[i] for i in keep]
+    features = features[keep]
+
+    # ---------------- SCORING ----------------
+    with span("engine.score"):
+        prices = feature("price")
+        max_price = prices.max()
+        min_price = prices.min()
+        price_range = max_price - min_price if max_price > min_price else 1
+
+        # Accumulate weight by weight (a column-wise dot product) so the float
+        # summation order, and therefore rounding, matches the per-item loop.
+        scores = np.zeros(len(filtered_items), dtype=np.float64)
+        filtered_specs = [item.specifications or {} for item in filtered_items]
+        if weights is None:
+            weights = PURPOSE_WEIGHTS.get(purpose, {})
+
+        for field_name, weight in weights.items():
             if field_name == "price":
-                normalized_price = (max_price - value) / price_range
-                score += normalized_price * weight
+                scores += ((max_price - prices) / price_range) * weight
+            elif field_name in FEATURE_COLUMNS:
+                scores += feature(field_name) * weight
             else:
-                score += value * weight
+                # fields without a stored feature are read from the specs
+                scores += _column(filtered_specs, field_name) * weight
+
+        rounded = [round(score, 2) for score in scores.tolist()]
+
+    return Ranking(filtered_items, rounded, weights=weights, price_bounds=(min_price.item(), max_price.item()))
 
-        scored.append((item, round(score, 2)))
 
-    ranked_items = sorted(scored, key=lambda x: x[1], reverse=True)
+# ----------------------------------------------------
+# LAZY RANKING
+# ----------------------------------------------------
+class Ranking:
+    """
+    Scored candidates, ordered on demand.
+
+    Order is by score descending, ties in input order (the same order as
+    sorted(..., reverse=True)). Only the prefix that has been asked for is
+    sorted: top(k) / page(n) select candidates with argpartition in O(n)
+    and sort just those, so ranking a whole catalogue for one page never
+    sorts the full list.
+
+    weights and price_bounds are what the scores were computed with; the
+    local explanations use them to split scores into per-field points.
+    """
+
+    def __init__(self, items, scores, weights=None, price_bounds=None):
+        self.items = list(items)
+        self.scores = list(scores)
+        self.weights = weights or {}
+        self.price_bounds = price_bounds or (0.0, 0.0)
+        self._score_array = np.asarray(self.scores, dtype=np.float64)
+        self._order = np.empty(0, dtype=np.intp)  # sorted prefix of positions
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+    def _sorted_by_rank(self, positions):
+        # lexsort: last key is primary -> score descending, then position
+        return positions[np.lexsort((positions, -self._score_array[positions]))]
+
+    def _extend_order(self, count):
+        count = min(count, len(self.items))
+        done = len(self._order)
+        if count <= done:
+            return
+
+        rest = np.setdiff1d(np.arange(len(self.items)), self._order, assume_unique=True)
+        need = count - done
+        if need >= rest.size:
+            chosen = rest
+        else:
+            rest_scores = self._score_array[rest]
+            # value of the need-th best remaining score
+            cutoff = -np.partition(-rest_scores, need - 1)[need - 1]
+            above = rest[rest_scores > cutoff]
+            # among scores equal to the cutoff keep the earliest positions
+            equal = rest[rest_scores == cutoff][: need - above.size]
+            chosen = np.concatenate((above, equal))
+
+        self._order = np.concatenate((self._order, self._sorted_by_rank(chosen)))
+
+    def _pairs(self, positions):
+        return [(self.items[i], self.scores[i]) for i in positions.tolist()]
+
+    def top(self, k=None):
+        """The k best (item, score) pairs in rank order (all if k is None)."""
+        k = len(self.items) if k is None else max(k, 0)
+        self._extend_order(k)
+        return self._pairs(self._order[:k])
+
+    def page(self, number, size):
+        """1-based page of (item, score) pairs; empty past the last page."""
+        start = (number - 1) * size
+        self._extend_order(start + size)
+        return self._pairs(self._order[start:start + size])
+
+    def num_pages(self, size):
+        return max(1, -(-len(self.items) // size))
+
+    def tie_group(self, threshold=TIE_THRESHOLD):
+        """Items scoring within threshold of the best, in rank order."""
+        if not self.items:
+            return []
+        top_score = self._score_array.max()
+        positions = np.flatnonzero(np.abs(self._score_array - top_score) <= threshold)
+        return self._pairs(self._sorted_by_rank(positions))
+
+    def summary(self, top_k=None):
+        """(ranked_items, best_item, top_group, tradeoff_text) for the first top_k items."""
+        if not self.items:
+            return [], None, [], None
+
+        with span("engine.rank"):
+            ranked_items = self.top(top_k)
+            best_item = self.top(1)[0][0]
+            top_group = self.tie_group()
+        return ranked_items, best_item, top_group, tradeoff_text(top_group, self.weights, self.price_bounds)
+
+    def explanation(self, purpose, category=None):
+        """Local, template-driven explanation of the ranking (see local_explanations)."""
+        if not self.items:
+            return ""
+        top_group = self.tie_group()
+        return explain_ranking(
+            purpose,
+            self.top(len(top_group) + 1),
+            top_group,
+            weights=self.weights,
+            bounds=self.price_bounds,
+            category=category,
+            total=len(self),
+        )
 
+
+def _summarize_ranking(ranked_items, weights, price_bounds):
     if not ranked_items:
         return [], None, [], None
 
@@ -190,14 +490,4 @@ def analyze_products(purpose, requirements, items):
 
     best_item = ranked_items[0][0]
 
-    # ---------------- TRADE-OFF TEXT ----------------
-    tradeoff_text = None
-    if len(top_group) > 1:
-        names = [item.item_name for item, _ in top_group]
-        tradeoff_text = (
-            "These laptops offer very similar performance based on your requirements. "
-            "They differ mainly in brand preference, cooling design, and build quality. "
-            "Choose based on design preference, portability, or brand trust."
-        )
-
-    return ranked_items, best_item, top_group, tradeoff_text
+    return ranked_items, best_item, top_group, tradeoff_text(top_group, weights, price_bounds)
@@ -0,0 +1,171 @@
+"""
+Comparison Run Service
+Freezes comparison results into ComparisonRun rows keyed by a hash of
+their inputs.
+
+- Identical submissions hash to the same run_id and reuse the stored run
+  instead of re-scoring; only the items that meet the requirements are
+  hashed, so the compare page (filtered in SQL first) and the JSON API
+  (every posted item) agree on the run_id
+- Runs are read through Django's cache, so a shared result link costs at
+  most one indexed query
+- aget_run()/aget_or_create_run() are the same lookups for async views,
+  using the async cache and queryset APIs
+"""
+
+import hashlib
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import QuerySet
+
+from ..models import ComparisonRun
+from .ai_service import explanation_key_for
+from .category_weights import scoring_weights
+from .comparison_engine import matching_items, rank_products
+from .local_explanations import explain_ranking
+from .metrics import span
+
+CACHE_PREFIX = "comparex:run"
+
+
+def _cache_key(run_id):
+    return f"{CACHE_PREFIX}:{run_id}"
+
+
+def run_key(category, purpose, requirements, items, weights=None):
+    """
+    Deterministic hash of everything a ranking depends on.
+
+    Items are hashed by content (name + specs), sorted, so resubmitting the
+    same items dedupes even though it creates new UserItem rows, and the
+    compare page (newest first) and the JSON API (as posted) agree on the
+    run_id whatever order the items arrive in.
+    """
+    item_entries = sorted(
+        json.dumps([item.item_name, item.specifications or {}], sort_keys=True, default=str)
+        for item in items
+    )
+    payload = json.dumps(
+        {
+            "category": category.id,
+            "purpose": purpose or "",
+            "requirements": requirements or {},
+            "weights": weights,
+            "items": item_entries,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_run(run_id):
+    """Fetch a run by id (cache first), or None."""
+    run = cache.get(_cache_key(run_id))
+    if run is None:
+        run = ComparisonRun.objects.select_related("category").filter(run_id=run_id).first()
+        if run is not None:
+            cache.set(_cache_key(run_id), run, settings.COMPARISON_RUN_CACHE_TIMEOUT)
+    return run
+
+
+def _score_run(category, purpose, requirements, items, weights, spec_fields):
+    """Rank the items and return the ComparisonRun field values for them."""
+    ranking = rank_products(purpose, requirements, items, weights=weights)
+    ranked_items, best_item, top_group, tradeoff_text = ranking.summary()
+    local_explanation = ranking.explanation(purpose, category)
+
+    explanation_key = ""
+    if best_item is not None:
+        explanation_key = explanation_key_for(best_item, purpose, requirements, category)
+
+    return {
+        "category": category,
+        "purpose": purpose or "",
+        "requirements": requirements or {},
+        "spec_fields": [sf.name for sf in spec_fields],
+        "ranking": [
+            {
+                "item_id": item.id,
+                "item_name": item.item_name,
+                "score": score,
+                "specifications": item.specifications or {},
+            }
+            for item, score in ranked_items
+        ],
+        "tie_count": len(top_group),
+        "tradeoff_text": tradeoff_text or "",
+        "local_explanation": local_explanation,
+        "explanation_key": explanation_key,
+    }
+
+
+def get_or_create_run(category, purpose, requirements, items, weights=None, spec_fields=()):
+    """Return the run for these inputs, scoring and storing it only if it is new."""
+    with span("orm.items"):
+        items = list(items)
+    items = matching_items(requirements, items)
+    run_id = run_key(category, purpose, requirements, items, weights)
+
+    run = get_run(run_id)
+    if run is not None:
+        return run
+
+    defaults = _score_run(category, purpose, requirements, items, weights, spec_fields)
+
+    with span("orm.save_run"):
+        run, _ = ComparisonRun.objects.get_or_create(run_id=run_id, defaults=defaults)
+    cache.set(_cache_key(run_id), run, settings.COMPARISON_RUN_CACHE_TIMEOUT)
+    return run
+
+
+async def aget_run(run_id):
+    """Async get_run()."""
+    run = await cache.aget(_cache_key(run_id))
+    if run is None:
+        run = await ComparisonRun.objects.select_related("category").filter(run_id=run_id).afirst()
+        if run is not None:
+            await cache.aset(_cache_key(run_id), run, settings.COMPARISON_RUN_CACHE_TIMEOUT)
+    return run
+
+
+async def aget_or_create_run(category, purpose, requirements, items, weights=None, spec_fields=()):
+    """Async get_or_create_run(); items may be a queryset, evaluated with async iteration."""
+    with span("orm.items"):
+        if isinstance(items, QuerySet):
+            items = [item async for item in items]
+        else:
+            items = list(items)
+    # may reload the component score tables, which queries
+    items = await sync_to_async(matching_items)(requirements, items)
+    run_id = run_key(category, purpose, requirements, items, weights)
+
+    run = await aget_run(run_id)
+    if run is not None:
+        return run
+
+    # scoring may reload the component score tables, which queries
+    defaults = await sync_to_async(_score_run)(category, purpose, requirements, items, weights, spec_fields)
+
+    with span("orm.save_run"):
+        run, _ = await ComparisonRun.objects.aget_or_create(run_id=run_id, defaults=defaults)
+    await cache.aset(_cache_key(run_id), run, settings.COMPARISON_RUN_CACHE_TIMEOUT)
+    return run
+
+
+def local_explanation_for(run):
+    """The run's local explanation; built from its stored ranking for runs saved before they had one."""
+    if run.local_explanation or not run.ranking:
+        return run.local_explanation
+    weights = scoring_weights(run.category_id, run.purpose)
+    return explain_ranking(run.purpose, run.ranked_items, run.top_group, weights=weights, category=run.category)
+
+
+def save_explanation(run, explanation):
+    """Persist a finished AI explanation on the run (and its cached copy)."""
+    run.explanation = explanation
+    ComparisonRun.objects.filter(pk=run.pk).update(explanation=explanation)
+    cache.set(_cache_key(run.run_id), run, settings.COMPARISON_RUN_CACHE_TIMEOUT)
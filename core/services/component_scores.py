@@ -0,0 +1,162 @@
+"""
+Component Score Index
+Keeps PROCESSOR_MATCHER / GPU_MATCHER in sync with the admin-managed
+ComponentScore table.
+
+- The table is read once per process (lazily, on first use) and compiled
+  into the in-memory matchers; scoring never queries the DB per item
+- post_save / post_delete signals mark the index stale in this process and
+  bump its version stamp (services.version_stamps), so every worker process
+  rebuilds it once on its next lookup (bulk deletes do not trigger one
+  rebuild per row)
+- Items store processor_score / gpu_score (see ItemFeatures); once a
+  transaction that changed rows commits, the stored scores of the items
+  naming them are recomputed, so the SQL filters on those columns stay
+  current
+"""
+
+import threading
+
+from django.db import DatabaseError, transaction
+from django.db.models import Q
+
+from .version_stamps import version_stamps
+
+VERSION_KEY = "component_scores"
+
+BATCH_SIZE = 2000
+
+# more changed names than this (per kind) recompute every item instead
+REFRESH_ALL_THRESHOLD = 100
+
+
+class ComponentScoreIndex:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._version = None
+        self._pending = threading.local()
+
+    def load(self):
+        # imported lazily: comparison_engine is imported while models load
+        from ..models import ComponentScore
+        from .comparison_engine import GPU_MAP, GPU_MATCHER, PROCESSOR_MAP, PROCESSOR_MATCHER
+
+        with self._lock:
+            version = version_stamps.get(VERSION_KEY)
+
+            processor_table = dict(PROCESSOR_MAP)
+            gpu_table = dict(GPU_MAP)
+            try:
+                rows = ComponentScore.objects.values_list("kind", "name", "score")
+                for kind, name, score in rows.iterator(chunk_size=5000):
+                    if kind == ComponentScore.KIND_PROCESSOR:
+                        processor_table[name] = score
+                    elif kind == ComponentScore.KIND_GPU:
+                        gpu_table[name] = score
+            except DatabaseError:
+                # table not migrated yet: keep serving the built-in maps
+                pass
+
+            PROCESSOR_MATCHER.replace(processor_table)
+            GPU_MATCHER.replace(gpu_table)
+
+            self._version = version
+            self._loaded = True
+
+    def ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    def refresh_if_stale(self):
+        """Reload if another process changed the table since our last load."""
+        if not self._loaded or version_stamps.get(VERSION_KEY) != self._version:
+            self.load()
+
+    def invalidate(self):
+        """Mark the table as changed for every process."""
+        version_stamps.bump(VERSION_KEY)
+        self._loaded = False
+
+    def changed(self, rows):
+        """
+        Record changed (kind, name) rows. When the current transaction
+        commits, the index is rebuilt for every process and the stored
+        scores of items naming the rows are recomputed.
+        """
+        pending = getattr(self._pending, "rows", None)
+        if pending is None:
+            pending = self._pending.rows = set()
+        pending.update(rows)
+        # one callback per call, so none is lost to a rolled-back transaction;
+        # the first to run applies every pending row, the rest find none
+        transaction.on_commit(self._apply_pending)
+
+    def _apply_pending(self):
+        pending = getattr(self._pending, "rows", None)
+        if not pending:
+            return
+        self._pending.rows = None
+
+        self.invalidate()
+        self.load()
+
+        names_by_kind = {}
+        for kind, name in pending:
+            names_by_kind.setdefault(kind, set()).add(name)
+        for kind, names in names_by_kind.items():
+            refresh_item_scores(kind, None if len(names) > REFRESH_ALL_THRESHOLD else names)
+
+
+component_index = ComponentScoreIndex()
+
+
+def refresh_item_scores(kind, names=None, batch_size=BATCH_SIZE):
+    """
+    Recompute the stored processor_score / gpu_score of items.
+
+    kind selects the column; names limits it to items whose component name
+    contains every word of one of names (None: every item). Only rows whose
+    score changed are written. Returns the number of rows updated.
+    """
+    from ..models import ComponentScore, UserItem
+    from .comparison_engine import get_gpu_score, get_processor_score
+
+    if kind == ComponentScore.KIND_PROCESSOR:
+        field, spec_name, score = "processor_score", "processor_name", get_processor_score
+    else:
+        field, spec_name, score = "gpu_score", "gpu_name", get_gpu_score
+
+    qs = UserItem.objects.order_by("pk").only("pk", "specifications", field)
+    if names is not None:
+        # a superset of the matcher's (normalized) matches, narrowed below
+        match = Q()
+        for name in names:
+            words = Q()
+            for word in name.split():
+                words &= Q(**{f"specifications__{spec_name}__icontains": word})
+            match |= words
+        qs = qs.filter(match)
+
+    updated = 0
+    last_pk = 0
+    while True:
+        batch = list(qs.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            break
+
+        changed = []
+        for item in batch:
+            value = score((item.specifications or {}).get(spec_name, ""))
+            if getattr(item, field) != value:
+                setattr(item, field, value)
+                changed.append(item)
+
+        if changed:
+            with transaction.atomic():
+                UserItem.objects.bulk_update(changed, [field])
+            updated += len(changed)
+        last_pk = batch[-1].pk
+
+    return updated
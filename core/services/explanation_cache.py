@@ -0,0 +1,97 @@
+"""
+Explanation Cache Service
+Content-addressed cache for AI explanations.
+
+- Keys are a hash of (category, purpose, requirements, best item's specs),
+  so identical comparisons reuse one explanation
+- Storage is any Django cache backend (settings.CACHES["ai_explanations"]):
+  local memory, file system, database table, Redis, ...
+- TTL and size bound come from the backend's TIMEOUT and MAX_ENTRIES
+  (the local-memory backend evicts least-recently-used entries)
+- Hit/miss counters live in the same backend, so all workers share them
+"""
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+
+CACHE_ALIAS = getattr(settings, "AI_EXPLANATION_CACHE_ALIAS", "ai_explanations")
+
+KEY_PREFIX = "comparex:ai_explanation"
+HITS_KEY = f"{KEY_PREFIX}:stats:hits"
+MISSES_KEY = f"{KEY_PREFIX}:stats:misses"
+
+
+def explanation_key(category, purpose, requirements, specifications):
+    """Stable hash of everything the explanation depends on."""
+    payload = json.dumps(
+        {
+            "category": category.name if hasattr(category, "name") else category,
+            "purpose": purpose,
+            "requirements": requirements or {},
+            "specifications": specifications or {},
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ExplanationCache:
+
+    def __init__(self, alias=CACHE_ALIAS):
+        self.alias = alias
+
+    @property
+    def backend(self):
+        # caches[...] is thread-local; look it up on every use
+        return caches[self.alias]
+
+    def _entry_key(self, key):
+        return f"{KEY_PREFIX}:{key}"
+
+    def _count(self, counter_key):
+        backend = self.backend
+        if not backend.add(counter_key, 1, timeout=None):
+            try:
+                backend.incr(counter_key)
+            except ValueError:
+                # evicted between add() and incr()
+                backend.set(counter_key, 1, timeout=None)
+
+    def peek(self, key):
+        """Return a cached explanation without touching the counters."""
+        return self.backend.get(self._entry_key(key))
+
+    def get(self, key):
+        explanation = self.peek(key)
+        self._count(MISSES_KEY if explanation is None else HITS_KEY)
+        return explanation
+
+    def set(self, key, explanation, timeout=None):
+        if timeout is None:
+            self.backend.set(self._entry_key(key), explanation)
+        else:
+            self.backend.set(self._entry_key(key), explanation, timeout)
+
+    def delete(self, key):
+        self.backend.delete(self._entry_key(key))
+
+    def stats(self):
+        counts = self.backend.get_many([HITS_KEY, MISSES_KEY])
+        hits = counts.get(HITS_KEY, 0)
+        misses = counts.get(MISSES_KEY, 0)
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def reset_stats(self):
+        self.backend.delete_many([HITS_KEY, MISSES_KEY])
+
+
+explanation_cache = ExplanationCache()
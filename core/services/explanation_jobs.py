@@ -0,0 +1,266 @@
+"""
+Explanation Job Service
+Runs AI explanations in a background thread pool so result pages never
+block on the LLM.
+
+- Job ids are the explanation cache key, so identical comparisons share one
+  job and a cached explanation is served without queueing anything
+- Successful explanations go to the explanation cache; when the LLM call
+  fails, the local explanation is kept briefly in Django's default cache
+  instead, so the page shows that rather than the error
+- The prompt of every submitted job is kept in the default cache; a worker
+  that does not have it (local-memory cache, expired entry) rebuilds it
+  from the ComparisonRun the job explains, so any worker process can
+  answer a poll or restart a job another worker started
+- stream_explanation() runs a job in the caller instead, yielding the text
+  as the LLM produces it (the result page reads it as server-sent events);
+  astream_explanation() does the same on the event loop under ASGI
+- A job has one owner per process, a background task or a stream,
+  registered in _jobs: other streams and polls of the same job wait for
+  its result instead of calling the LLM again
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from .ai_service import (
+    AIServiceError,
+    astream_ai_explanation,
+    build_explanation_prompt,
+    explanation_key_for,
+    fallback_explanation,
+    request_ai_explanation,
+    stream_ai_explanation,
+)
+from ..models import ComparisonRun
+from .comparison_runs import local_explanation_for
+from .explanation_cache import explanation_cache
+
+STATUS_PENDING = "pending"
+STATUS_DONE = "done"
+
+# events yielded by stream_explanation()
+EVENT_CHUNK = "chunk"
+EVENT_DONE = "done"
+
+CACHE_PREFIX = "comparex:ai_job"
+
+# Seconds a fallback explanation is shown before the job may be retried
+ERROR_TIMEOUT = 60
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, "AI_EXPLANATION_WORKERS", 4),
+    thread_name_prefix="ai-explanation",
+)
+_jobs = {}
+_lock = threading.Lock()
+
+
+def _prompt_key(job_id):
+    return f"{CACHE_PREFIX}:prompt:{job_id}"
+
+
+def _error_key(job_id):
+    return f"{CACHE_PREFIX}:error:{job_id}"
+
+
+def _job_from_run(job_id):
+    run = ComparisonRun.objects.select_related("category").filter(explanation_key=job_id).first()
+    if run is None or not run.ranking:
+        return None
+    best_item = run.best_item
+    prompt = build_explanation_prompt(best_item, run.purpose, run.requirements, run.category)
+    fallback = local_explanation_for(run) or fallback_explanation(best_item, run.purpose, run.requirements, run.category)
+    return prompt, fallback
+
+
+def _load_job(job_id):
+    """(prompt, fallback) of a job, or None if no run has this explanation key."""
+    job = cache.get(_prompt_key(job_id))
+    if job is None:
+        job = _job_from_run(job_id)
+        if job is not None:
+            cache.set(_prompt_key(job_id), job, settings.AI_EXPLANATION_TIMEOUT)
+    return job
+
+
+def _run(job_id, prompt, fallback):
+    try:
+        explanation = request_ai_explanation(prompt)
+    except AIServiceError:
+        cache.set(_error_key(job_id), fallback, ERROR_TIMEOUT)
+    else:
+        explanation_cache.set(job_id, explanation)
+    finally:
+        with _lock:
+            _jobs.pop(job_id, None)
+
+
+def _start(job_id, prompt, fallback):
+    with _lock:
+        if job_id in _jobs:
+            return
+        _jobs[job_id] = _executor.submit(_run, job_id, prompt, fallback)
+
+
+def submit_explanation(best_item, purpose, requirements, category, start=True, fallback=None):
+    """
+    Queue an explanation unless it is cached, and return its job id immediately.
+
+    With start=False the job is only registered, to be run by
+    stream_explanation() (or by the first poll of get_job_status()).
+    fallback is shown if the LLM fails; pass the run's local explanation.
+    """
+    job_id = explanation_key_for(best_item, purpose, requirements, category)
+
+    if explanation_cache.get(job_id) is None:
+        prompt = build_explanation_prompt(best_item, purpose, requirements, category)
+        fallback = fallback or fallback_explanation(best_item, purpose, requirements, category)
+        cache.set(_prompt_key(job_id), (prompt, fallback), settings.AI_EXPLANATION_TIMEOUT)
+        cache.delete(_error_key(job_id))
+        if start:
+            _start(job_id, prompt, fallback)
+
+    return job_id
+
+
+def get_job_status(job_id, start=True):
+    """
+    Return (status, explanation) for a job.
+
+    Unknown jobs return (None, None). A job that is not running here (it
+    was submitted by another worker, or registered without starting) is
+    started from its cached prompt unless start=False.
+    """
+    explanation = explanation_cache.peek(job_id)
+    if explanation is None:
+        explanation = cache.get(_error_key(job_id))
+    if explanation is not None:
+        return STATUS_DONE, explanation
+
+    with _lock:
+        running = job_id in _jobs
+    if running:
+        return STATUS_PENDING, None
+
+    job = _load_job(job_id)
+    if job is None:
+        return None, None
+
+    if start:
+        _start(job_id, *job)
+    return STATUS_PENDING, None
+
+
+def _claim(job_id):
+    """
+    Make the caller the owner of a job's LLM call.
+
+    Returns (owner, None) if a background job or another stream already
+    owns it, else (None, future): the caller now owns it and must
+    _release() the future once the result is stored.
+    """
+    with _lock:
+        owner = _jobs.get(job_id)
+        if owner is not None:
+            return owner, None
+        future = _jobs[job_id] = Future()
+        return None, future
+
+
+def _release(job_id, future):
+    with _lock:
+        if _jobs.get(job_id) is future:
+            del _jobs[job_id]
+    future.set_result(None)
+
+
+def _stream(job_id, prompt, fallback):
+    owner, future = _claim(job_id)
+    while owner is not None:
+        # someone else is calling the LLM for this job: wait for its result
+        wait([owner])
+        status, explanation = get_job_status(job_id, start=False)
+        if status == STATUS_DONE:
+            yield EVENT_DONE, explanation
+            return
+        # the owner stopped without a result (its client went away)
+        owner, future = _claim(job_id)
+
+    parts = []
+    try:
+        for chunk in stream_ai_explanation(prompt):
+            parts.append(chunk)
+            yield EVENT_CHUNK, chunk
+        explanation = "".join(parts)
+        explanation_cache.set(job_id, explanation)
+    except AIServiceError:
+        cache.set(_error_key(job_id), fallback, ERROR_TIMEOUT)
+        explanation = fallback
+    finally:
+        _release(job_id, future)
+    yield EVENT_DONE, explanation
+
+
+def stream_explanation(job_id):
+    """
+    Iterator of (event, text) for a job, or None if the job is unknown.
+
+    Yields (EVENT_CHUNK, text) as the LLM produces it, then one
+    (EVENT_DONE, full text). The final text replaces the chunks: it is the
+    local fallback if the LLM failed part way.
+    """
+    status, explanation = get_job_status(job_id, start=False)
+    if status == STATUS_DONE:
+        return iter([(EVENT_DONE, explanation)])
+
+    job = _load_job(job_id)
+    if job is None:
+        return None
+    return _stream(job_id, *job)
+
+
+async def _astream(job_id, prompt, fallback):
+    owner, future = _claim(job_id)
+    while owner is not None:
+        await asyncio.wrap_future(owner)
+        status, explanation = await sync_to_async(get_job_status)(job_id, start=False)
+        if status == STATUS_DONE:
+            yield EVENT_DONE, explanation
+            return
+        owner, future = _claim(job_id)
+
+    parts = []
+    try:
+        async for chunk in astream_ai_explanation(prompt):
+            parts.append(chunk)
+            yield EVENT_CHUNK, chunk
+        explanation = "".join(parts)
+        await sync_to_async(explanation_cache.set)(job_id, explanation)
+    except AIServiceError:
+        await cache.aset(_error_key(job_id), fallback, ERROR_TIMEOUT)
+        explanation = fallback
+    finally:
+        _release(job_id, future)
+    yield EVENT_DONE, explanation
+
+
+async def _adone(explanation):
+    yield EVENT_DONE, explanation
+
+
+async def astream_explanation(job_id):
+    """Async stream_explanation(): an async iterator of (event, text), or None."""
+    status, explanation = await sync_to_async(get_job_status)(job_id, start=False)
+    if status == STATUS_DONE:
+        return _adone(explanation)
+
+    job = await sync_to_async(_load_job)(job_id)
+    if job is None:
+        return None
+    return _astream(job_id, *job)
@@ -0,0 +1,406 @@
+"""
+Gemini Client
+Reusable HTTP client for the Gemini generateContent API.
+
+- One pooled requests.Session, so calls reuse keep-alive connections
+  instead of opening a new TCP+TLS connection each time
+- A semaphore bounds concurrent upstream calls per process
+- 429 / 5xx responses and connection errors are retried with jittered
+  exponential backoff (Retry-After is honoured, within the cap)
+- A circuit breaker opens after repeated failures and fails calls fast
+  until the upstream has had time to recover, so callers can fall back
+  to a cached or local explanation without waiting on timeouts
+- stream() reads streamGenerateContent as server-sent events and yields
+  text as it arrives
+- AsyncGeminiClient offers the same calls on asyncio (httpx), for async
+  views under ASGI; it shares the sync client's circuit breaker
+"""
+
+import asyncio
+import contextlib
+import json
+import random
+import re
+import threading
+import time
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import metrics
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class GeminiError(Exception):
+    """The upstream call failed (after any retries)."""
+
+
+class GeminiUnavailable(GeminiError):
+    """The call was not attempted: the circuit is open or the client is saturated."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    closed:    calls go through; `threshold` failures in a row open it
+    open:      calls are refused until `reset_timeout` seconds have passed
+    half-open: one trial call goes through; success closes the circuit,
+               failure opens it again
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return self.CLOSED
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self):
+        """Whether a call may go upstream now."""
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.threshold:
+                self._opened_at = self._clock()
+            self._trial_running = False
+
+
+class _BaseGeminiClient:
+    """Configuration, backoff and response parsing shared by both clients."""
+
+    def __init__(
+        self,
+        url,
+        api_key,
+        stream_url=None,
+        timeout=15.0,
+        max_retries=3,
+        backoff_base=0.5,
+        backoff_max=8.0,
+        max_concurrency=8,
+        breaker=None,
+    ):
+        self.url = url
+        self.stream_url = stream_url or re.sub(r"generateContent$", "streamGenerateContent", url)
+        self.api_key = api_key
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_concurrency = max_concurrency
+        self.breaker = breaker or CircuitBreaker()
+
+    def _headers(self):
+        return {
+            "Content-Type": "application/json",
+            # header rather than ?key= so the key never shows up in URLs or errors
+            "x-goog-api-key": self.api_key or "",
+        }
+
+    def _backoff(self, attempt, response=None):
+        """Full-jitter exponential delay, or the server's Retry-After if it sent one."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if response is not None:
+            try:
+                delay = max(delay, float(response.headers.get("Retry-After", 0)))
+            except ValueError:
+                pass
+        return min(delay, self.backoff_max)
+
+    def _check_breaker(self):
+        if not self.breaker.allow():
+            metrics.AI_SHORT_CIRCUITS.inc()
+            raise GeminiUnavailable("Gemini is unavailable (circuit open)")
+        metrics.AI_CALLS.inc()
+
+    def _failed(self):
+        metrics.AI_ERRORS.inc()
+        self.breaker.record_failure()
+
+    @staticmethod
+    def _payload(prompt_text, temperature, max_output_tokens):
+        return {
+            "contents": [{"role": "user", "parts": [{"text": prompt_text}]}],
+            "generationConfig": {"temperature": temperature, "maxOutputTokens": max_output_tokens},
+        }
+
+    @staticmethod
+    def _text(data):
+        return data["candidates"][0]["content"]["parts"][0]["text"]
+
+    @staticmethod
+    def _sse_texts(line):
+        """Text parts of one server-sent event line ("data: {...}")."""
+        if not line or not line.startswith("data:"):
+            return []
+        data = json.loads(line[len("data:"):])
+        return [part["text"] for part in data["candidates"][0]["content"].get("parts", []) if part.get("text")]
+
+
+class GeminiClient(_BaseGeminiClient):
+
+    def __init__(self, url, api_key, **options):
+        super().__init__(url, api_key, **options)
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(self._headers())
+
+    def close(self):
+        self.session.close()
+
+    # ---------------- CALLS ----------------
+
+    def _post(self, url, payload, **kwargs):
+        """One POST with retries; returns the (successful) response."""
+        attempt = 0
+        while True:
+            response = None
+            try:
+                response = self.session.post(url, json=payload, timeout=self.timeout, **kwargs)
+                if response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    return response
+                response.close()
+                error = GeminiError(f"Gemini returned HTTP {response.status_code}")
+            except requests.Timeout as e:
+                metrics.AI_TIMEOUTS.inc()
+                error = GeminiError(f"Gemini timed out: {e}")
+            except requests.ConnectionError as e:
+                error = GeminiError(f"Could not reach Gemini: {e}")
+            except requests.RequestException as e:
+                # other 4xx: retrying will not help
+                raise GeminiError(f"Gemini request failed: {e}") from e
+
+            if attempt >= self.max_retries:
+                raise error
+            metrics.AI_RETRIES.inc()
+            time.sleep(self._backoff(attempt, response))
+            attempt += 1
+
+    def _acquire(self):
+        """Take a concurrency slot and pass the circuit breaker, or raise GeminiUnavailable."""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise GeminiUnavailable("Too many concurrent Gemini requests")
+        try:
+            self._check_breaker()
+        except GeminiUnavailable:
+            self._slots.release()
+            raise
+
+    def generate(self, prompt_text, temperature=0.7, max_output_tokens=1000):
+        """Return the generated text for a prompt, raising GeminiError on failure."""
+        self._acquire()
+        try:
+            with metrics.span("ai.request"):
+                data = self._post(self.url, self._payload(prompt_text, temperature, max_output_tokens)).json()
+            text = self._text(data)
+        except GeminiError:
+            self._failed()
+            raise
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            self._failed()
+            raise GeminiError(f"Unexpected Gemini response: {e!r}") from e
+        finally:
+            self._slots.release()
+
+        self.breaker.record_success()
+        return text
+
+    def stream(self, prompt_text, temperature=0.7, max_output_tokens=1000):
+        """
+        Yield text chunks as Gemini generates them, raising GeminiError on failure.
+
+        Only the initial request is retried; once text has been yielded a
+        failure is raised to the caller, which already holds a partial answer.
+        """
+        self._acquire()
+        start = time.perf_counter()
+        first = True
+        try:
+            payload = self._payload(prompt_text, temperature, max_output_tokens)
+            with self._post(self.stream_url, payload, params={"alt": "sse"}, stream=True) as response:
+                for line in response.iter_lines(decode_unicode=True):
+                    for text in self._sse_texts(line):
+                        if first:
+                            metrics.STAGE_SECONDS.observe(time.perf_counter() - start, stage="ai.first_chunk")
+                            first = False
+                        yield text
+        except GeneratorExit:
+            # the consumer went away; the upstream itself was healthy
+            self.breaker.record_success()
+            raise
+        except GeminiError:
+            self._failed()
+            raise
+        except requests.RequestException as e:
+            self._failed()
+            raise GeminiError(f"Gemini stream failed: {e}") from e
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            self._failed()
+            raise GeminiError(f"Unexpected Gemini response: {e!r}") from e
+        finally:
+            self._slots.release()
+
+        metrics.STAGE_SECONDS.observe(time.perf_counter() - start, stage="ai.stream")
+        self.breaker.record_success()
+
+
+class AsyncGeminiClient(_BaseGeminiClient):
+    """asyncio counterpart of GeminiClient; create one per event loop."""
+
+    def __init__(self, url, api_key, **options):
+        super().__init__(url, api_key, **options)
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self.http = httpx.AsyncClient(
+            headers=self._headers(),
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=self.max_concurrency,
+                max_keepalive_connections=self.max_concurrency,
+            ),
+        )
+
+    async def aclose(self):
+        await self.http.aclose()
+
+    # ---------------- CALLS ----------------
+
+    @contextlib.asynccontextmanager
+    async def _post(self, url, payload, params=None):
+        """One POST with retries; yields the (successful) response, body not yet read."""
+        attempt = 0
+        while True:
+            response = None
+            try:
+                request = self.http.build_request("POST", url, json=payload, params=params)
+                response = await self.http.send(request, stream=True)
+            except httpx.TimeoutException as e:
+                metrics.AI_TIMEOUTS.inc()
+                error = GeminiError(f"Gemini timed out: {e}")
+            except httpx.TransportError as e:
+                error = GeminiError(f"Could not reach Gemini: {e}")
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    try:
+                        if response.is_error:
+                            # other 4xx: retrying will not help
+                            raise GeminiError(f"Gemini request failed: HTTP {response.status_code}")
+                        yield response
+                    finally:
+                        await response.aclose()
+                    return
+                await response.aclose()
+                error = GeminiError(f"Gemini returned HTTP {response.status_code}")
+
+            if attempt >= self.max_retries:
+                raise error
+            metrics.AI_RETRIES.inc()
+            await asyncio.sleep(self._backoff(attempt, response))
+            attempt += 1
+
+    async def _acquire(self):
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            raise GeminiUnavailable("Too many concurrent Gemini requests") from None
+        try:
+            self._check_breaker()
+        except GeminiUnavailable:
+            self._slots.release()
+            raise
+
+    async def generate(self, prompt_text, temperature=0.7, max_output_tokens=1000):
+        """Return the generated text for a prompt, raising GeminiError on failure."""
+        await self._acquire()
+        try:
+            with metrics.span("ai.request"):
+                async with self._post(self.url, self._payload(prompt_text, temperature, max_output_tokens)) as response:
+                    data = json.loads(await response.aread())
+            text = self._text(data)
+        except GeminiError:
+            self._failed()
+            raise
+        except httpx.HTTPError as e:
+            self._failed()
+            raise GeminiError(f"Gemini request failed: {e}") from e
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            self._failed()
+            raise GeminiError(f"Unexpected Gemini response: {e!r}") from e
+        finally:
+            self._slots.release()
+
+        self.breaker.record_success()
+        return text
+
+    async def stream(self, prompt_text, temperature=0.7, max_output_tokens=1000):
+        """Async iterator of text chunks; see GeminiClient.stream()."""
+        await self._acquire()
+        start = time.perf_counter()
+        first = True
+        try:
+            payload = self._payload(prompt_text, temperature, max_output_tokens)
+            async with self._post(self.stream_url, payload, params={"alt": "sse"}) as response:
+                async for line in response.aiter_lines():
+                    for text in self._sse_texts(line):
+                        if first:
+                            metrics.STAGE_SECONDS.observe(time.perf_counter() - start, stage="ai.first_chunk")
+                            first = False
+                        yield text
+        except (GeneratorExit, asyncio.CancelledError):
+            # the consumer went away (or the client disconnected)
+            self.breaker.record_success()
+            raise
+        except GeminiError:
+            self._failed()
+            raise
+        except httpx.HTTPError as e:
+            self._failed()
+            raise GeminiError(f"Gemini stream failed: {e}") from e
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            self._failed()
+            raise GeminiError(f"Unexpected Gemini response: {e!r}") from e
+        finally:
+            self._slots.release()
+
+        metrics.STAGE_SECONDS.observe(time.perf_counter() - start, stage="ai.stream")
+        self.breaker.record_success()
@@ -0,0 +1,237 @@
+"""
+Local Explanation Service
+Template-driven explanations of a ranking, built from the scores
+themselves instead of asking the LLM.
+
+- Every score is split into per-field contributions (weight x normalized
+  value, exactly as the comparison engine adds them up), so the text
+  names the fields that actually decided the ranking
+- explain_ranking() describes the winner, the fields it wins on and its
+  margin over the runner-up (or the tie group, if there is one);
+  tradeoff_text() describes how the items of a tie group differ
+- Deterministic and takes microseconds, so it is the default explanation
+  tier: the LLM is only asked when the user requests it
+"""
+
+FIELD_LABELS = {
+    "price": "price",
+    "ram": "RAM",
+    "ssd": "SSD",
+    "processor_score": "processor",
+    "gpu_score": "GPU",
+}
+
+# Spec shown for a field instead of its derived score
+DISPLAY_SPECS = {
+    "processor_score": "processor_name",
+    "gpu_score": "gpu_name",
+}
+
+# Fields named as reasons in one explanation
+MAX_REASONS = 2
+
+# Contribution differences below this are treated as equal
+EPSILON = 1e-6
+
+
+def field_label(field_name):
+    return FIELD_LABELS.get(field_name, field_name.replace("_", " "))
+
+
+def _resolve_weights(weights, purpose):
+    if weights is None:
+        from .comparison_engine import PURPOSE_WEIGHTS
+
+        weights = PURPOSE_WEIGHTS.get(purpose, {})
+    return weights
+
+
+def _price(item):
+    from .comparison_engine import _safe_float
+
+    price = getattr(item, "price", None)
+    if price is None:
+        price = _safe_float((item.specifications or {}).get("price"))
+    return price
+
+
+def price_bounds(items):
+    """(lowest, highest) price of the ranked items, which the price score is normalized over."""
+    prices = [_price(item) for item in items]
+    return (min(prices), max(prices)) if prices else (0.0, 0.0)
+
+
+def contributions(item, weights, bounds):
+    """({field: points the field added to the item's score}, {field: raw value})."""
+    from .comparison_engine import FEATURE_COLUMNS, ItemFeatures, _safe_float
+
+    features = ItemFeatures.for_item(item)
+    specs = item.specifications or {}
+    low, high = bounds
+    price_range = high - low if high > low else 1
+
+    points = {}
+    values = {}
+    for field_name, weight in weights.items():
+        if field_name in FEATURE_COLUMNS:
+            value = getattr(features, field_name)
+        else:
+            value = _safe_float(specs.get(field_name, 0))
+        values[field_name] = value
+
+        if field_name == "price":
+            points[field_name] = (high - value) / price_range * weight
+        else:
+            points[field_name] = value * weight
+    return points, values
+
+
+def _number(value):
+    if float(value).is_integer():
+        return f"{value:,.0f}"
+    return f"{value:,.2f}".rstrip("0").rstrip(".")
+
+
+def _display(item, field_name, value):
+    spec_name = DISPLAY_SPECS.get(field_name)
+    if spec_name:
+        text = (item.specifications or {}).get(spec_name)
+        if text:
+            return str(text)
+    return _number(value)
+
+
+def _join(parts):
+    if len(parts) <= 1:
+        return "".join(parts)
+    return ", ".join(parts[:-1]) + " and " + parts[-1]
+
+
+def _weights_sentence(weights, purpose):
+    total = sum(abs(weight) for weight in weights.values())
+    if not total:
+        return ""
+    shares = [
+        f"{field_label(field_name)} {abs(weight) / total:.0%}"
+        for field_name, weight in sorted(weights.items(), key=lambda pair: (-abs(pair[1]), pair[0]))
+    ]
+    target = f"For {purpose.replace('_', ' ')}" if purpose else "Here"
+    return f"{target}, the score weighs {_join(shares)}."
+
+
+def _reasons(winner, loser, weights, bounds):
+    """Fields where winner out-scores loser, largest gap first: [(field, winner value, loser value)]."""
+    win_points, win_values = contributions(winner, weights, bounds)
+    lose_points, lose_values = contributions(loser, weights, bounds)
+    gaps = sorted(
+        (
+            (win_points[field_name] - lose_points[field_name], field_name)
+            for field_name in weights
+            if win_points[field_name] - lose_points[field_name] > EPSILON
+        ),
+        key=lambda gap: (-gap[0], gap[1]),
+    )
+    return [
+        (
+            field_name,
+            _display(winner, field_name, win_values[field_name]),
+            _display(loser, field_name, lose_values[field_name]),
+        )
+        for _, field_name in gaps
+    ]
+
+
+def _reason_list(reasons):
+    return _join([f"{field_label(name)} ({ours} vs {theirs})" for name, ours, theirs in reasons[:MAX_REASONS]])
+
+
+def _tie_details(top_group, weights, bounds):
+    items = [item for item, _ in top_group]
+    rows = [(item, *contributions(item, weights, bounds)) for item in items]
+
+    # for each field, the one item clearly ahead of the rest of the group
+    leaders = []
+    for field_name in weights:
+        ranked = sorted(rows, key=lambda row: -row[1][field_name])
+        if ranked[0][1][field_name] - ranked[1][1][field_name] > EPSILON:
+            leader, _, values = ranked[0]
+            spread = ranked[0][1][field_name] - ranked[-1][1][field_name]
+            leaders.append((-spread, field_name, leader, values[field_name]))
+    leaders.sort(key=lambda entry: (entry[0], entry[1]))
+
+    if not leaders:
+        return "They are equal on every spec that counts here, so choose on design, portability or brand."
+
+    strengths = [
+        f"{leader.item_name} {'is best ' if idx == 0 else ''}on {field_label(field_name)} "
+        f"({_display(leader, field_name, value)})"
+        for idx, (_, field_name, leader, value) in enumerate(leaders[:3])
+    ]
+    return f"{_join(strengths)}. Pick the one whose strength matters most to you."
+
+
+def tradeoff_text(top_group, weights, bounds=None):
+    """How the items of a tie group differ on the weighted fields, or None without a tie."""
+    if len(top_group) < 2:
+        return None
+    if bounds is None:
+        bounds = price_bounds(item for item, _ in top_group)
+    return "These options score almost the same. " + _tie_details(top_group, weights, bounds)
+
+
+def explain_ranking(purpose, ranked_items, top_group, weights=None, bounds=None, category=None, total=None):
+    """
+    Explain why the ranking came out as it did.
+
+    ranked_items: at least the tie group plus the next item, in rank order
+    (more are fine); total: how many items were ranked, if not all of
+    them are passed.
+    """
+    if not ranked_items:
+        return ""
+
+    weights = _resolve_weights(weights, purpose)
+    if bounds is None:
+        bounds = price_bounds(item for item, _ in ranked_items)
+    total = len(ranked_items) if total is None else total
+    noun = f"{category.name.lower()} options" if category is not None else "options"
+    purpose_text = f" for {purpose.replace('_', ' ')}" if purpose else ""
+
+    best, best_score = ranked_items[0]
+    sentences = []
+
+    if total == 1:
+        sentences.append(
+            f"{best.item_name} is the only one of your {noun} that meets your requirements{purpose_text}, "
+            f"with a score of {best_score}."
+        )
+    elif len(top_group) > 1:
+        names = _join([item.item_name for item, _ in top_group])
+        scores = _join([str(score) for _, score in top_group])
+        sentences.append(f"{names} are practically tied{purpose_text}, scoring {scores}.")
+        sentences.append(_tie_details(top_group, weights, bounds))
+        if len(ranked_items) > len(top_group):
+            runner, runner_score = ranked_items[len(top_group)]
+            sentences.append(
+                f"The next best, {runner.item_name}, trails by {_number(best_score - runner_score)} points."
+            )
+    else:
+        runner, runner_score = ranked_items[1]
+        sentences.append(
+            f"{best.item_name} ranks first{purpose_text} among your {total} {noun}, "
+            f"scoring {best_score} to {runner.item_name}'s {runner_score}."
+        )
+        reasons = _reasons(best, runner, weights, bounds)
+        if reasons:
+            sentences.append(f"Its lead comes from {_reason_list(reasons)}.")
+        comebacks = _reasons(runner, best, weights, bounds)
+        if comebacks:
+            sentences.append(
+                f"{runner.item_name} is stronger on {_reason_list(comebacks)}, "
+                f"but {_number(best_score - runner_score)} points behind overall."
+            )
+
+    weights_sentence = _weights_sentence(weights, purpose)
+    if weights_sentence:
+        sentences.append(weights_sentence)
+    return " ".join(sentences)
@@ -0,0 +1,225 @@
+"""
+Metrics Service
+In-process counters, histograms and timing spans for the comparison
+pipeline, rendered in Prometheus text format at /metrics.
+
+- Disabled unless METRICS_ENABLED is set; span() then returns a shared
+  no-op context manager and counters return before touching any lock
+- Spans also accumulate into the current request's timings, which
+  MetricsMiddleware sends back as a Server-Timing header
+- Values are per process: scrape every worker, or run one worker
+"""
+
+import threading
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# seconds; covers template renders (ms) up to slow AI calls (tens of s)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_NOOP_SPAN = nullcontext()
+
+# {stage: seconds} for the request being handled, set by MetricsMiddleware
+_request_timings = ContextVar("comparex_request_timings", default=None)
+
+
+def enabled():
+    return settings.METRICS_ENABLED
+
+
+def _label_key(labelnames, labels):
+    return tuple(str(labels.get(name, "")) for name in labelnames)
+
+
+def _format_labels(labelnames, key, extra=()):
+    pairs = list(zip(labelnames, key)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+class Counter:
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        if not enabled():
+            return
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(_label_key(self.labelnames, labels), 0)
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        if not values and not self.labelnames:
+            # unlabeled counters are exported from zero
+            values = {(): 0}
+        for key, value in sorted(values.items()):
+            yield self.name, _format_labels(self.labelnames, key), value
+
+    def reset(self):
+        with self._lock:
+            self._values = {}
+
+
+class Histogram:
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._lock = threading.Lock()
+        self._values = {}  # key -> [bucket counts..., sum, count]
+
+    def observe(self, value, **labels):
+        if not enabled():
+            return
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * (len(self.buckets) + 2)
+            for idx, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[idx] += 1
+                    break
+            row[-2] += value
+            row[-1] += 1
+
+    def samples(self):
+        with self._lock:
+            values = {key: list(row) for key, row in self._values.items()}
+        for key, row in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, row):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, [("le", _format_value(bound))])
+                yield f"{self.name}_bucket", labels, cumulative
+            yield f"{self.name}_sum", _format_labels(self.labelnames, key), row[-2]
+            yield f"{self.name}_count", _format_labels(self.labelnames, key), row[-1]
+
+    def reset(self):
+        with self._lock:
+            self._values = {}
+
+
+class Registry:
+
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        """All metrics in Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        for metric in self._metrics.values():
+            metric.reset()
+
+
+registry = Registry()
+
+STAGE_SECONDS = registry.histogram(
+    "comparex_stage_seconds", "Time spent in each comparison pipeline stage.", ["stage"]
+)
+REQUEST_SECONDS = registry.histogram(
+    "comparex_request_seconds", "Request latency by view.", ["view", "method", "status"]
+)
+REQUEST_DB_QUERIES = registry.histogram(
+    "comparex_request_db_queries", "Database queries per request by view.", ["view"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 250, 1000),
+)
+AI_CALLS = registry.counter("comparex_ai_calls_total", "Gemini explanation requests sent.")
+AI_ERRORS = registry.counter("comparex_ai_errors_total", "Gemini explanation requests that failed.")
+AI_TIMEOUTS = registry.counter("comparex_ai_timeouts_total", "Gemini HTTP attempts that timed out.")
+AI_RETRIES = registry.counter("comparex_ai_retries_total", "Gemini HTTP attempts retried after 429/5xx or a network error.")
+AI_SHORT_CIRCUITS = registry.counter(
+    "comparex_ai_short_circuits_total", "Gemini explanation requests refused because the circuit was open."
+)
+
+
+# ----------------------------------------------------
+# SPANS
+# ----------------------------------------------------
+class _Span:
+
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        STAGE_SECONDS.observe(elapsed, stage=self.stage)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings[self.stage] = timings.get(self.stage, 0.0) + elapsed
+        return False
+
+
+def span(stage):
+    """Time a block as `stage`: `with span("engine.score"): ...`."""
+    if not enabled():
+        return _NOOP_SPAN
+    return _Span(stage)
+
+
+def start_request():
+    """Begin collecting span timings for the current request; returns a reset token."""
+    return _request_timings.set({})
+
+
+def finish_request(token):
+    """Stop collecting and return the request's {stage: seconds}."""
+    timings = _request_timings.get() or {}
+    _request_timings.reset(token)
+    return timings
@@ -0,0 +1,93 @@
+"""
+Retention Service
+Deletes comparison items once they are older than the retention period.
+
+- Only ephemeral items (entered on the compare page or posted to the API)
+  expire; catalog imports, items added in the admin and items stored
+  before retention existed are kept
+- Deletes in small primary-key batches, each its own short transaction,
+  so the table is never locked for long and concurrent comparisons keep
+  inserting while a large backlog is purged
+- Optionally appends every batch to a gzipped JSON Lines archive before
+  deleting it; the lines use the import_catalog format, so archived
+  items can be imported again
+"""
+
+import gzip
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import UserItem
+
+# Rows per DELETE / transaction
+BATCH_SIZE = 1000
+
+
+def retention_cutoff(days=None, now=None):
+    """Items created before this moment have expired."""
+    if days is None:
+        days = settings.USER_ITEM_RETENTION_DAYS
+    return (now or timezone.now()) - timedelta(days=days)
+
+
+def expired_items(cutoff):
+    return UserItem.objects.filter(ephemeral=True, created_at__lt=cutoff)
+
+
+def _archive_line(item):
+    return json.dumps({
+        "id": item.id,
+        "category": item.category.name,
+        "item_name": item.item_name,
+        "specifications": item.specifications,
+        "created_at": item.created_at.isoformat(),
+    }) + "\n"
+
+
+def purge_expired_items(cutoff, batch_size=BATCH_SIZE, archive=None, pause=0.0, on_batch=None):
+    """
+    Delete ephemeral items created before cutoff, batch by batch.
+
+    archive: path of a .jsonl.gz file the deleted rows are appended to
+    (written and flushed before each batch is deleted). pause: seconds to
+    sleep between batches, to leave room for other writers. on_batch(deleted)
+    is called with the running total after every batch.
+
+    Returns the number of deleted items.
+    """
+    # oldest first, so every batch is a range read of the created_at index
+    qs = expired_items(cutoff).order_by("created_at", "pk")
+    if archive is None:
+        qs = qs.only("pk")
+    else:
+        qs = qs.select_related("category")
+
+    archive_file = gzip.open(archive, "at", encoding="utf-8") if archive else None
+    deleted = 0
+    try:
+        while True:
+            batch = list(qs[:batch_size])
+            if not batch:
+                break
+
+            if archive_file is not None:
+                archive_file.writelines(_archive_line(item) for item in batch)
+                archive_file.flush()
+
+            with transaction.atomic():
+                count, _ = UserItem.objects.filter(pk__in=[item.pk for item in batch]).delete()
+            deleted += count
+
+            if on_batch is not None:
+                on_batch(deleted)
+            if pause:
+                time.sleep(pause)
+    finally:
+        if archive_file is not None:
+            archive_file.close()
+    return deleted
@@ -0,0 +1,143 @@
+"""
+Score Matcher
+Maps free-text component names (processor, GPU, ...) to scores.
+
+- All keys are compiled into one trie-shaped regex, so a lookup scans the
+  name once no matter how many keys the table has
+- The longest key found in the name wins (ties go to the leftmost match),
+  so "ryzen 3600" beats "ryzen 3" regardless of insertion order
+- Names and keys are normalized alike (case, punctuation, whitespace), so
+  "Ryzen-5  5600H" finds "ryzen 5"
+- Results are memoized per normalized name in an LRU cache
+- Tables can be extended or replaced at runtime; lookups always see a
+  complete, consistent table
+"""
+
+import re
+import threading
+from functools import lru_cache
+
+LOOKUP_CACHE_SIZE = 4096
+
+PUNCTUATION = re.compile(r"[^\w\s]+")
+
+
+def normalize_name(name):
+    """Lowercase, punctuation to spaces, collapse whitespace: '  RTX-3050 Ti ' -> 'rtx 3050 ti'."""
+    return " ".join(PUNCTUATION.sub(" ", str(name).lower()).split())
+
+
+def _trie_pattern(keys):
+    """
+    Build a regex matching any of keys, preferring the longest at a position.
+
+    The keys are arranged as a character trie; greedy optional groups make
+    the regex try the longest completion first.
+    """
+    trie = {}
+    for key in keys:
+        node = trie
+        for char in key:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def emit(node):
+        terminal = "" in node
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return "(?:" + body + ")?" if terminal else body
+
+    return emit(trie)
+
+
+class ScoreMatcher:
+
+    def __init__(self, table=None, default=0, missing=0, cache_size=LOOKUP_CACHE_SIZE):
+        """
+        table:   {name fragment: score}
+        default: score when the name matches no key
+        missing: score when the name is empty
+        """
+        self.default = default
+        self.missing = missing
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._lookup = lru_cache(maxsize=cache_size)(self._match)
+        self.replace(table or {})
+
+    # ---------------- TABLE MANAGEMENT ----------------
+
+    def _compile(self, table):
+        regex = None
+        if table:
+            regex = re.compile("(?=(" + _trie_pattern(table) + "))")
+        # publish table, regex and generation together so readers never see
+        # a mix; results cached for an older generation are never reused
+        self._generation += 1
+        self._state = (self._generation, table, regex)
+        self._lookup.cache_clear()
+
+    def replace(self, table):
+        """Swap in a new table."""
+        normalized = {normalize_name(key): score for key, score in table.items() if normalize_name(key)}
+        with self._lock:
+            self._compile(normalized)
+
+    def update(self, table):
+        """Add or overwrite entries."""
+        with self._lock:
+            merged = dict(self._state[1])
+            for key, score in table.items():
+                key = normalize_name(key)
+                if key:
+                    merged[key] = score
+            self._compile(merged)
+
+    def remove(self, keys):
+        with self._lock:
+            merged = dict(self._state[1])
+            for key in keys:
+                merged.pop(normalize_name(key), None)
+            self._compile(merged)
+
+    def table(self):
+        return dict(self._state[1])
+
+    def __len__(self):
+        return len(self._state[1])
+
+    # ---------------- LOOKUP ----------------
+
+    def _match(self, generation, name):
+        _, table, regex = self._state
+        if regex is None:
+            return self.default
+
+        best = None
+        for match in regex.finditer(name):
+            key = match.group(1)
+            if best is None or len(key) > len(best):
+                best = key
+        return self.default if best is None else table[best]
+
+    def match_key(self, name):
+        """Return the table key that a name resolves to, or None."""
+        if not name:
+            return None
+        _, table, regex = self._state
+        if regex is None:
+            return None
+        keys = [m.group(1) for m in regex.finditer(normalize_name(name))]
+        return max(keys, key=len) if keys else None
+
+    def score(self, name):
+        if not name:
+            return self.missing
+        return self._lookup(self._state[0], normalize_name(name))
+
+    __call__ = score
+
+    def cache_info(self):
+        return self._lookup.cache_info()
@@ -0,0 +1,76 @@
+"""
+Static Assets Service
+Third-party CSS/JS served from our own static files.
+
+- VENDOR_ASSETS pins every file the templates use (Bootstrap, Bootstrap
+  Icons with its fonts, Chart.js) to the release it is fetched from;
+  fetch_static_assets downloads them into static/vendor/
+- vendor_url() gives the static URL of a vendored file, which
+  CompressedManifestStaticFilesStorage turns into a hashed, pre-compressed,
+  immutable-cached file; a file that has not been fetched is an error,
+  except with DEBUG on, where the CDN copy is used and a warning logged;
+  each name is resolved once per process
+- `manage.py check --deploy` reports vendored files that are missing
+- deploy_version() names the current deploy (BUILD_VERSION, else the static
+  manifest's hash) for ETags of pages that link hashed static URLs
+"""
+
+import logging
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import ImproperlyConfigured
+from django.templatetags.static import static
+
+logger = logging.getLogger(__name__)
+
+VENDOR_DIR = "vendor"
+
+BOOTSTRAP_CDN = "https://cdn.jsdelivr.net/npm/bootstrap@5.3.8/dist"
+BOOTSTRAP_ICONS_CDN = "https://cdn.jsdelivr.net/npm/bootstrap-icons@1.13.1/font"
+CHART_JS_CDN = "https://cdn.jsdelivr.net/npm/chart.js@3.7.1/dist"
+
+# path under static/vendor/ -> pinned source URL
+VENDOR_ASSETS = {
+    "bootstrap/bootstrap.min.css": f"{BOOTSTRAP_CDN}/css/bootstrap.min.css",
+    "bootstrap/bootstrap.bundle.min.js": f"{BOOTSTRAP_CDN}/js/bootstrap.bundle.min.js",
+    "bootstrap-icons/bootstrap-icons.min.css": f"{BOOTSTRAP_ICONS_CDN}/bootstrap-icons.min.css",
+    # referenced by bootstrap-icons.min.css as fonts/...
+    "bootstrap-icons/fonts/bootstrap-icons.woff2": f"{BOOTSTRAP_ICONS_CDN}/fonts/bootstrap-icons.woff2",
+    "bootstrap-icons/fonts/bootstrap-icons.woff": f"{BOOTSTRAP_ICONS_CDN}/fonts/bootstrap-icons.woff",
+    "chart.js/chart.js": f"{CHART_JS_CDN}/chart.js",
+}
+
+# source maps are not vendored; collectstatic would fail on the dangling reference
+SOURCE_MAP_COMMENT = re.compile(rb"^\s*(?://[#@]|/\*[#@])\s*sourceMappingURL=.*$", re.MULTILINE)
+
+
+def strip_source_map(content):
+    return SOURCE_MAP_COMMENT.sub(b"", content)
+
+
+def missing_vendor_assets():
+    """Names in VENDOR_ASSETS that have not been fetched into static/vendor/."""
+    return [name for name in VENDOR_ASSETS if not finders.find(f"{VENDOR_DIR}/{name}")]
+
+
+# templates ask on every render; finders.find() walks STATICFILES_DIRS each time.
+# Errors are not cached, so a file fetched later is picked up by the next render.
+@lru_cache(maxsize=None)
+def vendor_url(name):
+    """URL of our static copy of VENDOR_ASSETS[name]."""
+    path = f"{VENDOR_DIR}/{name}"
+    if finders.find(path):
+        return static(path)
+    if not settings.DEBUG:
+        raise ImproperlyConfigured(f"Static file {path} is missing; run manage.py fetch_static_assets")
+    logger.warning("Static file %s is missing, linking the CDN; run manage.py fetch_static_assets", path)
+    return VENDOR_ASSETS[name]
+
+
+def deploy_version():
+    """BUILD_VERSION, or the hash of the static manifest (empty without one)."""
+    return settings.BUILD_VERSION or getattr(staticfiles_storage, "manifest_hash", "")
@@ -0,0 +1,62 @@
+"""
+Version Stamps
+Change counters for the per-process caches (component score index,
+category weight vectors, catalog reads and compiled forms).
+
+- Kept in the VersionStamp table, so every worker process sees the same
+  value whatever cache backend is configured, and a restart does not
+  reset it
+- bump() increments a stamp in the same transaction as the change that
+  triggered it
+- Reads are memoised per process: all stamps are read in one query at
+  most once every VERSION_STAMP_MAX_AGE seconds, and bump() makes the
+  process that changed something re-read straight away
+"""
+
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, transaction
+from django.db.models import F
+
+
+class VersionStamps:
+
+    def __init__(self):
+        self._values = {}
+        self._read_at = None
+
+    def _load(self):
+        from ..models import VersionStamp
+
+        try:
+            values = dict(VersionStamp.objects.values_list("name", "version"))
+        except DatabaseError:
+            # table not migrated yet: everything is at version 0
+            values = {}
+        self._values = values
+        self._read_at = time.monotonic()
+
+    def get(self, name):
+        """Current version of a stamp (0 until it is first bumped)."""
+        read_at = self._read_at
+        if read_at is None or time.monotonic() - read_at >= settings.VERSION_STAMP_MAX_AGE:
+            self._load()
+        return self._values.get(name, 0)
+
+    def bump(self, name):
+        """Mark the data behind a stamp as changed, for every process."""
+        from ..models import VersionStamp
+
+        stamps = VersionStamp.objects.filter(name=name)
+        if not stamps.update(version=F("version") + 1):
+            try:
+                with transaction.atomic():
+                    VersionStamp.objects.create(name=name, version=1)
+            except IntegrityError:
+                # created concurrently
+                stamps.update(version=F("version") + 1)
+        self._read_at = None
+
+
+version_stamps = VersionStamps()
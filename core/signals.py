@@ -0,0 +1,45 @@
+from django.core.signals import setting_changed
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Category, ComponentScore, SpecificationField
+from .services.catalog_cache import invalidate_catalog
+from .services.category_weights import category_weights
+from .services.component_scores import component_index
+from .services.static_assets import vendor_url
+
+
+@receiver(pre_save, sender=ComponentScore)
+def component_score_renamed(sender, instance, **kwargs):
+    # items matching the old name need rescoring too
+    if instance.pk is None:
+        return
+    previous = ComponentScore.objects.filter(pk=instance.pk).values_list("kind", "name").first()
+    if previous and previous != (instance.kind, instance.name):
+        component_index.changed([previous])
+
+
+@receiver(post_save, sender=ComponentScore)
+@receiver(post_delete, sender=ComponentScore)
+def component_score_changed(sender, instance, **kwargs):
+    component_index.changed([(instance.kind, instance.name)])
+
+
+@receiver(post_save, sender=SpecificationField)
+@receiver(post_delete, sender=SpecificationField)
+def specification_field_changed(sender, **kwargs):
+    category_weights.invalidate()
+    invalidate_catalog()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, **kwargs):
+    invalidate_catalog()
+
+
+@receiver(setting_changed)
+def static_settings_changed(setting, **kwargs):
+    # vendored URLs are resolved once per process (see services.static_assets)
+    if setting in {"DEBUG", "STATIC_URL", "STATICFILES_DIRS", "STORAGES"}:
+        vendor_url.cache_clear()
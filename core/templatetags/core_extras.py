@@ -1,8 +1,21 @@
 from django import template
 
+from ..services.static_assets import vendor_url
+
 register = template.Library()
 
 
+@register.simple_tag
+def vendor_static(name):
+    """
+    URL of a vendored third-party file (see services.static_assets).
+
+    Usage:
+      <link href="{% vendor_static "bootstrap/bootstrap.min.css" %}" rel="stylesheet">
+    """
+    return vendor_url(name)
+
+
 @register.filter
 def get_item(mapping, key):
     """
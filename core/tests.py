@@ -0,0 +1,1323 @@
+import asyncio
+import contextlib
+import copy
+import functools
+import gzip
+import io
+import json
+import os
+import random
+import tempfile
+import threading
+import uuid
+from datetime import datetime, timedelta
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.conf import settings as django_settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.cache.utils import make_template_fragment_key
+from django.core.management import call_command
+from django.db import DatabaseError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from .forms import form_registry
+from .management.commands.fake_gemini import make_server
+from .models import CatalogImport, Category, ComparisonRun, ComponentScore, SpecificationField, UserItem
+from .services import ai_service, comparison_engine, explanation_jobs, gemini_client
+from .services.catalog_cache import catalog_version
+from .services.catalog_import import CatalogImportError, detect_format, run_import, start_import
+from .services.comparison_api import arun_comparison, run_comparison
+from .services.comparison_context import ComparisonContext, decode_context, encode_context
+from .services.comparison_engine import (
+    GPU_MAP,
+    PROCESSOR_MAP,
+    PURPOSE_WEIGHTS,
+    _safe_float,
+    analyze_products,
+    analyze_products_vectorized,
+    get_gpu_score,
+    get_processor_score,
+    rank_products,
+)
+from .services.comparison_runs import get_or_create_run, run_key, save_explanation
+from .services.component_scores import component_index
+from .services.explanation_cache import explanation_cache
+from .services.gemini_client import (
+    AsyncGeminiClient,
+    CircuitBreaker,
+    GeminiClient,
+    GeminiError,
+    GeminiUnavailable,
+)
+from .services.retention import expired_items, purge_expired_items, retention_cutoff
+from .services.score_matcher import ScoreMatcher, normalize_name
+from .services.static_assets import VENDOR_ASSETS, vendor_url
+from .services.version_stamps import VersionStamps, version_stamps
+
+
+def reference_analyze(purpose, requirements, items):
+    """
+    The per-item loop analyze_products ran before the columnar path:
+    features parsed from the specs of every item, one item at a time.
+    Returns the ranked (item, score) pairs.
+    """
+    filtered_items = []
+    for item in items:
+        specs = item.specifications or {}
+
+        price = _safe_float(specs.get("price"))
+        ram = _safe_float(specs.get("ram"))
+        ssd = _safe_float(specs.get("ssd"))
+
+        if requirements.get("max_budget") and price > requirements["max_budget"]:
+            continue
+        if requirements.get("min_budget") and price < requirements["min_budget"]:
+            continue
+        if requirements.get("min_ram") and ram < requirements["min_ram"]:
+            continue
+        if requirements.get("min_ssd") and ssd < requirements["min_ssd"]:
+            continue
+        if requirements.get("optional_gpu_required"):
+            if not get_gpu_score(specs.get("gpu_name", "")) > 3:
+                continue
+
+        filtered_items.append(item)
+
+    if not filtered_items:
+        return []
+
+    purpose_weights = PURPOSE_WEIGHTS.get(purpose, {})
+    prices = [_safe_float((i.specifications or {}).get("price", 0)) for i in filtered_items]
+    max_price = max(prices)
+    min_price = min(prices)
+    price_range = max_price - min_price if max_price > min_price else 1
+
+    scored = []
+    for item in filtered_items:
+        specs = dict(item.specifications or {})
+        specs["processor_score"] = get_processor_score(specs.get("processor_name", ""))
+        specs["gpu_score"] = get_gpu_score(specs.get("gpu_name", ""))
+
+        score = 0
+        for field_name, weight in purpose_weights.items():
+            value = _safe_float(specs.get(field_name, 0))
+            if field_name == "price":
+                score += ((max_price - value) / price_range) * weight
+            else:
+                score += value * weight
+
+        scored.append((item, round(score, 2)))
+
+    return sorted(scored, key=lambda x: x[1], reverse=True)
+
+
+# values are drawn from small pools so equal scores (ties) are common
+PRICES = [30000, 45000, 45000.0, "45000", 60000, 89999.5, "", "n/a", None]
+SIZES = [4, 8, 8, "16", 16.0, 32, 256, 512, "", "lots", None]
+BATTERY = [5, 8, 8.5, "10", "", None]
+PROCESSORS = list(PROCESSOR_MAP) + ["Intel Core i7-12700H", "Apple M2", "", None]
+GPUS = list(GPU_MAP) + ["NVIDIA RTX 3050 Ti", "Radeon 680M", "", None]
+PURPOSES = list(PURPOSE_WEIGHTS) + ["unknown"]
+
+
+def random_specs(rng):
+    specs = {}
+    for field, pool in (
+        ("price", PRICES),
+        ("ram", SIZES),
+        ("ssd", SIZES),
+        ("battery", BATTERY),
+        ("processor_name", PROCESSORS),
+        ("gpu_name", GPUS),
+    ):
+        # some items leave a field out entirely
+        if rng.random() < 0.9:
+            specs[field] = rng.choice(pool)
+    return specs
+
+
+def random_requirements(rng):
+    requirements = {}
+    if rng.random() < 0.3:
+        requirements["max_budget"] = rng.choice([40000, 50000, 70000])
+    if rng.random() < 0.2:
+        requirements["min_budget"] = rng.choice([20000, 40000])
+    if rng.random() < 0.3:
+        requirements["min_ram"] = rng.choice([8, 16])
+    if rng.random() < 0.3:
+        requirements["min_ssd"] = rng.choice([256, 512])
+    if rng.random() < 0.3:
+        requirements["optional_gpu_required"] = True
+    return requirements
+
+
+def make_items(rng, count, stored_features):
+    items = []
+    for i in range(count):
+        item = UserItem(item_name=f"Item {i}", specifications=random_specs(rng))
+        if stored_features:
+            item.compute_features()
+        items.append(item)
+    return items
+
+
+def as_names(ranked_items):
+    return [(item.item_name, score) for item, score in ranked_items]
+
+
+class AnalyzeProductsParityTests(TestCase):
+    """The per-item loop and the columnar path must rank identically."""
+
+    CASES = 300
+
+    def check(self, rng, count, stored_features):
+        purpose = rng.choice(PURPOSES)
+        requirements = random_requirements(rng)
+        items = make_items(rng, count, stored_features)
+        expected = as_names(reference_analyze(purpose, requirements, copy.deepcopy(items)))
+
+        with mock.patch.object(comparison_engine, "VECTORIZE_THRESHOLD", count + 1):
+            loop = analyze_products(purpose, requirements, copy.deepcopy(items))
+        columnar = analyze_products_vectorized(purpose, requirements, copy.deepcopy(items))
+
+        context = f"purpose={purpose!r} requirements={requirements!r}"
+        self.assertEqual(as_names(loop[0]), expected, context)
+        self.assertEqual(as_names(columnar[0]), expected, context)
+
+        if expected:
+            self.assertEqual(loop[1].item_name, expected[0][0], context)
+            self.assertEqual(columnar[1].item_name, expected[0][0], context)
+            self.assertEqual(as_names(loop[2]), as_names(columnar[2]), context)
+            self.assertEqual(loop[3], columnar[3], context)
+        else:
+            self.assertEqual(loop, ([], None, [], None))
+            self.assertEqual(columnar, ([], None, [], None))
+
+    def test_features_from_specs(self):
+        rng = random.Random(1)
+        for _ in range(self.CASES):
+            self.check(rng, rng.randint(1, 40), stored_features=False)
+
+    def test_stored_features(self):
+        rng = random.Random(2)
+        for _ in range(self.CASES):
+            self.check(rng, rng.randint(1, 40), stored_features=True)
+
+    def test_large_candidate_sets(self):
+        # above VECTORIZE_THRESHOLD analyze_products itself takes the columnar path
+        rng = random.Random(3)
+        for _ in range(20):
+            self.check(rng, rng.randint(64, 300), stored_features=rng.random() < 0.5)
+
+    def test_ties_keep_input_order(self):
+        items = [
+            UserItem(item_name=name, specifications={"price": 50000, "ram": 16, "ssd": 512})
+            for name in ("B", "A", "C")
+        ]
+        ranked, best, top_group, _ = analyze_products_vectorized("coding", {}, items)
+        self.assertEqual([item.item_name for item, _ in ranked], ["B", "A", "C"])
+        self.assertEqual(best.item_name, "B")
+        self.assertEqual(len(top_group), 3)
+
+
+class RankingSummaryTests(TestCase):
+
+    def setUp(self):
+        self.items = [
+            UserItem(item_name=f"Item {i}", specifications={"price": 40000 + i, "ram": 8 * i, "ssd": 512})
+            for i in range(1, 6)
+        ]
+
+    def test_top_k_limits_ranked_items_only(self):
+        ranked, best, top_group, _ = rank_products("coding", {}, self.items).summary(top_k=2)
+        self.assertEqual([item.item_name for item, _ in ranked], ["Item 5", "Item 4"])
+        self.assertEqual(best.item_name, "Item 5")
+        self.assertEqual(len(top_group), 1)
+
+    def test_top_k_zero(self):
+        ranked, best, top_group, _ = rank_products("coding", {}, self.items).summary(top_k=0)
+        self.assertEqual(ranked, [])
+        self.assertEqual(best.item_name, "Item 5")
+        self.assertEqual([item.item_name for item, _ in top_group], ["Item 5"])
+
+    def test_negative_top_k(self):
+        ranking = rank_products("coding", {}, self.items)
+        self.assertEqual(ranking.top(-1), [])
+        self.assertEqual(ranking.summary(top_k=-1)[1].item_name, "Item 5")
+
+    def test_empty_ranking(self):
+        self.assertEqual(rank_products("coding", {}, []).summary(top_k=0), ([], None, [], None))
+
+
+@override_settings(VERSION_STAMP_MAX_AGE=0)
+class VersionStampTests(TestCase):
+    """Stamps live in the database, so a change in one process is seen by all."""
+
+    def test_bump_is_seen_by_other_processes(self):
+        worker_a, worker_b = VersionStamps(), VersionStamps()
+        self.assertEqual(worker_b.get("catalog"), 0)
+        worker_a.bump("catalog")
+        worker_a.bump("catalog")
+        self.assertEqual(worker_b.get("catalog"), 2)
+        self.assertEqual(VersionStamps().get("catalog"), 2)
+
+    def test_reads_are_memoised(self):
+        worker_a, worker_b = VersionStamps(), VersionStamps()
+        worker_b.get("catalog")
+        with override_settings(VERSION_STAMP_MAX_AGE=60):
+            worker_a.bump("catalog")
+            self.assertEqual(worker_b.get("catalog"), 0)
+            self.assertEqual(worker_a.get("catalog"), 1)
+
+    def test_catalog_changes_bump_the_catalog_version(self):
+        before = catalog_version()
+        category = Category.objects.create(name="Tablet")
+        SpecificationField.objects.create(category=category, name="price")
+        self.assertEqual(catalog_version(), before + 2)
+
+    def test_component_score_change_reaches_other_processes(self):
+        component_index.load()
+        loaded_version = version_stamps.get("component_scores")
+        self.assertEqual(get_gpu_score("arc a770"), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ComponentScore.objects.create(kind=ComponentScore.KIND_GPU, name="arc a770", score=8)
+
+        # a worker that loaded the index before the change never saw the signal
+        component_index._loaded = True
+        component_index._version = loaded_version
+        component_index.refresh_if_stale()
+        self.assertEqual(get_gpu_score("arc a770"), 8)
+
+        component_index.invalidate()
+
+
+class ComponentScoreItemRefreshTests(TestCase):
+    """Stored processor_score / gpu_score follow ComponentScore changes."""
+
+    def setUp(self):
+        self.category = Category.objects.create(name="Laptop")
+        self.arc = UserItem.objects.create(
+            category=self.category, item_name="Arc", specifications={"gpu_name": "Intel  ARC A770 16GB"},
+        )
+        self.rtx = UserItem.objects.create(
+            category=self.category, item_name="RTX", specifications={"gpu_name": "RTX 3050"},
+        )
+
+    def tearDown(self):
+        component_index.invalidate()
+
+    def gpu_required(self):
+        items = UserItem.objects.filter(category=self.category).matching({"optional_gpu_required": True})
+        return sorted(items.values_list("item_name", flat=True))
+
+    def test_save_rescores_matching_items(self):
+        self.assertEqual(self.gpu_required(), ["RTX"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ComponentScore.objects.create(kind=ComponentScore.KIND_GPU, name="arc a770", score=8)
+
+        self.arc.refresh_from_db()
+        self.assertEqual(self.arc.gpu_score, 8)
+        self.assertEqual(self.gpu_required(), ["Arc", "RTX"])
+
+    def test_rename_and_delete_rescore_items(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            score = ComponentScore.objects.create(kind=ComponentScore.KIND_GPU, name="arc a770", score=8)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            score.name = "arc a750"
+            score.save()
+        self.arc.refresh_from_db()
+        self.assertEqual(self.arc.gpu_score, 2)  # back to the built-in "intel" entry
+
+        with self.captureOnCommitCallbacks(execute=True):
+            score.name = "arc a770"
+            score.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            score.delete()
+        self.arc.refresh_from_db()
+        self.assertEqual(self.arc.gpu_score, 2)
+
+    def test_rolled_back_changes_are_not_lost(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    ComponentScore.objects.create(kind=ComponentScore.KIND_GPU, name="rtx 3050", score=1)
+                    raise DatabaseError
+            except DatabaseError:
+                pass
+            ComponentScore.objects.create(kind=ComponentScore.KIND_GPU, name="arc a770", score=8)
+
+        self.arc.refresh_from_db()
+        self.rtx.refresh_from_db()
+        self.assertEqual((self.arc.gpu_score, self.rtx.gpu_score), (8, 8))
+
+    def test_import_rescores_items(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as f:
+            f.write("name,score\narc a770,8\nrtx 3050,1\n")
+        self.addCleanup(os.unlink, f.name)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("import_component_scores", f.name, kind="gpu", stdout=io.StringIO())
+
+        self.assertEqual(self.gpu_required(), ["Arc"])
+
+    def test_replace_import_refreshes_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ComponentScore.objects.bulk_create(
+                [ComponentScore(kind=ComponentScore.KIND_GPU, name=f"old gpu {i}", score=5) for i in range(20)]
+                + [ComponentScore(kind=ComponentScore.KIND_PROCESSOR, name="m2", score=9)]
+            )
+            ComponentScore.objects.create(kind=ComponentScore.KIND_GPU, name="arc a770", score=8)
+        self.arc.refresh_from_db()
+        self.assertEqual(self.arc.gpu_score, 8)
+
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as f:
+            f.write("name,score\nrtx 3050,1\n")
+        self.addCleanup(os.unlink, f.name)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            call_command("import_component_scores", f.name, kind="gpu", replace=True, stdout=io.StringIO())
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+
+        gpu_names = ComponentScore.objects.filter(kind=ComponentScore.KIND_GPU).values_list("name", flat=True)
+        self.assertEqual(list(gpu_names), ["rtx 3050"])
+        self.assertTrue(ComponentScore.objects.filter(kind=ComponentScore.KIND_PROCESSOR, name="m2").exists())
+        # the deleted "arc a770" row no longer scores the Arc item
+        self.arc.refresh_from_db()
+        self.assertEqual(self.arc.gpu_score, 2)
+        self.assertEqual(self.gpu_required(), [])
+
+
+class ScoreMatcherTests(SimpleTestCase):
+
+    def test_longest_key_wins(self):
+        for table in ({"ryzen 3": 4, "ryzen 3600": 8}, {"ryzen 3600": 8, "ryzen 3": 4}):
+            with self.subTest(order=list(table)):
+                matcher = ScoreMatcher(table)
+                self.assertEqual(matcher.score("AMD Ryzen 3600"), 8)
+                self.assertEqual(matcher.match_key("AMD Ryzen 3600"), "ryzen 3600")
+                self.assertEqual(matcher.score("AMD Ryzen 3 3200G"), 4)
+
+    def test_equal_lengths_go_to_the_leftmost_key(self):
+        matcher = ScoreMatcher({"i5": 7, "i7": 9})
+        self.assertEqual(matcher.score("i7 or i5"), 9)
+
+    def test_names_and_keys_are_normalized_alike(self):
+        self.assertEqual(normalize_name("  Intel  CORE\ti5-12400H "), "intel core i5 12400h")
+        self.assertEqual(normalize_name("RTX_3050"), "rtx_3050")
+
+        matcher = ScoreMatcher({"Ryzen-5": 7, "  RTX   3050 ": 8})
+        self.assertEqual(matcher.table(), {"ryzen 5": 7, "rtx 3050": 8})
+        self.assertEqual(matcher.score("AMD RYZEN 5 5600H"), 7)
+        self.assertEqual(matcher.score("ryzen\n5, 7530U"), 7)
+        self.assertEqual(matcher.score("NVIDIA GeForce RTX-3050 (4GB)"), 8)
+
+    def test_default_and_missing(self):
+        matcher = ScoreMatcher({"i5": 7}, default=5, missing=0)
+        self.assertEqual(matcher.score("Apple M2"), 5)
+        self.assertEqual(matcher.score(""), 0)
+        self.assertEqual(matcher.score(None), 0)
+        self.assertEqual(ScoreMatcher(default=3).score("anything"), 3)
+
+    def test_update_and_remove_rebuild_the_regex(self):
+        matcher = ScoreMatcher({"ryzen 5": 7}, default=5)
+        self.assertEqual(matcher.score("Ryzen 5 7600X"), 7)  # cached from here on
+
+        matcher.update({"Ryzen 5 7600X": 9})
+        self.assertEqual(matcher.score("Ryzen 5 7600X"), 9)
+        self.assertEqual(matcher.score("Ryzen 5 5600"), 7)
+
+        matcher.remove(["RYZEN 5 7600x"])
+        self.assertEqual(matcher.score("Ryzen 5 7600X"), 7)
+
+        matcher.remove(["ryzen 5"])
+        self.assertEqual(len(matcher), 0)
+        self.assertEqual(matcher.score("Ryzen 5 7600X"), 5)
+
+        matcher.replace({"i9": 10})
+        self.assertEqual(matcher.table(), {"i9": 10})
+        self.assertEqual(matcher.score("Core i9-13900HX"), 10)
+
+
+class ItemFormTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name="Laptop")
+        SpecificationField.objects.create(category=category, name="price")
+        spec_fields = list(category.spec_fields.all())
+        self.ItemForm = form_registry.item_formset(category, spec_fields).form
+
+    def test_forms_do_not_share_compiled_fields(self):
+        first, second = self.ItemForm(), self.ItemForm()
+        self.assertIsNot(first.fields["price"], second.fields["price"])
+
+        first.fields["price"].widget.attrs["class"] = "form-control is-invalid"
+        first.fields["price"].required = False
+        self.assertEqual(second.fields["price"].widget.attrs["class"], "form-control")
+        self.assertTrue(second.fields["price"].required)
+        self.assertTrue(self.ItemForm.compiled_fields["price"].required)
+
+
+PLAIN_STATIC_STORAGE = {"staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"}}
+
+
+def fake_vendor_assets(test):
+    """Point STATICFILES_DIRS at a temporary directory holding empty vendor files."""
+    static_dir = tempfile.TemporaryDirectory()
+    test.addCleanup(static_dir.cleanup)
+    for name in VENDOR_ASSETS:
+        path = os.path.join(static_dir.name, "vendor", *name.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, "w").close()
+    settings = override_settings(STATICFILES_DIRS=[static_dir.name, os.path.join(django_settings.BASE_DIR, "static")])
+    settings.enable()
+    test.addCleanup(settings.disable)
+
+
+@override_settings(STORAGES=PLAIN_STATIC_STORAGE)
+class VendorUrlTests(TestCase):
+    NAME = "chart.js/chart.js"
+
+    def setUp(self):
+        self.static_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.static_dir.cleanup)
+        settings = override_settings(STATICFILES_DIRS=[self.static_dir.name])
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_fetched_file_is_served_locally(self):
+        path = os.path.join(self.static_dir.name, "vendor", *self.NAME.split("/"))
+        os.makedirs(os.path.dirname(path))
+        open(path, "w").close()
+        self.assertEqual(vendor_url(self.NAME), f"/static/vendor/{self.NAME}")
+
+    def test_missing_file_is_an_error(self):
+        with self.assertRaises(ImproperlyConfigured):
+            vendor_url(self.NAME)
+
+    @override_settings(DEBUG=True)
+    def test_missing_file_uses_the_cdn_in_debug(self):
+        with self.assertLogs("core.services.static_assets", "WARNING"):
+            self.assertEqual(vendor_url(self.NAME), VENDOR_ASSETS[self.NAME])
+
+    def test_url_is_resolved_once(self):
+        path = os.path.join(self.static_dir.name, "vendor", *self.NAME.split("/"))
+        os.makedirs(os.path.dirname(path))
+        open(path, "w").close()
+        with mock.patch("core.services.static_assets.finders.find", return_value=path) as find:
+            vendor_url(self.NAME)
+            vendor_url(self.NAME)
+        find.assert_called_once()
+
+
+class ExplanationStreamOwnershipTests(SimpleTestCase):
+    """One LLM call per job, however many streams and polls ask for it."""
+
+    def setUp(self):
+        self.job_id = uuid.uuid4().hex
+        cache.set(explanation_jobs._prompt_key(self.job_id), ("prompt", "fallback"))
+        self.calls = 0
+        self.release = threading.Event()
+
+    def fake_stream(self, prompt):
+        self.calls += 1
+        yield "Hello "
+        self.release.wait(5)
+        yield "world"
+
+    async def fake_astream(self, prompt):
+        self.calls += 1
+        yield "Hello "
+        await asyncio.to_thread(self.release.wait, 5)
+        yield "world"
+
+    def wait_for_owner(self):
+        for _ in range(500):
+            if self.job_id in explanation_jobs._jobs:
+                return
+            threading.Event().wait(0.01)
+        self.fail("the stream never registered itself")
+
+    def consume(self, results, name):
+        results[name] = list(explanation_jobs.stream_explanation(self.job_id))
+
+    def test_streams_and_polls_share_one_call(self):
+        results = {}
+        with mock.patch.object(explanation_jobs, "stream_ai_explanation", self.fake_stream), \
+                mock.patch.object(explanation_jobs, "request_ai_explanation") as request:
+            first = threading.Thread(target=self.consume, args=(results, "first"))
+            first.start()
+            self.wait_for_owner()
+
+            second = threading.Thread(target=self.consume, args=(results, "second"))
+            second.start()
+            self.assertEqual(explanation_jobs.get_job_status(self.job_id), (explanation_jobs.STATUS_PENDING, None))
+
+            self.release.set()
+            first.join(5)
+            second.join(5)
+
+        self.assertEqual(self.calls, 1)
+        request.assert_not_called()
+        self.assertEqual(results["first"][-1], ("done", "Hello world"))
+        self.assertEqual(results["second"], [("done", "Hello world")])
+        self.assertNotIn(self.job_id, explanation_jobs._jobs)
+
+    def test_waiting_stream_takes_over_from_a_closed_one(self):
+        results = {}
+        with mock.patch.object(explanation_jobs, "stream_ai_explanation", self.fake_stream):
+            first = explanation_jobs.stream_explanation(self.job_id)
+            self.assertEqual(next(first), ("chunk", "Hello "))
+
+            second = threading.Thread(target=self.consume, args=(results, "second"))
+            second.start()
+            first.close()  # the first client went away
+            self.release.set()
+            second.join(5)
+
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(results["second"][-1], ("done", "Hello world"))
+
+    def test_async_streams_share_one_call(self):
+        async def consume():
+            return [event async for event in await explanation_jobs.astream_explanation(self.job_id)]
+
+        async def main():
+            first = asyncio.ensure_future(consume())
+            for _ in range(500):
+                if self.job_id in explanation_jobs._jobs:
+                    break
+                await asyncio.sleep(0.01)
+            else:
+                self.release.set()
+                await first
+                self.fail("the stream never registered itself")
+            second = asyncio.ensure_future(consume())
+            await asyncio.sleep(0.05)
+            self.release.set()
+            return await first, await second
+
+        with mock.patch.object(explanation_jobs, "astream_ai_explanation", self.fake_astream):
+            first, second = asyncio.run(main())
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(first[-1], ("done", "Hello world"))
+        self.assertEqual(second, [("done", "Hello world")])
+
+
+class ExplanationJobLookupTests(TestCase):
+    """A job is found from its ComparisonRun by workers that never saw it submitted."""
+
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name="Laptop")
+        items = [
+            UserItem.objects.create(category=category, item_name=f"Laptop {i}", specifications={"price": 50000 + i, "ram": 8 * i})
+            for i in range(1, 4)
+        ]
+        self.run = get_or_create_run(category, "coding", {"min_ram": 8}, items)
+        self.job_id = self.run.explanation_key
+        # another worker: nothing about the job in its (local-memory) cache
+        cache.delete(explanation_jobs._prompt_key(self.job_id))
+
+    def test_poll_on_another_worker(self):
+        with mock.patch.object(explanation_jobs, "_start") as start:
+            status, explanation = explanation_jobs.get_job_status(self.job_id)
+        self.assertEqual((status, explanation), (explanation_jobs.STATUS_PENDING, None))
+        prompt, fallback = start.call_args.args[1:]
+        self.assertIn("Laptop 3", prompt)
+        self.assertEqual(fallback, self.run.local_explanation)
+
+    def test_stream_on_another_worker(self):
+        with mock.patch.object(explanation_jobs, "stream_ai_explanation", return_value=iter(["AI text"])):
+            events = list(explanation_jobs.stream_explanation(self.job_id))
+        self.assertEqual(events[-1], ("done", "AI text"))
+
+    def test_unknown_job(self):
+        self.assertEqual(explanation_jobs.get_job_status("0" * 64), (None, None))
+        self.assertIsNone(explanation_jobs.stream_explanation("0" * 64))
+
+
+@override_settings(STORAGES=PLAIN_STATIC_STORAGE, AI_EXPLANATION_MODE="local")
+class ConditionalGetTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        explanation_cache.backend.clear()
+        fake_vendor_assets(self)
+        self.category = Category.objects.create(name="Laptop")
+        items = [
+            UserItem.objects.create(category=self.category, item_name=f"Laptop {i}", specifications={"price": 50000 + i})
+            for i in range(1, 3)
+        ]
+        self.run = get_or_create_run(self.category, "office", {}, items)
+        self.url = f"/result/{self.run.run_id}/"
+
+    def test_result_page_changes_when_the_explanation_is_saved(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Last-Modified", response)
+        etag = response["ETag"]
+
+        self.assertEqual(self.client.get(self.url, headers={"if-none-match": etag}).status_code, 304)
+        # If-Modified-Since alone never yields a 304
+        self.assertEqual(
+            self.client.get(self.url, headers={"if-modified-since": "Fri, 01 Jan 2100 00:00:00 GMT"}).status_code,
+            200,
+        )
+
+        save_explanation(self.run, "AI text")
+        response = self.client.get(self.url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "AI text")
+
+    def test_result_page_changes_when_the_explanation_is_cached(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        # another worker finished the job; the run itself is not saved yet
+        explanation_cache.set(self.run.explanation_key, "Cached AI text")
+        response = self.client.get(self.url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Cached AI text")
+
+    def test_etags_change_with_the_deploy(self):
+        with override_settings(BUILD_VERSION="build-1"):
+            etags = {url: self.client.get(url)["ETag"] for url in ("/", self.url)}
+            for url, etag in etags.items():
+                self.assertEqual(self.client.get(url, headers={"if-none-match": etag}).status_code, 304)
+
+        with override_settings(BUILD_VERSION="build-2"):
+            for url, etag in etags.items():
+                self.assertEqual(self.client.get(url, headers={"if-none-match": etag}).status_code, 200)
+
+    def test_compare_form_is_cached_at_catalog_version_zero(self):
+        SpecificationField.objects.create(category=self.category, name="price", field_type="number")
+        key = make_template_fragment_key("compare_form", [self.category.id, 0])
+        with mock.patch("core.views.catalog_version", return_value=0):
+            self.assertEqual(self.client.get(f"/compare/{self.category.id}/").status_code, 200)
+        self.assertIsNotNone(cache.get(key))
+
+    @override_settings(VERSION_STAMP_MAX_AGE=0)
+    def test_home_etag_follows_the_catalog(self):
+        etag = self.client.get("/")["ETag"]
+        self.assertEqual(self.client.get("/", headers={"if-none-match": etag}).status_code, 304)
+
+        # a restarted (or another) worker computes the same ETag
+        with mock.patch("core.services.catalog_cache.version_stamps", VersionStamps()):
+            self.assertEqual(self.client.get("/", headers={"if-none-match": etag}).status_code, 304)
+
+        Category.objects.create(name="Tablet")
+        self.assertEqual(self.client.get("/", headers={"if-none-match": etag}).status_code, 200)
+
+
+class PersistedRunTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name="Laptop")
+        SpecificationField.objects.bulk_create([
+            SpecificationField(category=self.category, name="price"),
+            SpecificationField(category=self.category, name="ram"),
+        ])
+        self.items = [
+            {"item_name": "Alpha", "specifications": {"price": 50000, "ram": 16}},
+            {"item_name": "Beta", "specifications": {"price": 45000, "ram": 8}},
+            {"item_name": "Gamma", "specifications": {"price": 60000, "ram": 32}},
+        ]
+
+    def payload(self, items):
+        return {"category": self.category.id, "purpose": "coding", "items": items, "persist": True}
+
+    def test_run_key_ignores_item_order(self):
+        items = [UserItem(item_name=i["item_name"], specifications=i["specifications"]) for i in self.items]
+        self.assertEqual(
+            run_key(self.category, "coding", {}, items),
+            run_key(self.category, "coding", {}, list(reversed(items))),
+        )
+
+    def test_sync_and_async_persist_share_one_run(self):
+        first = run_comparison(self.payload(self.items))
+        second = async_to_sync(arun_comparison)(self.payload(list(reversed(self.items))))
+        self.assertEqual(first["run_id"], second["run_id"])
+        self.assertEqual(UserItem.objects.filter(category=self.category).count(), 6)
+
+    @override_settings(STORAGES=PLAIN_STATIC_STORAGE, AI_EXPLANATION_MODE="local")
+    def test_compare_page_and_api_share_one_run(self):
+        fake_vendor_assets(self)
+        # the page drops Gamma in SQL, the API posts it to the engine
+        for requirements, ranked in [({}, 3), ({"max_budget": 55000}, 2)]:
+            with self.subTest(requirements=requirements):
+                ComparisonRun.objects.all().delete()
+                cache.clear()
+                data = {"form-TOTAL_FORMS": "3", "form-INITIAL_FORMS": "0", "purpose": "coding", **requirements}
+                for i, item in enumerate(self.items):
+                    data[f"form-{i}-item_name"] = item["item_name"]
+                    for name, value in item["specifications"].items():
+                        data[f"form-{i}-{name}"] = value
+
+                response = self.client.post(f"/compare/{self.category.id}/", data, follow=True)
+                self.assertEqual(response.status_code, 200)
+                run = ComparisonRun.objects.get()
+                self.assertEqual(len(run.ranking), ranked)
+
+                api = run_comparison({**self.payload(self.items), "requirements": requirements})
+                self.assertEqual(api["run_id"], run.run_id)
+                self.assertEqual(ComparisonRun.objects.count(), 1)
+
+
+def start_fake_gemini(test, **options):
+    """Serve a fake_gemini server for the test; returns its generateContent URL."""
+    server = make_server(**options)
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True).start()
+    test.addCleanup(server.server_close)
+    test.addCleanup(server.shutdown)
+    host, port = server.server_address[:2]
+    test.requests_made = lambda: next(server.RequestHandlerClass.requests)
+    return f"http://{host}:{port}/generateContent"
+
+
+# short timeouts and near-zero backoff keep the retry tests fast
+CLIENT_OPTIONS = {"timeout": 2.0, "backoff_base": 0.001, "backoff_max": 0.01}
+
+
+def record_backoff(test):
+    """Collect the delays the clients choose between retries, without sleeping."""
+    delays = []
+    choose = gemini_client._BaseGeminiClient._backoff
+
+    def backoff(client, attempt, response=None):
+        delays.append(choose(client, attempt, response))
+        return 0
+
+    patcher = mock.patch.object(gemini_client._BaseGeminiClient, "_backoff", backoff)
+    patcher.start()
+    test.addCleanup(patcher.stop)
+    return delays
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class CircuitBreakerTests(SimpleTestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(threshold=2, reset_timeout=10, clock=self.clock)
+
+    def test_opens_after_threshold_failures_in_a_row(self):
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow())
+
+    def test_half_open_lets_one_trial_through(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.clock.now = 10
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())
+
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(self.breaker.allow())
+
+    def test_failed_trial_opens_again(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.clock.now = 10
+        self.assertTrue(self.breaker.allow())
+
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.clock.now = 19
+        self.assertFalse(self.breaker.allow())
+        self.clock.now = 20
+        self.assertTrue(self.breaker.allow())
+
+
+class GeminiClientTests(SimpleTestCase):
+
+    def make_client(self, url, **options):
+        client = GeminiClient(url, "test-key", **{**CLIENT_OPTIONS, **options})
+        self.addCleanup(client.close)
+        return client
+
+    def test_retries_5xx_then_succeeds(self):
+        url = start_fake_gemini(self, reply="ok", fail_first=2)
+        self.assertEqual(self.make_client(url, max_retries=3).generate("prompt"), "ok")
+        self.assertEqual(self.requests_made(), 3)
+
+    def test_retries_429_after_retry_after(self):
+        url = start_fake_gemini(self, reply="ok", fail_first=1, fail_status=429, retry_after=1)
+        delays = record_backoff(self)
+        self.assertEqual(self.make_client(url, backoff_max=5).generate("prompt"), "ok")
+        self.assertEqual(delays, [1.0])
+
+    def test_retry_after_is_capped(self):
+        url = start_fake_gemini(self, reply="ok", fail_first=1, fail_status=429, retry_after=60)
+        delays = record_backoff(self)
+        self.make_client(url).generate("prompt")
+        self.assertEqual(delays, [CLIENT_OPTIONS["backoff_max"]])
+
+    def test_gives_up_after_the_retry_limit(self):
+        url = start_fake_gemini(self, status=503)
+        with self.assertRaisesMessage(GeminiError, "HTTP 503"):
+            self.make_client(url, max_retries=2).generate("prompt")
+        self.assertEqual(self.requests_made(), 3)
+
+    def test_other_4xx_is_not_retried(self):
+        url = start_fake_gemini(self, status=400)
+        with self.assertRaises(GeminiError):
+            self.make_client(url, max_retries=2).generate("prompt")
+        self.assertEqual(self.requests_made(), 1)
+
+    def test_open_circuit_fails_fast(self):
+        url = start_fake_gemini(self, status=503)
+        breaker = CircuitBreaker(threshold=1, reset_timeout=60)
+        client = self.make_client(url, max_retries=0, breaker=breaker)
+
+        with self.assertRaises(GeminiError):
+            client.generate("prompt")
+        with self.assertRaises(GeminiUnavailable):
+            client.generate("prompt")
+        self.assertEqual(self.requests_made(), 1)
+
+    def test_half_open_trial_closes_the_circuit(self):
+        url = start_fake_gemini(self, reply="ok", fail_first=1)
+        clock = FakeClock()
+        breaker = CircuitBreaker(threshold=1, reset_timeout=10, clock=clock)
+        client = self.make_client(url, max_retries=0, breaker=breaker)
+
+        with self.assertRaises(GeminiError):
+            client.generate("prompt")
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+        clock.now = 10
+        self.assertEqual(client.generate("prompt"), "ok")
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+
+class AsyncGeminiClientTests(SimpleTestCase):
+
+    def generate(self, url, **options):
+        async def call():
+            client = AsyncGeminiClient(url, "test-key", **{**CLIENT_OPTIONS, **options})
+            try:
+                return await client.generate("prompt")
+            finally:
+                await client.aclose()
+
+        return asyncio.run(call())
+
+    def test_retries_5xx_then_succeeds(self):
+        url = start_fake_gemini(self, reply="ok", fail_first=2)
+        self.assertEqual(self.generate(url, max_retries=3), "ok")
+        self.assertEqual(self.requests_made(), 3)
+
+    def test_retries_429_after_retry_after(self):
+        url = start_fake_gemini(self, reply="ok", fail_first=1, fail_status=429, retry_after=1)
+        delays = record_backoff(self)
+        self.assertEqual(self.generate(url, backoff_max=5), "ok")
+        self.assertEqual(delays, [1.0])
+
+    def test_gives_up_after_the_retry_limit(self):
+        url = start_fake_gemini(self, status=503)
+        with self.assertRaisesMessage(GeminiError, "HTTP 503"):
+            self.generate(url, max_retries=2)
+        self.assertEqual(self.requests_made(), 3)
+
+    def test_open_circuit_fails_fast(self):
+        url = start_fake_gemini(self, status=503)
+        breaker = CircuitBreaker(threshold=1, reset_timeout=60)
+        with self.assertRaises(GeminiError):
+            self.generate(url, max_retries=0, breaker=breaker)
+        with self.assertRaises(GeminiUnavailable):
+            self.generate(url, max_retries=0, breaker=breaker)
+        self.assertEqual(self.requests_made(), 1)
+
+
+class AsgiLifespanTests(SimpleTestCase):
+
+    def test_shutdown_closes_the_loops_async_client(self):
+        from compare_engine.asgi import application
+
+        async def serve():
+            client = ai_service.get_async_client()
+            messages = asyncio.Queue()
+            sent = []
+            for message_type in ("lifespan.startup", "lifespan.shutdown"):
+                messages.put_nowait({"type": message_type})
+
+            async def send(message):
+                sent.append(message["type"])
+
+            await application({"type": "lifespan"}, messages.get, send)
+            return client, sent
+
+        client, sent = asyncio.run(serve())
+        self.assertEqual(sent, ["lifespan.startup.complete", "lifespan.shutdown.complete"])
+        self.assertTrue(client.http.is_closed)
+        self.assertNotIn(client, ai_service._async_clients.values())
+
+
+class SseParsingTests(SimpleTestCase):
+
+    def test_text_parts_of_a_data_line(self):
+        line = 'data: {"candidates": [{"content": {"parts": [{"text": "Hello "}, {"text": "world"}]}}]}'
+        self.assertEqual(GeminiClient._sse_texts(line), ["Hello ", "world"])
+
+    def test_other_lines_have_no_text(self):
+        for line in ["", ": keep-alive", "event: message", "id: 3"]:
+            with self.subTest(line=line):
+                self.assertEqual(GeminiClient._sse_texts(line), [])
+
+    def test_parts_without_text_are_skipped(self):
+        line = 'data: {"candidates": [{"content": {"parts": [{"functionCall": {}}, {"text": ""}]}}]}'
+        self.assertEqual(GeminiClient._sse_texts(line), [])
+        self.assertEqual(GeminiClient._sse_texts('data: {"candidates": [{"content": {}}]}'), [])
+
+
+class ExplanationStreamTests(SimpleTestCase):
+    """stream_explanation() reading a real Gemini stream from fake_gemini."""
+
+    REPLY = "Streams arrive word by word. "
+
+    def setUp(self):
+        self.job_id = uuid.uuid4().hex
+        cache.set(explanation_jobs._prompt_key(self.job_id), ("prompt", "local fallback"))
+
+    def stream_from(self, **server_options):
+        url = start_fake_gemini(self, reply=self.REPLY, **server_options)
+        client = GeminiClient(url, "test-key", **CLIENT_OPTIONS)
+        self.addCleanup(client.close)
+        stream = functools.partial(ai_service.stream_ai_explanation, client=client)
+        patcher = mock.patch.object(explanation_jobs, "stream_ai_explanation", stream)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_chunks_then_the_full_text(self):
+        self.stream_from(chunk_delay=0)
+        events = list(explanation_jobs.stream_explanation(self.job_id))
+
+        self.assertEqual(events[0], ("chunk", "Streams "))
+        self.assertEqual("".join(text for event, text in events if event == "chunk"), self.REPLY)
+        self.assertEqual(events[-1], ("done", self.REPLY))
+        self.assertEqual(explanation_jobs.get_job_status(self.job_id), ("done", self.REPLY))
+
+    def test_dropped_stream_ends_with_the_local_text(self):
+        self.stream_from(chunk_delay=0, drop_after=2)
+        events = list(explanation_jobs.stream_explanation(self.job_id))
+
+        self.assertEqual(events[:2], [("chunk", "Streams "), ("chunk", "arrive ")])
+        self.assertEqual(events[-1], ("done", "local fallback"))
+        self.assertEqual(explanation_jobs.get_job_status(self.job_id), ("done", "local fallback"))
+        self.assertNotIn(self.job_id, explanation_jobs._jobs)
+
+    def test_second_stream_waits_for_the_owner(self):
+        self.stream_from(chunk_delay=0.05)
+        results = {}
+
+        def consume(name):
+            results[name] = list(explanation_jobs.stream_explanation(self.job_id))
+
+        first = threading.Thread(target=consume, args=("first",))
+        first.start()
+        for _ in range(500):
+            if self.job_id in explanation_jobs._jobs:
+                break
+            threading.Event().wait(0.01)
+        second = threading.Thread(target=consume, args=("second",))
+        second.start()
+        first.join(5)
+        second.join(5)
+
+        self.assertEqual(self.requests_made(), 1)
+        self.assertEqual(results["first"][-1], ("done", self.REPLY))
+        self.assertEqual(results["second"], [("done", self.REPLY)])
+
+    def test_async_dropped_stream_ends_with_the_local_text(self):
+        url = start_fake_gemini(self, reply=self.REPLY, chunk_delay=0, drop_after=2)
+
+        async def main():
+            client = AsyncGeminiClient(url, "test-key", **CLIENT_OPTIONS)
+            stream = functools.partial(ai_service.astream_ai_explanation, client=client)
+            try:
+                with mock.patch.object(explanation_jobs, "astream_ai_explanation", stream):
+                    return [event async for event in await explanation_jobs.astream_explanation(self.job_id)]
+            finally:
+                await client.aclose()
+
+        events = asyncio.run(main())
+        self.assertEqual(events[:2], [("chunk", "Streams "), ("chunk", "arrive ")])
+        self.assertEqual(events[-1], ("done", "local fallback"))
+
+
+class Interrupted(Exception):
+    pass
+
+
+class CatalogImportTests(TestCase):
+
+    # a quoted name spanning two lines, so offsets are not line-aligned
+    CSV = (
+        'item_name,price,ram\n'
+        'Alpha,50000,16\n'
+        '"Beta\nPro",45000,8\n'
+        'Gamma,60000,32\n'
+        'Delta,40000,4\n'
+    )
+    NAMES = ["Alpha", "Beta\nPro", "Gamma", "Delta"]
+
+    def setUp(self):
+        self.category = Category.objects.create(name="Laptop")
+        SpecificationField.objects.bulk_create([
+            SpecificationField(category=self.category, name="price", field_type="number"),
+            SpecificationField(category=self.category, name="ram", field_type="number"),
+        ])
+
+    def write(self, content, suffix=".csv"):
+        f = tempfile.NamedTemporaryFile(suffix=suffix, delete=False)
+        f.write(gzip.compress(content.encode()) if suffix.endswith(".gz") else content.encode())
+        f.close()
+        self.addCleanup(os.unlink, f.name)
+        return f.name
+
+    def imported(self):
+        return list(UserItem.objects.filter(category=self.category).order_by("id").values_list("item_name", flat=True))
+
+    def interrupt_after_first_batch(self, path, fmt="csv"):
+        def stop(job):
+            raise Interrupted
+
+        with self.assertRaises(Interrupted):
+            run_import(start_import(self.category, path), fmt, batch_size=2, on_batch=stop)
+        return CatalogImport.objects.get(category=self.category)
+
+    def test_resumes_after_the_last_committed_row(self):
+        path = self.write(self.CSV)
+        job = self.interrupt_after_first_batch(path)
+        self.assertEqual((job.rows_imported, job.line, job.finished), (2, 4, False))
+        self.assertEqual(self.imported(), self.NAMES[:2])
+
+        with self.assertRaisesMessage(CatalogImportError, "pass --resume"):
+            start_import(self.category, path)
+        job = run_import(start_import(self.category, path, resume=True), "csv", batch_size=2)
+
+        self.assertTrue(job.finished)
+        self.assertEqual(job.rows_imported, 4)
+        self.assertEqual(self.imported(), self.NAMES)
+        delta = UserItem.objects.get(item_name="Delta")
+        self.assertEqual(delta.specifications, {"price": 40000.0, "ram": 4.0})
+        self.assertFalse(delta.ephemeral)
+
+    def test_rejected_rows_are_reported_and_skipped(self):
+        path = self.write(self.CSV + "Epsilon,cheap,8\n,30000,8\nZeta,35000,8\n")
+        rejects = []
+        job = run_import(start_import(self.category, path), "csv", on_reject=lambda *reject: rejects.append(reject))
+
+        self.assertTrue(job.finished)
+        self.assertEqual((job.rows_imported, job.rows_rejected), (5, 2))
+        self.assertEqual(self.imported(), self.NAMES + ["Zeta"])
+        self.assertEqual([(line, sorted(errors)) for line, errors in rejects], [(7, ["price"]), (8, ["item_name"])])
+
+    def test_unknown_columns_fail_the_whole_import(self):
+        path = self.write("item_name,price,colour\nAlpha,50000,red\n")
+        with self.assertRaisesMessage(CatalogImportError, "Unknown CSV columns: colour"):
+            run_import(start_import(self.category, path), "csv")
+        self.assertEqual(self.imported(), [])
+
+    def test_gzipped_csv_resumes(self):
+        path = self.write(self.CSV, suffix=".csv.gz")
+        self.assertEqual(detect_format(path), "csv")
+
+        self.interrupt_after_first_batch(path)
+        job = run_import(start_import(self.category, path, resume=True), "csv", batch_size=2)
+
+        self.assertEqual(job.rows_imported, 4)
+        self.assertEqual(self.imported(), self.NAMES)
+
+    def test_gzipped_json_lines(self):
+        path = self.write(
+            '{"item_name": "Alpha", "specifications": {"price": 50000, "ram": 16}}\n'
+            '\n'
+            '{"item_name": "Beta", "price": 45000, "ram": 8}\n'
+            'not json\n'
+            '["Gamma"]\n',
+            suffix=".jsonl.gz",
+        )
+        self.assertEqual(detect_format(path), "jsonl")
+        rejects = []
+        job = run_import(start_import(self.category, path), "jsonl", on_reject=lambda *reject: rejects.append(reject))
+
+        self.assertEqual((job.rows_imported, job.rows_rejected), (2, 2))
+        self.assertEqual(self.imported(), ["Alpha", "Beta"])
+        self.assertEqual([line for line, _ in rejects], [4, 5])
+
+
+class RetentionTests(TestCase):
+
+    def setUp(self):
+        self.category = Category.objects.create(name="Laptop")
+        self.cutoff = retention_cutoff(days=30)
+
+    def make_items(self, count, age_days, ephemeral=True):
+        items = UserItem.objects.bulk_create([
+            UserItem(category=self.category, item_name=f"Item {i}", specifications={"price": 1000 + i}, ephemeral=ephemeral)
+            for i in range(count)
+        ])
+        ids = [item.id for item in items]
+        # created_at is auto_now_add, so it is backdated after the insert
+        for offset, pk in enumerate(ids):
+            created_at = timezone.now() - timedelta(days=age_days, minutes=offset)
+            UserItem.objects.filter(pk=pk).update(created_at=created_at)
+        return ids
+
+    def test_deletes_in_batches(self):
+        for count, batch_size, totals in [(5, 2, [2, 4, 5]), (4, 2, [2, 4]), (3, 5, [3])]:
+            with self.subTest(count=count, batch_size=batch_size):
+                UserItem.objects.all().delete()
+                self.make_items(count, age_days=40)
+                fresh = self.make_items(2, age_days=1)
+                seen = []
+
+                deleted = purge_expired_items(self.cutoff, batch_size=batch_size, on_batch=seen.append)
+
+                self.assertEqual(deleted, count)
+                self.assertEqual(seen, totals)
+                self.assertEqual(sorted(UserItem.objects.values_list("id", flat=True)), fresh)
+
+    def test_only_ephemeral_items_expire(self):
+        kept = self.make_items(3, age_days=400, ephemeral=False)
+        self.make_items(2, age_days=400)
+
+        self.assertEqual(expired_items(self.cutoff).count(), 2)
+        self.assertEqual(purge_expired_items(self.cutoff), 2)
+        self.assertEqual(sorted(UserItem.objects.values_list("id", flat=True)), kept)
+
+    def test_archive_lines_are_appended_oldest_first(self):
+        archive = os.path.join(tempfile.mkdtemp(), "items.jsonl.gz")
+        self.addCleanup(os.unlink, archive)
+        oldest_first = list(reversed(self.make_items(3, age_days=40)))
+
+        purge_expired_items(self.cutoff, batch_size=2, archive=archive)
+        self.make_items(1, age_days=50)
+        purge_expired_items(self.cutoff, archive=archive)
+
+        with gzip.open(archive, "rt", encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual([line["id"] for line in lines[:3]], oldest_first)
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(set(lines[0]), {"id", "category", "item_name", "specifications", "created_at"})
+        self.assertEqual(lines[0]["category"], "Laptop")
+        self.assertEqual(lines[0]["item_name"], "Item 2")
+        self.assertEqual(lines[0]["specifications"], {"price": 1002})
+        datetime.fromisoformat(lines[0]["created_at"])
+
+    def test_archive_can_be_imported_again(self):
+        SpecificationField.objects.create(category=self.category, name="price", field_type="number")
+        archive = os.path.join(tempfile.mkdtemp(), "items.jsonl.gz")
+        self.addCleanup(os.unlink, archive)
+        self.make_items(3, age_days=40)
+        purge_expired_items(self.cutoff, archive=archive)
+
+        job = run_import(start_import(self.category, archive), detect_format(archive))
+
+        self.assertEqual((job.rows_imported, job.rows_rejected), (3, 0))
+        self.assertFalse(expired_items(self.cutoff).exists())
+
+
+class RetentionMigrationTests(TransactionTestCase):
+    """Rows that existed before 0009 are marked kept and never purged."""
+
+    before = [("core", "0008_catalogimport")]
+
+    def migrate(self, targets=None):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets or executor.loader.graph.leaf_nodes())
+        return executor
+
+    def tearDown(self):
+        self.migrate()
+
+    def test_existing_rows_are_never_purged(self):
+        apps = self.migrate(self.before).loader.project_state(self.before).apps
+        category = apps.get_model("core", "Category").objects.create(name="Laptop")
+        OldUserItem = apps.get_model("core", "UserItem")
+        OldUserItem.objects.create(category=category, item_name="Curated", specifications={})
+        OldUserItem.objects.update(created_at=timezone.now() - timedelta(days=400))
+
+        self.migrate()
+
+        self.assertEqual(purge_expired_items(retention_cutoff(days=0)), 0)
+        self.assertEqual(list(UserItem.objects.values_list("item_name", "ephemeral")), [("Curated", False)])
+
+
+class ComparisonContextTests(TestCase):
+
+    def setUp(self):
+        self.category = Category.objects.create(name="Laptop")
+        self.context = ComparisonContext(
+            category_id=self.category.id,
+            item_ids=[21, 4, 3, 5, 9, 20, 4],
+            purpose="gaming",
+            requirements={"max_budget": 55000.0, "min_ram": 8.0, "optional_gpu_required": True},
+        )
+        self.token = encode_context(self.context)
+
+    def test_round_trip(self):
+        decoded = decode_context(self.token, self.category.id)
+        self.assertEqual(decoded.category_id, self.category.id)
+        self.assertEqual(decoded.item_ids, [3, 4, 5, 9, 20, 21])
+        self.assertEqual(decoded.purpose, "gaming")
+        self.assertEqual(decoded.requirements, self.context.requirements)
+
+    def test_consecutive_ids_keep_the_token_short(self):
+        many = encode_context(ComparisonContext(category_id=self.category.id, item_ids=list(range(1000, 6000))))
+        self.assertLess(len(many), 150)
+        self.assertEqual(decode_context(many, self.category.id).item_ids, list(range(1000, 6000)))
+
+    def invalid_tokens(self):
+        payload, _, signature = self.token.rpartition(":")
+        flipped = "A" if signature[0] != "A" else "B"
+        expired = mock.patch(
+            "django.core.signing.time.time",
+            return_value=datetime.now().timestamp() + django_settings.COMPARISON_CONTEXT_MAX_AGE + 60,
+        )
+        return [
+            ("tampered", f"{payload}:{flipped}{signature[1:]}", self.category.id, None),
+            ("other category", self.token, self.category.id + 1, None),
+            ("expired", self.token, self.category.id, expired),
+            ("garbage", "not-a-token", self.category.id, None),
+            ("empty", "", self.category.id, None),
+        ]
+
+    def test_invalid_tokens_decode_to_none(self):
+        for name, token, category_id, patch in self.invalid_tokens():
+            with self.subTest(name), (patch or contextlib.nullcontext()):
+                self.assertIsNone(decode_context(token, category_id))
+
+    def test_invalid_tokens_redirect_to_compare(self):
+        other = Category.objects.create(name="Phone")
+        for name, token, category_id, patch in self.invalid_tokens():
+            if category_id != self.category.id:
+                category_id = other.id
+            with self.subTest(name), (patch or contextlib.nullcontext()):
+                response = self.client.get(f"/result/{category_id}/", {"ctx": token})
+                self.assertRedirects(response, f"/compare/{category_id}/", fetch_redirect_response=False)
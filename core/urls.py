@@ -1,4 +1,4 @@
-from django.urls import path
+from django.urls import path, re_path
 from . import views
 
 app_name = 'core'
@@ -6,5 +6,11 @@ app_name = 'core'
 urlpatterns = [
     path('', views.home, name='home'),
     path('compare/<int:category_id>/', views.compare, name='compare'),
+    re_path(r'^result/(?P<run_id>[0-9a-f]{64})/$', views.run_result, name='run_result'),
     path('result/<int:category_id>/', views.result, name='result'),
+    path('explanation/<str:job_id>/', views.explanation, name='explanation'),
+    path('explanation/<str:job_id>/stream/', views.explanation_stream, name='explanation_stream'),
+    path('metrics', views.metrics, name='metrics'),
+    path('api/compare/', views.api_compare, name='api_compare'),
+    path('api/compare/batch/', views.api_compare_batch, name='api_compare_batch'),
 ]
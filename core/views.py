@@ -1,33 +1,66 @@
 import json
-from django.shortcuts import render, redirect, get_object_or_404
-from django.forms import formset_factory
-from .models import Category, SpecificationField, UserItem
-from .forms import UserItemEntryForm, PurposeRequirementsForm
-from .services.comparison_engine import analyze_products
-from .services.ai_service import generate_ai_explanation
-
-
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import render, redirect
+from django.urls import reverse
+from django.utils.http import urlencode
+from django.views.decorators.cache import cache_control
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition, require_POST
+from .models import UserItem
+from .forms import form_registry
+from .services.catalog_cache import catalog_version, get_categories, get_category, get_spec_fields
+from .services.category_weights import scoring_weights
+from .services.comparison_api import ComparisonRequestError, arun_batch, arun_comparison
+from .services.comparison_context import ComparisonContext, decode_context, encode_context
+from .services.ai_service import ai_enabled
+from .services.comparison_runs import aget_or_create_run, get_run, local_explanation_for, save_explanation
+from .services.explanation_cache import explanation_cache
+from .services.explanation_jobs import astream_explanation, get_job_status, stream_explanation, submit_explanation
+from .services.metrics import registry, span
+from .services.static_assets import deploy_version
+
+
+def _get_category_or_404(category_id):
+    category = get_category(category_id)
+    if category is None:
+        raise Http404("No Category matches the given query.")
+    return category
+
+
+def _home_etag(request):
+    return f"home-{catalog_version()}-{deploy_version()}"
+
+
+@cache_control(no_cache=True)
+@condition(etag_func=_home_etag)
 def home(request):
-    categories = Category.objects.all().order_by('name')
+    categories = get_categories()
     return render(request, 'home.html', {"categories": categories})
 
 
 def compare(request, category_id):
-    category = get_object_or_404(Category, id=category_id)
+    category = _get_category_or_404(category_id)
 
     # get spec fields ONLY for this category
-    spec_fields = SpecificationField.objects.filter(category=category).order_by("name")
+    spec_fields = get_spec_fields(category.id)
 
-    FormSet = formset_factory(UserItemEntryForm, extra=3, can_delete=True)
+    # per-category form classes are compiled once and reused
+    FormSet = form_registry.item_formset(category, spec_fields)
+    PurposeForm = form_registry.purpose_form(category)
 
     if request.method == "POST":
-        formset = FormSet(request.POST, form_kwargs={"spec_fields": spec_fields})
+        formset = FormSet(request.POST)
+        purpose_form = PurposeForm(request.POST)
 
-        # IMPORTANT: pass category here
-        purpose_form = PurposeRequirementsForm(request.POST, category=category)
+        with span("forms.validate"):
+            is_valid = formset.is_valid() and purpose_form.is_valid()
 
-        if formset.is_valid() and purpose_form.is_valid():
-            created_ids = []
+        if is_valid:
+            new_items = []
 
             for form in formset:
                 if not form.cleaned_data:
@@ -41,32 +74,33 @@ def compare(request, category_id):
 
                 specs = form.get_specifications()
 
-                user_item = UserItem.objects.create(
+                user_item = UserItem(
                     category=category,
                     item_name=item_name,
                     specifications=specs,
                 )
-                created_ids.append(user_item.id)
-
-            request.session[f"comparex_useritem_ids_{category_id}"] = created_ids
-            request.session[f"comparex_purpose_{category_id}"] = purpose_form.cleaned_data.get("purpose")
-
-            request.session[f"comparex_requirements_{category_id}"] = {
-                "min_budget": purpose_form.cleaned_data.get("min_budget"),
-                "max_budget": purpose_form.cleaned_data.get("max_budget"),
-                "min_ram": purpose_form.cleaned_data.get("min_ram"),
-                "min_ssd": purpose_form.cleaned_data.get("min_ssd"),
-                "optional_gpu_required": purpose_form.cleaned_data.get("optional_gpu_required"),
-            }
-
-            return redirect("core:result", category_id=category_id)
+                user_item.compute_features()
+                new_items.append(user_item)
+
+            # one INSERT for the whole formset instead of one per row
+            with span("orm.insert"), transaction.atomic():
+                created_items = UserItem.objects.bulk_create(new_items)
+            created_ids = [user_item.id for user_item in created_items]
+
+            # the result page gets everything from a signed token in its
+            # URL, so neither request reads or writes the session
+            token = encode_context(ComparisonContext(
+                category_id=category.id,
+                item_ids=created_ids,
+                purpose=purpose_form.cleaned_data.get("purpose") or "",
+                requirements=purpose_form.get_requirements(),
+            ))
+            return redirect(f"{reverse('core:result', args=[category_id])}?{urlencode({'ctx': token})}")
 
     else:
         # 🔴 THIS IS THE GET PART YOU ASKED
-        formset = FormSet(form_kwargs={"spec_fields": spec_fields})
-
-        # IMPORTANT: pass category here
-        purpose_form = PurposeRequirementsForm(category=category)
+        formset = FormSet()
+        purpose_form = PurposeForm()
 
     context = {
         "category": category,
@@ -75,91 +109,95 @@ def compare(request, category_id):
         "purpose_form": purpose_form,
     }
 
-    return render(request, "compare.html", context)
+    # an unbound form renders the same for everyone: cache its markup
+    if not formset.is_bound:
+        context["form_cache"] = True
+        context["form_cache_version"] = catalog_version()
+        context["form_cache_timeout"] = settings.CATALOG_CACHE_TIMEOUT
 
-    category = get_object_or_404(Category, id=category_id)
-    spec_fields = SpecificationField.objects.filter(category=category).order_by("name")
+    with span("render"):
+        return render(request, "compare.html", context)
 
-    FormSet = formset_factory(UserItemEntryForm, extra=3, can_delete=True)
 
-    if request.method == 'POST':
-        formset = FormSet(request.POST, form_kwargs={"spec_fields": spec_fields})
-        purpose_form = PurposeRequirementsForm(request.POST, category=category)
+def _page_number(request):
+    try:
+        return max(1, int(request.GET.get("page", 1)))
+    except (TypeError, ValueError):
+        return 1
 
-        if formset.is_valid() and purpose_form.is_valid():
-            created_ids = []
 
-            for form in formset:
-                if not form.cleaned_data:
-                    continue
-                if form.cleaned_data.get("DELETE"):
-                    continue
+PURPOSE_DISPLAY = {
+    "student": "Student",
+    "coding": "Coding",
+    "gaming": "Gaming",
+    "video_editing": "Video Editing",
+    "office": "Office",
+}
 
-                item_name = form.cleaned_data.get("item_name")
-                if not item_name:
-                    continue
 
-                specs = form.get_specifications()
+def _category_and_spec_fields(category_id):
+    category = _get_category_or_404(category_id)
+    return category, get_spec_fields(category.id)
 
-                user_item = UserItem.objects.create(
-                    category=category,
-                    item_name=item_name,
-                    specifications=specs,
-                )
-                created_ids.append(user_item.id)
-
-            if not created_ids:
-                return render(request, "compare.html", {
-                    "category": category,
-                    "spec_fields": spec_fields,
-                    "formset": formset,
-                    "purpose_form": purpose_form,
-                    "error": "Please enter at least one item."
-                })
-
-            request.session[f"comparex_useritem_ids_{category_id}"] = created_ids
-            request.session[f"comparex_purpose_{category_id}"] = purpose_form.cleaned_data.get("purpose")
-            request.session[f"comparex_requirements_{category_id}"] = {
-                "min_budget": purpose_form.cleaned_data.get("min_budget"),
-                "max_budget": purpose_form.cleaned_data.get("max_budget"),
-                "min_ram": purpose_form.cleaned_data.get("min_ram"),
-                "min_ssd": purpose_form.cleaned_data.get("min_ssd"),
-                "optional_gpu_required": purpose_form.cleaned_data.get("optional_gpu_required", False),
-            }
-
-            return redirect("core:result", category_id=category_id)
 
-    else:
-        formset = FormSet(form_kwargs={"spec_fields": spec_fields})
-        purpose_form = PurposeRequirementsForm()
+async def result(request, category_id):
+    # async so that, under ASGI, waiting on the database does not hold a worker thread
+    category, spec_fields = await sync_to_async(_category_and_spec_fields)(category_id)
 
-    return render(request, 'compare.html', {
-        'category': category,
-        "spec_fields": spec_fields,
-        "formset": formset,
-        "purpose_form": purpose_form,
-    })
+    token = request.GET.get("ctx")
+    comparison = decode_context(token, category.id)
+    if comparison is None or not comparison.item_ids:
+        return redirect("core:compare", category_id=category_id)
 
+    purpose = comparison.purpose
+    requirements = comparison.requirements
 
-def result(request, category_id):
-    category = get_object_or_404(Category, id=category_id)
-    spec_fields = SpecificationField.objects.filter(category=category).order_by("name")
+    # requirement filters run in SQL on the indexed feature columns
+    items = (
+        UserItem.objects
+        .filter(id__in=comparison.item_ids, category=category)
+        .matching(requirements)
+        .order_by("-created_at", "-id")
+    )
 
-    ids = request.session.get(f"comparex_useritem_ids_{category_id}", [])
-    if not ids:
-        return redirect("core:compare", category_id=category_id)
+    weights = await sync_to_async(scoring_weights)(category.id, purpose)
 
-    purpose = request.session.get(f"comparex_purpose_{category_id}")
-    requirements = request.session.get(f"comparex_requirements_{category_id}", {}) or {}
+    # ⭐ NEW ENGINE CALL
+    # identical inputs reuse the stored run instead of scoring again
+    run = await aget_or_create_run(category, purpose, requirements, items, weights=weights, spec_fields=spec_fields)
 
-    items = list(UserItem.objects.filter(id__in=ids, category=category))
+    return await sync_to_async(_render_run)(request, run, context_token=token)
 
-    # ⭐ NEW ENGINE CALL
-    ranked_items, best_item, top_group, tradeoff_text = analyze_products(
-        purpose, requirements, items
-    )
 
-    if not ranked_items:
+def _run_etag(request, run_id):
+    run = get_run(run_id)
+    if run is None:
+        return None
+    # the ranking is frozen; the page changes when the explanation arrives
+    # (the page shows a cached one before it is saved on the run), the
+    # category is renamed or a deploy changes the static URLs. No
+    # Last-Modified: created_at would not move when the explanation arrives
+    explained = run.explanation or explanation_cache.peek(run.explanation_key) is not None
+    state = "explained" if explained else "pending"
+    return f"{run_id}-{state}-{catalog_version()}-{deploy_version()}-{request.GET.get('page', '1')}"
+
+
+@cache_control(no_cache=True)
+@condition(etag_func=_run_etag)
+def run_result(request, run_id):
+    run = get_run(run_id)
+    if run is None:
+        raise Http404("Unknown comparison run")
+
+    return _render_run(request, run)
+
+
+def _render_run(request, run, context_token=None):
+    category = run.category
+    purpose = run.purpose
+    requirements = run.requirements
+
+    if not run.ranking:
         return render(request, "result.html", {
             "category": category,
             "error": "No items match your requirements.",
@@ -169,49 +207,170 @@ def result(request, category_id):
             "requirements": requirements,
         })
 
-    chart_labels_json = json.dumps([item.item_name for item, _ in ranked_items])
-    chart_scores_json = json.dumps([score for _, score in ranked_items])
+    # the ranking is stored sorted, so a page is a slice
+    page_size = settings.RESULT_PAGE_SIZE
+    num_pages = max(1, -(-len(run.ranking) // page_size))
+    page_number = min(_page_number(request), num_pages)
+    first_rank = (page_number - 1) * page_size + 1
+
+    ranked_items = run.ranked_items
+    page_items = ranked_items[first_rank - 1:first_rank - 1 + page_size]
+    best_item = run.best_item
 
+    chart_labels_json = json.dumps([item.item_name for item, _ in page_items])
+    chart_scores_json = json.dumps([score for _, score in page_items])
+
+    # table cells are shaped here, in column order, so the template does
+    # not look each one up through a filter
     result_rows = []
-    for item, score in ranked_items:
+    for rank, (item, score) in enumerate(page_items, start=first_rank):
+        specs = item.specifications or {}
         result_rows.append({
+            "rank": rank,
             "item": item,
             "score": score,
-            "specs": item.specifications or {},
+            "specs": specs,
+            "cells": [specs.get(name, "") for name in run.spec_fields],
+            "is_best": item.id == best_item.id,
         })
 
     # ⭐ AI logic
-    # ⭐ Always let AI explain (even if multiple matches)
-    ai_explanation = generate_ai_explanation(
-        best_item=best_item,
-        purpose=purpose,
-        requirements=requirements,
-        category=category
-    )
-
-
-
+    # the local (template-driven) explanation is always there; the LLM's is
+    # streamed from core:explanation_stream, or, with streaming off, run in
+    # the background while the page polls core:explanation. In "local" mode
+    # the page only asks for it when the user clicks
+    ai_explanation = run.explanation
+    ai_job_id = None
+    ai_on_demand = False
+    if not ai_explanation:
+        ai_explanation = explanation_cache.peek(run.explanation_key)
+        if ai_explanation:
+            save_explanation(run, ai_explanation)
+        else:
+            ai_explanation = local_explanation_for(run)
+            if ai_enabled():
+                ai_on_demand = settings.AI_EXPLANATION_MODE == "local"
+                ai_job_id = submit_explanation(
+                    best_item=best_item,
+                    purpose=purpose,
+                    requirements=requirements,
+                    category=category,
+                    start=not (ai_on_demand or settings.AI_EXPLANATION_STREAMING),
+                    fallback=ai_explanation,
+                )
 
-    purpose_display = {
-        "student": "Student",
-        "coding": "Coding",
-        "gaming": "Gaming",
-        "video_editing": "Video Editing",
-        "office": "Office",
-    }.get(purpose, purpose.title())
+    purpose_display = PURPOSE_DISPLAY.get(purpose, (purpose or "").title())
 
-    return render(request, "result.html", {
+    context = {
         "category": category,
-        "spec_fields": spec_fields,
+        "run": run,
+        "spec_fields": [{"name": name} for name in run.spec_fields],
         "best_item": best_item,
-        "ranked_items": ranked_items,
-        "top_group": top_group,          # ⭐ NEW
-        "tradeoff_text": tradeoff_text,  # ⭐ NEW
+        "ranked_items": ranked_items[:page_size],
+        "top_group": run.top_group,          # ⭐ NEW
+        "tradeoff_text": run.tradeoff_text,  # ⭐ NEW
         "result_rows": result_rows,
+        "page_number": page_number,
+        "num_pages": num_pages,
+        "context_token": context_token,
+        "total_items": len(run.ranking),
         "ai_explanation": ai_explanation,
+        "ai_job_id": ai_job_id,
+        "ai_on_demand": ai_on_demand,
+        "ai_stream": settings.AI_EXPLANATION_STREAMING,
+        "fragment_cache_timeout": settings.CATALOG_CACHE_TIMEOUT,
         "chart_labels": chart_labels_json,
         "chart_scores": chart_scores_json,
         "purpose": purpose,
         "purpose_display": purpose_display,
         "requirements": requirements,
-    })
+    }
+
+    with span("render"):
+        return render(request, "result.html", context)
+
+
+def explanation(request, job_id):
+    status, text = get_job_status(job_id)
+    if status is None:
+        raise Http404("Unknown explanation job")
+
+    return JsonResponse({"status": status, "explanation": text})
+
+
+def _sse_event(event, text):
+    return f"event: {event}\ndata: {json.dumps({'text': text})}\n\n"
+
+
+def _sse_events(events):
+    for event, text in events:
+        yield _sse_event(event, text)
+
+
+async def _asse_events(events):
+    async for event, text in events:
+        yield _sse_event(event, text)
+
+
+async def explanation_stream(request, job_id):
+    """Server-sent events: `chunk` events as the LLM writes, then one `done` with the full text."""
+    # under ASGI the LLM stream is read on the event loop; a WSGI server
+    # needs a plain iterator, read on its own request thread
+    if isinstance(request, ASGIRequest):
+        events = await astream_explanation(job_id)
+        body = _asse_events
+    else:
+        events = await sync_to_async(stream_explanation)(job_id)
+        body = _sse_events
+    if events is None:
+        raise Http404("Unknown explanation job")
+
+    response = StreamingHttpResponse(body(events), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx: do not buffer the stream
+    return response
+
+
+def metrics(request):
+    """Prometheus scrape endpoint; 404 unless METRICS_ENABLED."""
+    if not settings.METRICS_ENABLED:
+        raise Http404("Metrics are disabled")
+
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+# ----------------------------------------------------
+# JSON API
+# ----------------------------------------------------
+def _json_body(request):
+    try:
+        return json.loads(request.body)
+    except (UnicodeDecodeError, ValueError):
+        raise ComparisonRequestError({"request": "Request body must be valid JSON."})
+
+
+@csrf_exempt
+@require_POST
+async def api_compare(request):
+    """Rank one comparison in a single round trip (see services.comparison_api)."""
+    try:
+        response = await arun_comparison(_json_body(request))
+    except ComparisonRequestError as e:
+        return JsonResponse({"errors": e.errors}, status=400)
+
+    return JsonResponse(response)
+
+
+@csrf_exempt
+@require_POST
+async def api_compare_batch(request):
+    """Rank {"comparisons": [...]}; invalid entries get their own errors."""
+    try:
+        payload = _json_body(request)
+        if not isinstance(payload, dict):
+            raise ComparisonRequestError({"request": "Request body must be an object."})
+        results = await arun_batch(payload.get("comparisons"))
+    except ComparisonRequestError as e:
+        return JsonResponse({"errors": e.errors}, status=400)
+
+    return JsonResponse({"results": results})
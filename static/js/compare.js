@@ -0,0 +1,38 @@
+// Dynamic add-row using Django formset management fields
+const addBtn = document.getElementById('addItemBtn');
+const tbody = document.getElementById('itemsTbody');
+const totalFormsInput = document.getElementById('id_form-TOTAL_FORMS');
+
+function cloneEmptyFormRow() {
+    const formIndex = parseInt(totalFormsInput.value, 10);
+
+    // Build a row by cloning the last row and clearing values
+    const lastRow = tbody.querySelector('tr.item-row:last-child');
+    if (!lastRow) return;
+    const newRow = lastRow.cloneNode(true);
+
+    // Update all input/select/textarea names/ids
+    newRow.querySelectorAll('input, select, textarea').forEach((el) => {
+        if (el.name) {
+            el.name = el.name.replace(/form-(\d+)-/g, `form-${formIndex}-`);
+        }
+        if (el.id) {
+            el.id = el.id.replace(/form-(\d+)-/g, `form-${formIndex}-`);
+        }
+        if (el.type === 'checkbox') {
+            el.checked = false;
+        } else {
+            el.value = '';
+        }
+    });
+
+    // Clear any error messages
+    newRow.querySelectorAll('.text-danger').forEach((el) => el.remove());
+
+    tbody.appendChild(newRow);
+    totalFormsInput.value = formIndex + 1;
+}
+
+if (addBtn && tbody && totalFormsInput) {
+    addBtn.addEventListener('click', cloneEmptyFormRow);
+}
@@ -0,0 +1,71 @@
+// chart data comes from the canvas' data attributes
+const chart = document.getElementById("chart");
+
+if(chart){
+const labels = JSON.parse(chart.dataset.labels);
+const scores = JSON.parse(chart.dataset.scores);
+if(labels.length){
+new Chart(chart,{
+type:"bar",
+data:{labels:labels,datasets:[{data:scores}]}
+});
+}
+}
+
+// AI explanation is produced in the background; poll until it is ready
+const aiBox = document.getElementById("aiExplanation");
+
+function pollExplanation(){
+fetch(aiBox.dataset.url)
+.then(r => r.ok ? r.json() : {status:"done", explanation:"AI explanation unavailable."})
+.then(data => {
+if(data.status === "done"){
+aiBox.textContent = data.explanation;
+}else{
+setTimeout(pollExplanation, 1000);
+}
+})
+.catch(() => setTimeout(pollExplanation, 3000));
+}
+
+// with streaming on, text appears as the model writes it; on any stream
+// error fall back to polling (which also restarts the job if needed)
+function streamExplanation(){
+const source = new EventSource(aiBox.dataset.streamUrl);
+let started = false;
+source.addEventListener("chunk", e => {
+if(!started){ aiBox.textContent = ""; started = true; }
+aiBox.textContent += JSON.parse(e.data).text;
+});
+source.addEventListener("done", e => {
+source.close();
+aiBox.textContent = JSON.parse(e.data).text;
+});
+source.onerror = () => {
+source.close();
+pollExplanation();
+};
+}
+
+function startExplanation(){
+if(aiBox.dataset.streamUrl && window.EventSource){
+streamExplanation();
+}else{
+pollExplanation();
+}
+}
+
+// in "local" mode the LLM is only asked when the user clicks
+const aiButton = document.getElementById("aiExplainButton");
+
+if(aiBox){
+if(aiButton){
+aiButton.addEventListener("click", () => {
+aiButton.remove();
+aiBox.innerHTML = '<span class="spinner-border spinner-border-sm text-primary"></span> Generating explanation...';
+startExplanation();
+});
+}else{
+startExplanation();
+}
+}